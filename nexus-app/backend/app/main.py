@@ -1,11 +1,61 @@
-from fastapi import FastAPI
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import ai
+from fastapi.responses import PlainTextResponse
+from app.responses import ORJSONResponse
+from app.routes import ai, realtime
+from app.services import metrics
+from app.services.http_client import create_llm_http_client, prewarm
+from app.services.profiler import create_profiler
+
+# Sampling profiler for slow requests, enabled by NEXUS_PROFILE_SLOW_MS
+profiler = create_profiler()
+metrics.registry.add_collector(ai.ai_service.collect_metrics)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The session database is opened here rather than at import
+    ai.session_store.open()
+    # One pooled keep-alive client shared by every LLM call
+    prewarming = None
+    if ai.ai_service.use_openai:
+        ai.ai_service.http_client = create_llm_http_client()
+        connections = int(os.getenv("NEXUS_LLM_PREWARM_CONNECTIONS", "0"))
+        if connections:
+            prewarming = asyncio.create_task(prewarm(ai.ai_service.http_client, ai.ai_service.api_key, connections))
+    # Load the LLM stack in the background so the first chat doesn't pay for it
+    if os.getenv("NEXUS_LLM_WARMUP", "true").lower() in ("1", "true", "yes"):
+        ai.ai_service.start_warm_up()
+    # Build or map the study-technique index before the first chat needs it
+    ai.ai_service.retrieval.load()
+    # Drop idle conversations in the background
+    sweeper = asyncio.create_task(ai.ai_service.conversations.run_eviction_loop())
+    if profiler:
+        profiler.start()
+    yield
+    sweeper.cancel()
+    if prewarming is not None:
+        prewarming.cancel()
+        # Collect the outcome so a failed pre-warm is never reported as unretrieved
+        await asyncio.gather(prewarming, return_exceptions=True)
+    if profiler:
+        profiler.stop()
+    if ai.ai_service.http_client is not None:
+        await ai.ai_service.http_client.aclose()
+    ai.analytics_executor.shutdown()
+    ai.session_store.close()
+
 
 app = FastAPI(
     title="Nexus API",
     description="AI-powered productivity assistant backend",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS configuration
@@ -17,8 +67,51 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def _route_template(request: Request) -> str:
+    """
+    Label requests by route template so path parameters don't explode
+    cardinality. Routes of included routers may report their path without
+    the router prefix, so the prefix is recovered from the request path.
+    """
+    route = request.scope.get("route")
+    if route is None:
+        return "unmatched"
+    rendered = route.path
+    for name, value in request.scope.get("path_params", {}).items():
+        rendered = rendered.replace("{" + name + "}", str(value))
+    full = request.scope["path"]
+    prefix = full[:-len(rendered)] if rendered and full.endswith(rendered) else ""
+    return prefix + route.path
+
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    """Per-route latency, in-flight requests and 5xx counts by exception type."""
+    info, token = metrics.begin_request()
+    metrics.http_in_flight.inc()
+    started = time.monotonic()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    except Exception as e:
+        info["exception"] = type(e).__name__
+        raise
+    finally:
+        finished = time.monotonic()
+        metrics.http_in_flight.dec()
+        metrics.end_request(token)
+        path = _route_template(request)
+        metrics.http_latency.observe(finished - started, method=request.method, route=path)
+        metrics.http_requests.inc(method=request.method, route=path, status=str(status))
+        if status >= 500:
+            metrics.http_errors.inc(route=path, exception=info.get("exception", "HTTPException"))
+        if profiler:
+            profiler.observe(f"{request.method} {path}", started, finished)
+
 # Include routers
 app.include_router(ai.router, prefix="/api", tags=["AI"])
+app.include_router(realtime.router, tags=["Realtime"])
 
 @app.get("/")
 async def root():
@@ -27,3 +120,15 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Ready unless the LLM is still warming up; reports whether it is warm."""
+    state = ai.ai_service.llm_state
+    body = {"status": "warming" if state == "warming" else "ready", "llm": state}
+    return ORJSONResponse(body, status_code=503 if state == "warming" else 200)
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus text exposition of request, LLM and subsystem metrics."""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
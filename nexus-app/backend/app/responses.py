@@ -0,0 +1,20 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson, which also serializes NumPy values.
+    Falls back to the standard encoder when orjson is not installed.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
@@ -1,12 +1,42 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
+import asyncio
+import json
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, Field, model_validator
+from typing import Annotated, AsyncIterator, List, Optional, Tuple, Union
+from datetime import datetime
 from app.services.ai_service import AIService
-from app.services.analytics_service import AnalyticsService
+from app.services import metrics
+from app.services.analysis_cache import (
+    analysis_etag,
+    create_analysis_cache,
+    etag_matches,
+    merge_weeks,
+    sessions_digest,
+)
+from app.services.analytics_executor import AnalyticsRejected, create_analytics_executor
+from app.services.focus_patterns import FocusPatternAnalyzer, sessions_to_columns
+from app.responses import ORJSONResponse
+from app.services.analytics_service import (
+    AnalyticsService,
+    columns_to_rows,
+    pack_weekly_stats,
+    rows_to_columns,
+)
+from app.services.plan_engine import plan_items
+from app.services.session_store import create_session_store
+from app.services.streaming_analytics import create_streaming_analytics
 
 router = APIRouter()
 ai_service = AIService()
 analytics_service = AnalyticsService()
+session_store = create_session_store()
+analysis_cache = create_analysis_cache()
+analytics_engine = create_streaming_analytics(session_store, analytics_service)
+analytics_executor = create_analytics_executor()
+focus_analyzer = FocusPatternAnalyzer()
+metrics.registry.add_collector(analysis_cache.collect_metrics)
+metrics.registry.add_collector(analytics_executor.collect_metrics)
 
 
 class WeeklyStats(BaseModel):
@@ -16,11 +46,62 @@ class WeeklyStats(BaseModel):
     sessionCount: int
 
 
+class WeeklyStatsColumns(BaseModel):
+    """Weekly stats as parallel arrays, one entry per week; cheaper to parse for long histories."""
+    weekNumber: List[int]
+    year: List[int]
+    totalMinutes: List[int]
+    sessionCount: List[int]
+
+    @model_validator(mode="after")
+    def check_lengths(self):
+        if not len(self.weekNumber) == len(self.year) == len(self.totalMinutes) == len(self.sessionCount):
+            raise ValueError("weekly stats columns must have the same length")
+        return self
+
+
+def weekly_input(weekly_stats: Union[List[WeeklyStats], WeeklyStatsColumns]) -> Union[List[dict], dict]:
+    """Plain rows, or a plain columnar dict, for the analytics service."""
+    if isinstance(weekly_stats, WeeklyStatsColumns):
+        return weekly_stats.model_dump()
+    return [w.model_dump() for w in weekly_stats]
+
+
+class SessionEvent(BaseModel):
+    id: str
+    subject: str
+    durationMinutes: int = Field(ge=0)
+    timestamp: datetime
+    completed: bool = True
+    xpEarned: int = 0
+
+
+class SessionColumns(BaseModel):
+    """Sessions as parallel arrays for bulk uploads; timestamps are epoch milliseconds."""
+    timestamp: List[int]
+    durationMinutes: List[Annotated[int, Field(ge=0)]]
+    subject: List[str]
+
+    @model_validator(mode="after")
+    def check_lengths(self):
+        if not len(self.timestamp) == len(self.durationMinutes) == len(self.subject):
+            raise ValueError("session columns must have the same length")
+        return self
+
+
+def session_input(sessions: Union[List[SessionEvent], SessionColumns]) -> dict:
+    """Columnar sessions for the focus pattern analyzer."""
+    if isinstance(sessions, SessionColumns):
+        return sessions.model_dump()
+    return sessions_to_columns([s.model_dump() for s in sessions])
+
+
 class ChatRequest(BaseModel):
     message: str
     weeklyStats: List[WeeklyStats] = []
     todayStats: dict = {}
     subjectDistribution: dict = {}
+    userId: Optional[str] = None
 
 
 class ChatResponse(BaseModel):
@@ -29,15 +110,41 @@ class ChatResponse(BaseModel):
 
 
 class AnalyzeRequest(BaseModel):
-    weeklyStats: List[WeeklyStats]
+    weeklyStats: Union[List[WeeklyStats], WeeklyStatsColumns]
     todayStats: dict
     subjectDistribution: dict
+    # Optional raw sessions for time-of-day insights; utcOffsetMinutes is added to UTC for local time
+    sessions: Optional[Union[List[SessionEvent], SessionColumns]] = None
+    utcOffsetMinutes: int = 0
+
+
+class FocusPatternsRequest(BaseModel):
+    sessions: Union[List[SessionEvent], SessionColumns]
+    utcOffsetMinutes: int = 0
+
+
+class AnalyzeDeltaRequest(BaseModel):
+    baseEtag: str
+    weeklyStats: List[WeeklyStats] = []
+    todayStats: Optional[dict] = None
+    subjectDistribution: Optional[dict] = None
+    windowWeeks: Optional[int] = None
+
+
+class BatchAnalyzeRequest(BaseModel):
+    users: List[AnalyzeRequest]
+
+
+class IngestSessionsRequest(BaseModel):
+    userId: str
+    sessions: List[SessionEvent]
 
 
 class StudyPlanRequest(BaseModel):
     goal: str
     daysAvailable: int
     subjectDistribution: dict = {}
+    weeklyStats: List[WeeklyStats] = []
 
 
 @router.post("/chat", response_model=ChatResponse)
@@ -50,29 +157,308 @@ async def chat(request: ChatRequest):
     try:
         response = await ai_service.chat(
             message=request.message,
-            weekly_stats=request.weeklyStats,
+            weekly_stats=[w.model_dump() for w in request.weeklyStats],
             today_stats=request.todayStats,
-            subject_dist=request.subjectDistribution
+            subject_dist=request.subjectDistribution,
+            user_id=request.userId
         )
         return response
     except Exception as e:
+        metrics.record_exception(e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Chat with the AI productivity coach, streaming the reply as Server-Sent Events.
+    Emits `chart` (if any) first, then `token` events, then a final `done`.
+    """
+    events = ai_service.chat_stream(
+        message=request.message,
+        weekly_stats=[w.model_dump() for w in request.weeklyStats],
+        today_stats=request.todayStats,
+        subject_dist=request.subjectDistribution,
+        user_id=request.userId
+    )
+    return StreamingResponse(
+        _sse(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _sse(events: AsyncIterator[Tuple[str, object]]) -> AsyncIterator[str]:
+    """Encode (event, data) pairs in the text/event-stream wire format."""
+    try:
+        async for event, data in events:
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    except Exception as e:
+        # Headers are already sent, so the middleware cannot see this failure
+        metrics.http_errors.inc(route="/api/chat/stream", exception=type(e).__name__)
+        yield f"event: error\ndata: {json.dumps(str(e))}\n\n"
+
+
+@router.get("/chat/cache-stats")
+async def chat_cache_stats():
+    """
+    Hit/miss counters and occupancy of the chat response cache.
+    """
+    return ai_service.response_cache.stats()
+
+
+@router.get("/chat/inflight-stats")
+async def chat_inflight_stats():
+    """
+    Counters for upstream LLM calls and identical calls coalesced onto them.
+    """
+    return ai_service.single_flight.stats()
+
+
+@router.get("/chat/routing-stats")
+async def chat_routing_stats():
+    """
+    Per-intent counts of messages answered from templates or the technique index versus sent to the LLM.
+    """
+    return ai_service.intent_router.stats()
+
+
+@router.get("/chat/retrieval-stats")
+async def chat_retrieval_stats():
+    """
+    Size and query counters of the local study-technique index.
+    """
+    return ai_service.retrieval.stats()
+
+
+@router.get("/chat/scheduler-stats")
+async def chat_scheduler_stats():
+    """
+    Queue depth, wait times and degradation counts of the LLM scheduler.
+    """
+    return ai_service.scheduler.stats()
+
+
+@router.get("/chat/memory-stats")
+async def chat_memory_stats():
+    """
+    Size and eviction counters of the per-user conversation memory.
+    """
+    return ai_service.conversations.stats()
+
+
+def _rejected(error: AnalyticsRejected) -> HTTPException:
+    if error.reason == "queue_full":
+        return HTTPException(status_code=503, detail="Analytics is busy; retry shortly", headers={"Retry-After": "1"})
+    return HTTPException(status_code=504, detail="Analytics timed out")
+
+
+async def _analysis_response(
+    inputs: dict,
+    if_none_match: Optional[str],
+    sessions: Optional[dict] = None,
+    focus_patterns: Optional[dict] = None
+) -> Response:
+    """
+    Serve an analysis by the ETag of its inputs. Results are cached
+    serialized, and a client already holding the ETag gets an empty 304
+    without any analysis, cached or not. Cache misses are analyzed on the
+    analytics executor, off the event loop. Inputs name sessions only by
+    digest: pass the raw `sessions`, or the `focus_patterns` already
+    aggregated from them.
+    """
+    etag = analysis_etag(inputs)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    # The ETag depends only on the inputs, so revalidation needs no result
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    cached = analysis_cache.get(etag)
+    if cached is None:
+        if sessions is not None:
+            focus_patterns = await analytics_executor.run(
+                "thread", focus_analyzer.analyze, sessions, inputs["utcOffsetMinutes"]
+            )
+        body = await analytics_executor.analyze(
+            inputs["weeklyStats"], inputs["todayStats"], inputs["subjectDistribution"], focus_patterns
+        )
+        analysis_cache.set(etag, inputs, body, focus_patterns)
+    else:
+        body = cached.body
+    return Response(body, media_type="application/json", headers=headers)
+
+
 @router.post("/analyze-stats")
-async def analyze_stats(request: AnalyzeRequest):
+async def analyze_stats(request: AnalyzeRequest, if_none_match: Optional[str] = Header(None)):
     """
     Get AI-powered analysis of productivity statistics.
     Returns insights about growth, patterns, and recommendations.
+    Responses carry an ETag; send it back as If-None-Match to get a 304 when nothing changed.
+    weeklyStats may be sent as columns, and weeklyData is then echoed as columns too.
+    With raw sessions, the result adds focusPatterns and a best focus time recommendation.
     """
     try:
-        analysis = analytics_service.analyze(
-            weekly_stats=request.weeklyStats,
-            today_stats=request.todayStats,
-            subject_dist=request.subjectDistribution
+        inputs = {
+            "weeklyStats": weekly_input(request.weeklyStats),
+            "todayStats": request.todayStats,
+            "subjectDistribution": request.subjectDistribution,
+        }
+        sessions = None
+        if request.sessions is not None:
+            sessions = session_input(request.sessions)
+            inputs["sessions"] = sessions_digest(sessions)
+            inputs["utcOffsetMinutes"] = request.utcOffsetMinutes
+        return await _analysis_response(inputs, if_none_match, sessions=sessions)
+    except AnalyticsRejected as e:
+        raise _rejected(e)
+    except Exception as e:
+        metrics.record_exception(e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/analyze-stats/delta")
+async def analyze_stats_delta(request: AnalyzeDeltaRequest, if_none_match: Optional[str] = Header(None)):
+    """
+    Analyze statistics sent as changes to an earlier /analyze-stats request.
+    `baseEtag` names that request; only weeks that changed or are new are sent,
+    today's stats and subjects only if they changed. Returns 412 when the base
+    is no longer cached, in which case the client resends everything.
+    """
+    base = analysis_cache.get(request.baseEtag)
+    if base is None:
+        raise HTTPException(status_code=412, detail="Unknown baseEtag; send the full statistics")
+    try:
+        base_weeks = base.inputs["weeklyStats"]
+        columnar = isinstance(base_weeks, dict)
+        weeks = merge_weeks(
+            columns_to_rows(base_weeks) if columnar else base_weeks,
+            [w.model_dump() for w in request.weeklyStats],
+            request.windowWeeks
+        )
+        inputs = {
+            "weeklyStats": rows_to_columns(weeks) if columnar else weeks,
+            "todayStats": base.inputs["todayStats"] if request.todayStats is None else request.todayStats,
+            "subjectDistribution": (
+                base.inputs["subjectDistribution"] if request.subjectDistribution is None
+                else request.subjectDistribution
+            ),
+        }
+        # Sessions are not part of deltas; the base request's carry over as
+        # their digest and the focus patterns already computed from them
+        for key in ("sessions", "utcOffsetMinutes"):
+            if key in base.inputs:
+                inputs[key] = base.inputs[key]
+        return await _analysis_response(inputs, if_none_match, focus_patterns=base.focus_patterns)
+    except AnalyticsRejected as e:
+        raise _rejected(e)
+    except Exception as e:
+        metrics.record_exception(e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _batch_body(users: list) -> bytes:
+    weekly_stats = [weekly_input(u.weeklyStats) for u in users]
+    minutes, sessions, lengths = pack_weekly_stats(weekly_stats)
+    results = analytics_service.analyze_batch(
+        minutes,
+        sessions,
+        lengths,
+        today_stats=[u.todayStats for u in users],
+        subject_dists=[u.subjectDistribution for u in users],
+        weekly_data=weekly_stats,
+        focus_patterns=[
+            focus_analyzer.analyze(session_input(u.sessions), u.utcOffsetMinutes) if u.sessions is not None else None
+            for u in users
+        ]
+    )
+    return ORJSONResponse({"results": results}).body
+
+
+@router.post("/analyze-stats/batch")
+async def analyze_stats_batch(request: BatchAnalyzeRequest):
+    """
+    Analyze many users' statistics in one call.
+    Results are returned in request order and match /analyze-stats per user,
+    focusPatterns included for users that send sessions.
+    """
+    try:
+        body = await analytics_executor.run("thread", _batch_body, request.users)
+        return Response(body, media_type="application/json")
+    except AnalyticsRejected as e:
+        raise _rejected(e)
+    except Exception as e:
+        metrics.record_exception(e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/focus-patterns")
+async def focus_patterns(request: FocusPatternsRequest):
+    """
+    When does the user focus best: a 7x24 day/hour heatmap of focus minutes,
+    per-subject hour-of-day profiles, and the best focus window and day.
+    Send large histories as columns.
+    """
+    try:
+        return await analytics_executor.run(
+            "thread", focus_analyzer.analyze, session_input(request.sessions), request.utcOffsetMinutes
+        )
+    except AnalyticsRejected as e:
+        raise _rejected(e)
+    except Exception as e:
+        metrics.record_exception(e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/sessions")
+async def ingest_sessions(request: IngestSessionsRequest):
+    """
+    Append completed focus sessions to the server-side event store.
+    Rollups are updated incrementally; re-sent session ids are ignored.
+    New sessions are pushed to the user's /ws/analytics subscribers.
+    """
+    try:
+        # SQLite writes and any history reload block, so they run in a worker thread
+        accepted = await asyncio.to_thread(
+            analytics_engine.ingest,
+            request.userId,
+            [s.model_dump() for s in request.sessions]
         )
-        return analysis
+        if accepted:
+            analytics_engine.publish(request.userId)
+        return {"ingested": len(accepted)}
+    except Exception as e:
+        metrics.record_exception(e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/analytics/stream-stats")
+async def analytics_stream_stats():
+    """
+    Tracked users, live subscribers and update counters of the streaming analytics engine.
+    """
+    return analytics_engine.stats()
+
+
+@router.get("/analytics/executor-stats")
+async def analytics_executor_stats():
+    """
+    Pending, completed and rejected jobs of the analytics thread and process pools.
+    """
+    return analytics_executor.stats()
+
+
+@router.get("/analyze-stats/{user_id}")
+async def analyze_stored_stats(user_id: str):
+    """
+    Get productivity analysis from the stored session rollups.
+    Unlike POST /analyze-stats, the client does not re-send its history.
+    """
+    rollup = session_store.get_rollup(user_id, history_weeks=analytics_service.forecaster.history_weeks)
+    if rollup is None:
+        raise HTTPException(status_code=404, detail="No sessions recorded for this user")
+    try:
+        return analytics_service.analyze_rollup(rollup)
     except Exception as e:
+        metrics.record_exception(e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
@@ -85,8 +471,10 @@ async def generate_study_plan(request: StudyPlanRequest):
         plan = await ai_service.generate_study_plan(
             goal=request.goal,
             days_available=request.daysAvailable,
-            subject_dist=request.subjectDistribution
+            subject_dist=request.subjectDistribution,
+            weekly_stats=[w.model_dump() for w in request.weeklyStats]
         )
-        return {"plan": plan}
+        return {"plan": plan_items(plan), **plan}
     except Exception as e:
+        metrics.record_exception(e)
         raise HTTPException(status_code=500, detail=str(e))
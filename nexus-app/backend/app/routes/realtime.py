@@ -0,0 +1,39 @@
+import asyncio
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from app.responses import ORJSONResponse
+from app.routes.ai import analytics_engine
+
+router = APIRouter()
+
+
+@router.websocket("/ws/analytics")
+async def analytics_updates(websocket: WebSocket, userId: str):
+    """
+    Push the user's analysis whenever new sessions are ingested.
+    The current analysis (or null before the first session) is sent on connect.
+    """
+    await websocket.accept()
+    updates = analytics_engine.subscribe(userId)
+
+    async def push():
+        summary = analytics_engine.summary(userId)
+        while True:
+            await websocket.send_text(ORJSONResponse(summary).body.decode("utf-8"))
+            summary = await updates.get()
+
+    async def watch():
+        # Incoming messages are ignored; this only notices the client leaving
+        while True:
+            await websocket.receive_text()
+
+    tasks = [asyncio.create_task(push()), asyncio.create_task(watch())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                raise error
+    finally:
+        for task in tasks:
+            task.cancel()
+        analytics_engine.unsubscribe(userId, updates)
@@ -1,9 +1,57 @@
+import asyncio
+import hashlib
+import json
 import os
-from typing import List, Optional
+import re
+import time
+from typing import AsyncIterator, List, Optional, Tuple
 from dotenv import load_dotenv
+from pydantic import BaseModel
+
+from app.services import metrics
+from app.services.conversation_store import ConversationStore, create_conversation_store, estimate_tokens
+from app.services.forecasting import create_forecaster
+from app.services.plan_engine import StudyPlanEngine
+from app.services.prompt_builder import create_prompt_builder
+from app.services.llm_scheduler import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    DeadlineExceeded,
+    LLMScheduler,
+    create_llm_scheduler,
+)
+from app.services.intent_router import FALLBACK_INTENTS, IntentMatch, IntentRouter, KeywordMatcher, create_intent_router
+from app.services.response_cache import ResponseCache, chat_cache_key, create_response_cache
+from app.services.retrieval import Passage, RetrievalIndex, create_retrieval_index
+from app.services.single_flight import SingleFlight
 
 load_dotenv()
 
+# Static instructions; they open every prompt unchanged so provider-side
+# prompt caching can reuse them. Per-user statistics follow in a separate message.
+SYSTEM_PROMPT = """You are a friendly and encouraging AI Study Coach named Nexus.
+Your role is to help students improve their productivity and study habits.
+
+When responding:
+1. Be encouraging and positive
+2. Provide specific, actionable advice
+3. Reference the user's actual statistics when available
+4. Use emojis sparingly for engagement
+5. Keep responses concise but helpful"""
+
+CHART_KEYWORDS = ["growth", "progress", "trend", "week", "chart", "show"]
+
+_CHART_MATCHER = KeywordMatcher(CHART_KEYWORDS)
+_FALLBACK_MATCHER = KeywordMatcher(kw for _, keywords in FALLBACK_INTENTS for kw in keywords)
+
+class PlanTitles(BaseModel):
+    """Structured output schema for LLM-phrased study plan titles."""
+    titles: List[str]
+
+
+# Words plus trailing whitespace, used to stream canned text in small pieces
+_STREAM_CHUNK = re.compile(r"\S+\s*|\s+")
+
 
 class AIService:
     """
@@ -11,82 +59,315 @@ class AIService:
     Falls back to rule-based responses if OpenAI API key is not configured.
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        response_cache: Optional[ResponseCache] = None,
+        intent_router: Optional[IntentRouter] = None,
+        conversations: Optional[ConversationStore] = None,
+        scheduler: Optional[LLMScheduler] = None,
+        retrieval: Optional[RetrievalIndex] = None
+    ):
         self.api_key = os.getenv("OPENAI_API_KEY")
         self.use_openai = bool(self.api_key)
+        self.response_cache = response_cache or create_response_cache()
+        # Identical prompts in flight at the same time share one upstream call
+        self.single_flight = SingleFlight()
+        # Statistics questions are answered from templates without the LLM
+        self.intent_router = intent_router or create_intent_router()
+        # Bounded per-user chat history, compacted to a rolling summary
+        self.conversations = conversations or create_conversation_store()
+        # Upstream calls are admitted against a concurrency cap and a deadline
+        self.scheduler = scheduler or create_llm_scheduler()
+        self.chat_deadline = float(os.getenv("NEXUS_LLM_CHAT_DEADLINE", "8"))
+        self.plan_deadline = float(os.getenv("NEXUS_LLM_PLAN_DEADLINE", "20"))
+        # Study plans are scheduled locally; the LLM optionally phrases the titles
+        self.plan_engine = StudyPlanEngine()
+        self.phrase_plan_titles = os.getenv("NEXUS_PLAN_LLM_TITLES", "false").lower() in ("1", "true", "yes")
+        # "Am I improving?" is answered from a next-week forecast
+        self.forecaster = create_forecaster()
+        # Compact statistics after a fixed instruction prefix, within a token budget
+        self.prompt_builder = create_prompt_builder(SYSTEM_PROMPT)
+        # Local study-technique passages: answer coaching questions directly or ground the LLM
+        self.retrieval = retrieval or create_retrieval_index()
         
-        if self.use_openai:
-            try:
-                from langchain_openai import ChatOpenAI
-                from langchain.prompts import ChatPromptTemplate
-                from langchain.memory import ConversationBufferMemory
-                
-                self.llm = ChatOpenAI(
-                    model="gpt-4o-mini",
-                    temperature=0.7,
-                    api_key=self.api_key
-                )
-                self.memory = ConversationBufferMemory(return_messages=True)
-                
-                self.system_prompt = """You are a friendly and encouraging AI Study Coach named Nexus. 
-                Your role is to help students improve their productivity and study habits.
-                
-                When responding:
-                1. Be encouraging and positive
-                2. Provide specific, actionable advice
-                3. Reference the user's actual statistics when available
-                4. Use emojis sparingly for engagement
-                5. Keep responses concise but helpful
-                
-                User's current statistics:
-                - Weekly focus time trend: {weekly_stats}
-                - Today's stats: {today_stats}
-                - Subject distribution: {subject_dist}
-                """
-                
-                self.prompt_template = ChatPromptTemplate.from_messages([
-                    ("system", self.system_prompt),
-                    ("human", "{message}")
-                ])
-                
-            except ImportError:
-                self.use_openai = False
+        # The LangChain stack is imported and built on first use (or by
+        # warm_up) so importing this module stays cheap
+        self.llm = None
+        self.prompt_template = None
+        # Shared keep-alive HTTP client, set by the app lifespan before the LLM is built
+        self.http_client = None
+        self._llm_lock = asyncio.Lock()
+        self._warmup_task: Optional[asyncio.Task] = None
+    
+    def _load_llm(self) -> None:
+        """Import LangChain and build the client; runs in a worker thread."""
+        from langchain_openai import ChatOpenAI
+        from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+        
+        self.system_prompt = SYSTEM_PROMPT
+        self.prompt_template = ChatPromptTemplate.from_messages([
+            ("system", self.system_prompt),
+            ("system", "{context}"),
+            MessagesPlaceholder(variable_name="history", optional=True),
+            ("human", "{message}")
+        ])
+        self.llm = ChatOpenAI(
+            model="gpt-4o-mini",
+            temperature=0.7,
+            api_key=self.api_key,
+            # Optional OpenAI-compatible endpoint (proxy, gateway or local stub)
+            base_url=os.getenv("OPENAI_BASE_URL") or None,
+            http_async_client=self.http_client
+        )
+    
+    async def _ensure_llm(self) -> bool:
+        """Load the LLM if needed. Returns False when it is unavailable."""
+        if self.llm is not None:
+            return True
+        if not self.use_openai:
+            return False
+        async with self._llm_lock:
+            if self.llm is None and self.use_openai:
+                try:
+                    await asyncio.to_thread(self._load_llm)
+                except ImportError:
+                    self.use_openai = False
+        return self.llm is not None
+    
+    def start_warm_up(self) -> Optional[asyncio.Task]:
+        """Begin loading the LLM in the background, if OpenAI is configured."""
+        if self.use_openai and self.llm is None and self._warmup_task is None:
+            self._warmup_task = asyncio.create_task(self._ensure_llm())
+        return self._warmup_task
+    
+    @property
+    def llm_state(self) -> str:
+        """One of "disabled", "cold", "warming" or "warm"."""
+        if self.llm is not None:
+            return "warm"
+        if not self.use_openai:
+            return "disabled"
+        if self._warmup_task is not None and not self._warmup_task.done():
+            return "warming"
+        return "cold"
     
     async def chat(
         self,
         message: str,
         weekly_stats: List[dict],
         today_stats: dict,
-        subject_dist: dict
+        subject_dist: dict,
+        user_id: Optional[str] = None
     ) -> dict:
-        """Process a chat message and return AI response."""
+        """
+        Process a chat message and return AI response.
+        With a user_id, earlier turns are included in the prompt and this one is remembered.
+        """
+        history = self.conversations.history(user_id) if user_id else []
         
         if self.use_openai:
-            return await self._chat_with_openai(message, weekly_stats, today_stats, subject_dist)
+            route, match, passages = self._route(message)
+            if route == "template":
+                response = self._render_template(match.intent, weekly_stats, today_stats, subject_dist)
+            elif route == "retrieval":
+                response = self._passage_reply(passages)
+            else:
+                response = await self._chat_with_openai(
+                    message, weekly_stats, today_stats, subject_dist, history, passages
+                )
         else:
-            return self._chat_fallback(message, weekly_stats, today_stats, subject_dist)
+            self._record_fallback("openai_disabled")
+            response = self._chat_fallback(message, weekly_stats, today_stats, subject_dist)
+        
+        if user_id:
+            self.conversations.add_turn(user_id, message, response["content"])
+        return response
+    
+    async def chat_stream(
+        self,
+        message: str,
+        weekly_stats: List[dict],
+        today_stats: dict,
+        subject_dist: dict,
+        user_id: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, object]]:
+        """
+        Stream a chat reply as (event, data) pairs.
+        
+        Events: "chart" (sent before any text when a chart is selected),
+        "token" (a piece of the reply), "reset" (discard streamed text, the
+        fallback reply follows) and "done" (the full reply text).
+        """
+        history = self.conversations.history(user_id) if user_id else []
+        async for event, data in self._stream_events(message, weekly_stats, today_stats, subject_dist, history):
+            if event == "done" and user_id:
+                self.conversations.add_turn(user_id, message, data)
+            yield event, data
+    
+    async def _stream_events(
+        self,
+        message: str,
+        weekly_stats: List[dict],
+        today_stats: dict,
+        subject_dist: dict,
+        history: List[Tuple[str, str]]
+    ) -> AsyncIterator[Tuple[str, object]]:
+        if not self.use_openai:
+            self._record_fallback("openai_disabled")
+            fallback = self._chat_fallback(message, weekly_stats, today_stats, subject_dist)
+            async for event in self._stream_reply(fallback, chart_sent=False):
+                yield event
+            return
+        
+        route, match, passages = self._route(message)
+        if route != "llm":
+            if route == "template":
+                reply = self._render_template(match.intent, weekly_stats, today_stats, subject_dist)
+            else:
+                reply = self._passage_reply(passages)
+            async for event in self._stream_reply(reply, chart_sent=False):
+                yield event
+            return
+        
+        if not await self._ensure_llm():
+            self._record_fallback("llm_unavailable")
+            fallback = self._chat_fallback(message, weekly_stats, today_stats, subject_dist)
+            async for event in self._stream_reply(fallback, chart_sent=False):
+                yield event
+            return
+        
+        cache_key = chat_cache_key(message, weekly_stats, today_stats, subject_dist, history)
+        include_chart = self._wants_chart(message)
+        if include_chart:
+            yield "chart", weekly_stats
+        
+        cached = await self.response_cache.get(cache_key)
+        if cached is not None:
+            reply = {"content": cached["content"], "chartData": weekly_stats if include_chart else None}
+            async for event in self._stream_reply(reply, chart_sent=True):
+                yield event
+            return
+        
+        parts = []
+        usage = None
+        deadline = time.monotonic() + self.chat_deadline
+        try:
+            async with self.scheduler.slot(PRIORITY_INTERACTIVE, deadline):
+                formatted_prompt = self._format_prompt(
+                    message, weekly_stats, today_stats, subject_dist, history, passages
+                )
+                started = time.monotonic()
+                chunks = self.llm.astream(formatted_prompt).__aiter__()
+                # The deadline bounds time to first token; later tokens are already flowing
+                try:
+                    first = await asyncio.wait_for(chunks.__anext__(), max(0.0, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    self.scheduler.degraded["first_token_timeout"] += 1
+                    raise DeadlineExceeded("first_token_timeout")
+                except StopAsyncIteration:
+                    first = None
+                if first is not None:
+                    usage = getattr(first, "usage_metadata", None) or usage
+                    if first.content:
+                        parts.append(first.content)
+                        yield "token", first.content
+                    async for chunk in chunks:
+                        # Usage, when the endpoint reports it, arrives on the last chunk
+                        usage = getattr(chunk, "usage_metadata", None) or usage
+                        if chunk.content:
+                            parts.append(chunk.content)
+                            yield "token", chunk.content
+                metrics.llm_latency.observe(time.monotonic() - started, operation="chat_stream")
+                self._record_usage("chat_stream", usage, formatted_prompt, "".join(parts))
+        except Exception as e:
+            # Upstream failed, possibly mid-reply: replace it with the rule-based answer
+            self._record_fallback("deadline" if isinstance(e, DeadlineExceeded) else "llm_error", e)
+            if parts:
+                yield "reset", None
+            fallback = self._chat_fallback(message, weekly_stats, today_stats, subject_dist)
+            async for event in self._stream_reply(fallback, chart_sent=include_chart):
+                yield event
+            return
+        
+        content = "".join(parts)
+        await self.response_cache.set(cache_key, {"content": content, "includeChart": include_chart})
+        yield "done", content
+    
+    def _route(self, message: str) -> Tuple[str, IntentMatch, List[Passage]]:
+        """
+        Pick "template", "retrieval" or "llm" for a message. Passages found on
+        the way are returned so an LLM prompt can be grounded in them.
+        """
+        match = self.intent_router.classify(message)
+        passages: List[Passage] = []
+        if self.intent_router.use_template(match):
+            route = "template"
+        else:
+            passages = self.retrieval.search(message)
+            route = "retrieval" if passages and passages[0].score >= self.retrieval.answer_score else "llm"
+        self.intent_router.record(match, route)
+        return route, match, passages
+    
+    @staticmethod
+    def _passage_reply(passages: List[Passage]) -> dict:
+        """Answer from the best passage, pointing at the runners-up."""
+        best = passages[0]
+        content = f"**💡 {best.title}**: {best.text}"
+        if len(passages) > 1:
+            content += "\n\nRelated techniques: " + ", ".join(p.title for p in passages[1:])
+        return {"content": content, "chartData": None}
+    
+    async def _stream_reply(self, reply: dict, chart_sent: bool) -> AsyncIterator[Tuple[str, object]]:
+        """Stream an already-complete reply in word-sized chunks."""
+        if reply.get("chartData") is not None and not chart_sent:
+            yield "chart", reply["chartData"]
+        for piece in _STREAM_CHUNK.findall(reply["content"]):
+            yield "token", piece
+        yield "done", reply["content"]
     
     async def _chat_with_openai(
         self,
         message: str,
         weekly_stats: List[dict],
         today_stats: dict,
-        subject_dist: dict
+        subject_dist: dict,
+        history: Optional[List[Tuple[str, str]]] = None,
+        passages: Optional[List[Passage]] = None
     ) -> dict:
         """Use OpenAI for response generation."""
+        if not await self._ensure_llm():
+            self._record_fallback("llm_unavailable")
+            return self._chat_fallback(message, weekly_stats, today_stats, subject_dist)
         try:
-            formatted_prompt = self.prompt_template.format_messages(
-                weekly_stats=str(weekly_stats[-6:]) if weekly_stats else "No data yet",
-                today_stats=str(today_stats) if today_stats else "No sessions today",
-                subject_dist=str(subject_dist) if subject_dist else "No subjects tracked",
-                message=message
+            # Cached replies are keyed on the same inputs as the prompt, and
+            # chart selection is replayed so a hit matches a fresh answer
+            cache_key = chat_cache_key(message, weekly_stats, today_stats, subject_dist, history)
+            cached = await self.response_cache.get(cache_key)
+            if cached is not None:
+                return {
+                    "content": cached["content"],
+                    "chartData": weekly_stats if cached["includeChart"] else None
+                }
+            
+            formatted_prompt = self._format_prompt(
+                message, weekly_stats, today_stats, subject_dist, history, passages
             )
             
-            response = await self.llm.ainvoke(formatted_prompt)
+            response = await self.single_flight.do(
+                cache_key,
+                lambda: self.scheduler.run(
+                    lambda: self._invoke_llm("chat", self.llm, formatted_prompt),
+                    priority=PRIORITY_INTERACTIVE,
+                    timeout=self.chat_deadline
+                )
+            )
             
             # Determine if we should include chart data
-            include_chart = any(keyword in message.lower() for keyword in 
-                              ["growth", "progress", "trend", "week", "chart", "show"])
+            include_chart = self._wants_chart(message)
+            await self.response_cache.set(
+                cache_key,
+                {"content": response.content, "includeChart": include_chart}
+            )
             
             return {
                 "content": response.content,
@@ -94,8 +375,58 @@ class AIService:
             }
         except Exception as e:
             # Fall back to rule-based on error
+            self._record_fallback("deadline" if isinstance(e, DeadlineExceeded) else "llm_error", e)
             return self._chat_fallback(message, weekly_stats, today_stats, subject_dist)
     
+    async def _invoke_llm(self, operation: str, runnable, prompt):
+        """Call the LLM, recording latency and token usage under `operation`."""
+        started = time.monotonic()
+        response = await runnable.ainvoke(prompt)
+        metrics.llm_latency.observe(time.monotonic() - started, operation=operation)
+        content = getattr(response, "content", None)
+        if content is not None:
+            self._record_usage(operation, getattr(response, "usage_metadata", None), prompt, content)
+        return response
+    
+    @staticmethod
+    def _record_usage(operation: str, usage: Optional[dict], prompt, completion: str) -> None:
+        """Count tokens as reported by the endpoint, or estimate them locally."""
+        if usage:
+            prompt_tokens = usage.get("input_tokens", 0)
+            completion_tokens = usage.get("output_tokens", 0)
+        else:
+            messages = prompt if isinstance(prompt, list) else [prompt]
+            prompt_tokens = sum(estimate_tokens(str(getattr(m, "content", m))) for m in messages)
+            completion_tokens = estimate_tokens(completion)
+        metrics.llm_prompt_tokens.inc(prompt_tokens, operation=operation)
+        metrics.llm_completion_tokens.inc(completion_tokens, operation=operation)
+    
+    @staticmethod
+    def _record_fallback(reason: str, error: Optional[Exception] = None) -> None:
+        metrics.chat_fallbacks.inc(reason=reason)
+        if error is not None:
+            # The caller still gets a reply, so this is the only trace of the failure
+            metrics.llm_silent_failures.inc(exception=type(error).__name__)
+    
+    def _format_prompt(
+        self,
+        message: str,
+        weekly_stats: List[dict],
+        today_stats: dict,
+        subject_dist: dict,
+        history: Optional[List[Tuple[str, str]]] = None,
+        passages: Optional[List[Passage]] = None
+    ) -> list:
+        references = [f"{p.title}: {p.text}" for p in passages or []]
+        context, history = self.prompt_builder.build(
+            message, weekly_stats, today_stats, subject_dist, history, references
+        )
+        return self.prompt_template.format_messages(context=context, history=history, message=message)
+    
+    @staticmethod
+    def _wants_chart(message: str) -> bool:
+        return bool(_CHART_MATCHER.find(message.lower()))
+    
     def _chat_fallback(
         self,
         message: str,
@@ -106,6 +437,27 @@ class AIService:
         """Rule-based fallback responses when OpenAI is not available."""
         lower = message.lower()
         
+        # Determine response based on keywords, in priority order
+        found = _FALLBACK_MATCHER.find(lower)
+        intent = next(
+            (name for name, keywords in FALLBACK_INTENTS if found.intersection(keywords)),
+            "default"
+        )
+        if intent in ("tip", "default"):
+            # Coaching questions are answered from the technique corpus when it has a match
+            passages = self.retrieval.search(message)
+            if passages and (intent == "tip" or passages[0].score >= self.retrieval.answer_score):
+                return self._passage_reply(passages)
+        return self._render_template(intent, weekly_stats, today_stats, subject_dist)
+    
+    def _render_template(
+        self,
+        intent: str,
+        weekly_stats: List[dict],
+        today_stats: dict,
+        subject_dist: dict
+    ) -> dict:
+        """Templated reply for a rule-based intent."""
         # Calculate statistics
         total_minutes = sum(w.get("totalMinutes", 0) for w in weekly_stats)
         total_sessions = sum(w.get("sessionCount", 0) for w in weekly_stats)
@@ -121,8 +473,7 @@ class AIService:
         
         top_subject = max(subject_dist.items(), key=lambda x: x[1])[0] if subject_dist else "None"
         
-        # Determine response based on keywords
-        if any(kw in lower for kw in ["productive", "how was", "week", "stats"]):
+        if intent == "weekly_summary":
             content = f"""📊 **Your Weekly Productivity Summary**
 
 This week you've focused for **{this_week} minutes** across your sessions.
@@ -134,7 +485,7 @@ This week you've focused for **{this_week} minutes** across your sessions.
 Today: {today_stats.get("sessions", 0)} sessions, {today_stats.get("minutes", 0)} minutes, +{today_stats.get("xp", 0)} XP"""
             return {"content": content, "chartData": weekly_stats}
         
-        elif any(kw in lower for kw in ["growth", "progress", "trend"]):
+        elif intent == "growth":
             avg_minutes = int(total_minutes / max(len(weekly_stats), 1))
             content = f"""📈 **Your Growth Over Time**
 
@@ -147,7 +498,33 @@ Here's your productivity trend over the past {len(weekly_stats)} weeks:
 {"🚀 You're on an upward trend! Keep it up!" if growth > 0 else "💪 Let's work on getting back on track!"}"""
             return {"content": content, "chartData": weekly_stats}
         
-        elif any(kw in lower for kw in ["motivation", "unmotivated", "can't focus"]):
+        elif intent == "forecast":
+            forecast = self.forecaster.forecast([w.get("totalMinutes", 0) for w in weekly_stats])
+            if forecast is None:
+                content = f"""🔮 **Not enough data yet**
+
+I need at least {self.forecaster.min_weeks} weeks of focus history to tell whether you're improving. You have {len(weekly_stats)} so far - keep tracking your sessions!"""
+                return {"content": content, "chartData": None}
+            slope = abs(forecast["slopePerWeek"])
+            if forecast["direction"] == "improving":
+                headline = "✨ **Yes, you're improving!**"
+                detail = f"Your focus time has been rising by about **{slope:.0f} minutes per week**"
+            elif forecast["direction"] == "declining":
+                headline = "💪 **Let's get back on track!**"
+                detail = f"Your focus time has been falling by about **{slope:.0f} minutes per week**"
+            else:
+                headline = "📊 **You're holding steady**"
+                detail = "There's no clear upward or downward trend in your focus time"
+            content = f"""{headline}
+
+{detail} over the last {forecast["weeksUsed"]} weeks.
+
+🔮 Next week I expect about **{forecast["nextWeekMinutes"]:.0f} minutes** (likely {forecast["lower"]:.0f}-{forecast["upper"]:.0f}).
+
+{"🚀 Keep up this momentum!" if forecast["direction"] == "improving" else "🎯 One extra 25-minute session a week will move the trend up."}"""
+            return {"content": content, "chartData": weekly_stats}
+        
+        elif intent == "motivation":
             content = """💪 **You've got this!**
 
 Remember: Every expert was once a beginner. The fact that you're here shows you care about your growth.
@@ -160,7 +537,7 @@ Remember: Every expert was once a beginner. The fact that you're here shows you
 "The secret of getting ahead is getting started." - Mark Twain"""
             return {"content": content, "chartData": None}
         
-        elif any(kw in lower for kw in ["plan", "schedule", "exam"]):
+        elif intent == "plan":
             content = """📋 **Personalized Study Plan**
 
 Based on your productivity patterns, here's a suggested plan:
@@ -178,7 +555,7 @@ Based on your productivity patterns, here's a suggested plan:
 💡 Aim to beat your weekly average!"""
             return {"content": content, "chartData": None}
         
-        elif any(kw in lower for kw in ["tip", "advice"]):
+        elif intent == "tip":
             tips = [
                 "**💡 Active Recall**: After studying, close your notes and try to write down everything you remember. This can boost retention by up to 50%!",
                 "**💡 Spaced Repetition**: Review material at increasing intervals: 1 day, 3 days, 1 week, 2 weeks.",
@@ -202,36 +579,81 @@ Try asking me:
         self,
         goal: str,
         days_available: int,
-        subject_dist: dict
-    ) -> List[dict]:
-        """Generate a personalized study plan."""
+        subject_dist: dict,
+        weekly_stats: Optional[List[dict]] = None
+    ) -> dict:
+        """
+        Generate a personalized study plan.
+        The schedule is computed locally; the LLM, when enabled, only rewrites day titles.
+        """
+        plan = self.plan_engine.build(goal, days_available, subject_dist, weekly_stats)
         
-        if self.use_openai:
+        if self.phrase_plan_titles and await self._ensure_llm():
             try:
-                prompt = f"""Create a study plan for: {goal}
-                Days available: {days_available}
-                Current subject focus: {subject_dist}
-                
-                Return a JSON array with objects containing: title, duration, completed (false)
-                Keep it practical and achievable."""
-                
-                response = await self.llm.ainvoke(prompt)
-                # Parse response (simplified)
-                # In production, use structured output
-                return [
-                    {"title": "Review Fundamentals", "duration": "2 days", "completed": False},
-                    {"title": "Practice Problems", "duration": "3 days", "completed": False},
-                    {"title": "Self Assessment", "duration": "1 day", "completed": False},
-                    {"title": "Focus on Weak Areas", "duration": f"{days_available - 6} days", "completed": False},
-                ]
+                titles = await self._phrase_plan_titles(plan)
+                for day, title in zip(plan["days"], titles):
+                    day["title"] = title
             except Exception:
+                # Keep the engine's own titles
                 pass
         
-        # Fallback plan
-        return [
-            {"title": "Review Fundamentals", "duration": "2 days", "completed": False},
-            {"title": "Practice Problems", "duration": "3 days", "completed": False},
-            {"title": "Self Assessment", "duration": "1 day", "completed": False},
-            {"title": "Focus on Weak Areas", "duration": f"{max(1, days_available - 6)} days", "completed": False},
-            {"title": "Final Review", "duration": "2 days", "completed": False},
-        ]
+        return plan
+    
+    def collect_metrics(self):
+        """Registry collector exporting the counters kept by the chat subsystems."""
+        cache = self.response_cache.stats()
+        yield ("nexus_chat_cache_lookups_total", "counter", "Chat response cache lookups by result.",
+               [({"result": "hit"}, cache["hits"]), ({"result": "miss"}, cache["misses"])])
+        flights = self.single_flight.stats()
+        yield ("nexus_llm_coalesced_total", "counter", "LLM calls served by an identical in-flight call.",
+               [({}, flights["coalesced"])])
+        yield ("nexus_intent_routed_total", "counter", "Chat messages by intent and routing decision.",
+               [({"intent": intent, "route": route}, count)
+                for intent, routes in self.intent_router.stats()["routed"].items()
+                for route, count in routes.items()])
+        scheduler = self.scheduler.stats()
+        yield ("nexus_llm_active_calls", "gauge", "LLM calls holding a scheduler slot.",
+               [({}, scheduler["active"])])
+        yield ("nexus_llm_queue_depth", "gauge", "LLM calls waiting for a scheduler slot.",
+               [({}, scheduler["queueDepth"])])
+        yield ("nexus_llm_degraded_total", "counter", "LLM calls rejected or abandoned by the scheduler.",
+               [({"reason": reason}, count) for reason, count in scheduler["degraded"].items()])
+        retrieval = self.retrieval.stats()
+        yield ("nexus_retrieval_queries_total", "counter", "Study-technique index searches by result.",
+               [({"result": "hit"}, retrieval["hits"]),
+                ({"result": "miss"}, retrieval["queries"] - retrieval["hits"])])
+        memory = self.conversations.stats()
+        yield ("nexus_memory_users", "gauge", "Users with conversation memory.", [({}, memory["users"])])
+        yield ("nexus_memory_tokens", "gauge", "Estimated tokens held in conversation memory.",
+               [({}, memory["tokens"])])
+    
+    async def _phrase_plan_titles(self, plan: dict) -> List[str]:
+        """Ask the LLM for friendlier day titles, parsed as structured output and cached."""
+        skeleton = [day["title"] for day in plan["days"]]
+        key = "plan-titles:" + hashlib.sha256(
+            json.dumps([plan["goal"], skeleton]).encode("utf-8")
+        ).hexdigest()
+        cached = await self.response_cache.get(key)
+        if cached is not None:
+            return cached["titles"]
+        
+        outline = "\n".join(f"{i + 1}. {title}" for i, title in enumerate(skeleton))
+        prompt = f"""Rewrite each day title of this study plan for: {plan["goal"]}
+        Make each one short and motivating, keep its subjects, and keep the same order.
+        Return exactly {len(skeleton)} titles.
+        
+        {outline}"""
+        
+        structured_llm = self.llm.with_structured_output(PlanTitles)
+        result = await self.single_flight.do(
+            key,
+            lambda: self.scheduler.run(
+                lambda: self._invoke_llm("plan_titles", structured_llm, prompt),
+                priority=PRIORITY_BACKGROUND,
+                timeout=self.plan_deadline
+            )
+        )
+        if len(result.titles) != len(skeleton):
+            raise ValueError("LLM returned a different number of titles")
+        await self.response_cache.set(key, {"titles": result.titles})
+        return result.titles
@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _digest(value) -> str:
+    if orjson is not None:
+        payload = orjson.dumps(value, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS, default=str)
+    else:
+        payload = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:32]
+
+
+def analysis_etag(inputs: dict) -> str:
+    """
+    Strong ETag for an analysis, hashed from its canonicalized inputs.
+    Week order is kept: the analysis depends on it.
+    """
+    return '"' + _digest(inputs) + '"'
+
+
+def sessions_digest(sessions: dict) -> str:
+    """
+    Stand-in for raw session columns in analysis inputs, so ETags still
+    change with the sessions but cached inputs do not hold them.
+    """
+    return "sha256:" + _digest(sessions)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (weak), accepting lists and "*"."""
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or etag in (c[2:] if c.startswith("W/") else c for c in candidates)
+
+
+def merge_weeks(base: List[dict], changed: List[dict], window: Optional[int] = None) -> List[dict]:
+    """
+    Apply changed weeks to a base history: weeks already present (same year
+    and weekNumber) are replaced in place, new ones appended in order.
+    `window` keeps only the most recent weeks.
+    """
+    merged = list(base)
+    position = {(w["year"], w["weekNumber"]): i for i, w in enumerate(merged)}
+    for week in changed:
+        key = (week["year"], week["weekNumber"])
+        if key in position:
+            merged[position[key]] = week
+        else:
+            position[key] = len(merged)
+            merged.append(week)
+    return merged[-window:] if window else merged
+
+
+class CachedAnalysis(NamedTuple):
+    inputs: dict
+    body: bytes
+    # FocusPatternAnalyzer output when the request had sessions
+    focus_patterns: Optional[dict] = None
+
+
+class AnalysisCache:
+    """
+    LRU of serialized analyze-stats responses keyed by ETag. The inputs are
+    kept alongside so delta requests can be applied to a known version.
+    Raw sessions are never kept: inputs carry their digest and the entry
+    the focus patterns aggregated from them.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedAnalysis]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, etag: str) -> Optional[CachedAnalysis]:
+        entry = self._entries.get(etag)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(etag)
+        self.hits += 1
+        return entry
+
+    def set(self, etag: str, inputs: dict, body: bytes, focus_patterns: Optional[dict] = None) -> None:
+        self._entries[etag] = CachedAnalysis(inputs, body, focus_patterns)
+        self._entries.move_to_end(etag)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def collect_metrics(self):
+        """Registry collector for the cache counters."""
+        yield ("nexus_analysis_cache_lookups_total", "counter", "Analyze-stats result cache lookups by result.",
+               [({"result": "hit"}, self.hits), ({"result": "miss"}, self.misses)])
+        yield ("nexus_analysis_cache_evictions_total", "counter", "Analyze-stats results evicted from the cache.",
+               [({}, self.evictions)])
+        yield ("nexus_analysis_cache_entries", "gauge", "Analyze-stats results held in the cache.",
+               [({}, len(self._entries))])
+
+
+def create_analysis_cache() -> AnalysisCache:
+    """NEXUS_ANALYSIS_CACHE_MAX_ENTRIES bounds the number of cached results."""
+    return AnalysisCache(max_entries=int(os.getenv("NEXUS_ANALYSIS_CACHE_MAX_ENTRIES", "512")))
@@ -0,0 +1,218 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from collections import defaultdict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from app.responses import ORJSONResponse
+from app.services.analytics_service import (
+    WEEKLY_COLUMNS,
+    AnalyticsService,
+    columns_to_rows,
+    rows_to_columns,
+    series_length,
+)
+
+# Stateless, so every thread shares it; each worker process builds its own
+_service = AnalyticsService()
+
+
+class AnalyticsRejected(Exception):
+    """An analytics job was refused (queue_full) or abandoned (timeout)."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def _analysis(weekly_stats, today_stats: dict, subject_dist: dict, focus_patterns: Optional[dict]) -> dict:
+    analyze = _service.analyze_columns if isinstance(weekly_stats, dict) else _service.analyze
+    analysis = analyze(weekly_stats, today_stats, subject_dist, best_window=focus_patterns and focus_patterns["bestWindow"])
+    if focus_patterns is not None:
+        analysis["focusPatterns"] = focus_patterns
+    return analysis
+
+
+def analysis_body(weekly_stats, today_stats: dict, subject_dist: dict, focus_patterns: Optional[dict] = None) -> bytes:
+    """
+    Analyze rows or columns and serialize the result, off the event loop.
+    With FocusPatternAnalyzer output, focusPatterns and a best-time
+    recommendation are added.
+    """
+    return ORJSONResponse(_analysis(weekly_stats, today_stats, subject_dist, focus_patterns)).body
+
+
+def pack_columns(weekly_stats) -> Dict[str, np.ndarray]:
+    """Weekly stats as int64 arrays, which pickle to a fraction of the size of row dicts."""
+    columns = weekly_stats if isinstance(weekly_stats, dict) else rows_to_columns(weekly_stats)
+    return {name: np.asarray(columns[name], dtype=np.int64) for name in WEEKLY_COLUMNS}
+
+
+def packed_analysis_body(
+    columns: Dict[str, np.ndarray],
+    as_rows: bool,
+    today_stats: dict,
+    subject_dist: dict,
+    focus_patterns: Optional[dict] = None
+) -> bytes:
+    """
+    Worker-process side of `analysis_body`. weeklyData is echoed in the
+    form the client sent, so the bytes match the thread path.
+    """
+    plain = {name: values.tolist() for name, values in columns.items()}
+    analysis = _analysis(plain, today_stats, subject_dist, focus_patterns)
+    if as_rows:
+        analysis["weeklyData"] = columns_to_rows(plain)
+    return ORJSONResponse(analysis).body
+
+
+class AnalyticsExecutor:
+    """
+    Runs CPU-bound analytics off the event loop so chat streams on the same
+    worker keep flowing.
+
+    Jobs go to a thread pool. Histories of at least `process_min_weeks`
+    weeks go to a process pool instead, since pure-Python analysis in a
+    thread still holds the GIL; their inputs are shipped as packed arrays.
+    Each pool accepts at most `max_queue` jobs beyond its busy workers and
+    every job has `timeout` seconds, counted from submission. Both limits
+    raise AnalyticsRejected. A timed-out job that already started runs to
+    completion in the background and keeps counting as pending.
+    """
+
+    def __init__(
+        self,
+        threads: int = 4,
+        processes: int = 2,
+        process_min_weeks: int = 2000,
+        max_queue: int = 64,
+        timeout: float = 10.0
+    ):
+        self.threads = threads
+        self.processes = processes
+        self.process_min_weeks = process_min_weeks
+        self.max_queue = max_queue
+        self.timeout = timeout
+        # Pools are created on first use, so shutdown() leaves the executor reusable
+        self._thread_pool: Optional[ThreadPoolExecutor] = None
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.pending: Dict[str, int] = {"thread": 0, "process": 0}
+        self.completed: Dict[str, int] = defaultdict(int)
+        self.rejected: Dict[str, int] = defaultdict(int)
+
+    def mode_for(self, weeks: int) -> str:
+        return "process" if self.processes > 0 and weeks >= self.process_min_weeks else "thread"
+
+    def _pool(self, mode: str) -> Executor:
+        if mode == "thread":
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="analytics")
+            return self._thread_pool
+        if self._process_pool is None:
+            # Spawned, not forked: the parent has an event loop and live threads
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._process_pool
+
+    def _finished(self, mode: str) -> None:
+        with self._lock:
+            self.pending[mode] -= 1
+            self.completed[mode] += 1
+
+    async def run(self, mode: str, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run `fn(*args)` in the given pool; for "process", fn and args must pickle."""
+        workers = self.threads if mode == "thread" else self.processes
+        with self._lock:
+            if self.pending[mode] >= workers + self.max_queue:
+                self.rejected["queue_full"] += 1
+                raise AnalyticsRejected("queue_full")
+            self.pending[mode] += 1
+        try:
+            future = self._pool(mode).submit(fn, *args)
+        except Exception:
+            with self._lock:
+                self.pending[mode] -= 1
+            raise
+        future.add_done_callback(lambda _: self._finished(mode))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            # Only a job still waiting in the queue can actually be cancelled
+            future.cancel()
+            self.rejected["timeout"] += 1
+            raise AnalyticsRejected("timeout")
+        except BrokenProcessPool:
+            # A worker died; reap the broken pool and start a fresh one on the next job
+            pool, self._process_pool = self._process_pool, None
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    async def analyze(
+        self,
+        weekly_stats,
+        today_stats: dict,
+        subject_dist: dict,
+        focus_patterns: Optional[dict] = None
+    ) -> bytes:
+        """Serialized /analyze-stats result for rows or columns, optionally with focus patterns."""
+        mode = self.mode_for(series_length(weekly_stats))
+        if mode == "process":
+            return await self.run(
+                mode, packed_analysis_body,
+                pack_columns(weekly_stats), not isinstance(weekly_stats, dict), today_stats, subject_dist, focus_patterns
+            )
+        return await self.run(mode, analysis_body, weekly_stats, today_stats, subject_dist, focus_patterns)
+
+    def shutdown(self) -> None:
+        """Drop queued jobs and wait for running ones to finish."""
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=True, cancel_futures=True)
+            self._thread_pool = None
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=True, cancel_futures=True)
+            self._process_pool = None
+
+    def stats(self) -> dict:
+        return {
+            "threads": self.threads,
+            "processes": self.processes,
+            "processMinWeeks": self.process_min_weeks,
+            "maxQueue": self.max_queue,
+            "timeoutSeconds": self.timeout,
+            "pending": dict(self.pending),
+            "completed": dict(self.completed),
+            "rejected": dict(self.rejected),
+        }
+
+    def collect_metrics(self):
+        """Registry collector for the executor counters."""
+        yield ("nexus_analytics_jobs_pending", "gauge", "Analytics jobs queued or running, by pool.",
+               [({"pool": mode}, count) for mode, count in self.pending.items()])
+        yield ("nexus_analytics_jobs_completed_total", "counter", "Analytics jobs finished, by pool.",
+               [({"pool": mode}, count) for mode, count in self.completed.items()])
+        yield ("nexus_analytics_jobs_rejected_total", "counter", "Analytics jobs refused or timed out, by reason.",
+               [({"reason": reason}, count) for reason, count in self.rejected.items()])
+
+
+def create_analytics_executor() -> AnalyticsExecutor:
+    """
+    Build the executor from NEXUS_ANALYTICS_THREADS, NEXUS_ANALYTICS_PROCESSES
+    (0 disables the process pool), NEXUS_ANALYTICS_PROCESS_MIN_WEEKS,
+    NEXUS_ANALYTICS_MAX_QUEUE and NEXUS_ANALYTICS_TIMEOUT.
+    """
+    return AnalyticsExecutor(
+        threads=int(os.getenv("NEXUS_ANALYTICS_THREADS", "4")),
+        processes=int(os.getenv("NEXUS_ANALYTICS_PROCESSES", "2")),
+        process_min_weeks=int(os.getenv("NEXUS_ANALYTICS_PROCESS_MIN_WEEKS", "2000")),
+        max_queue=int(os.getenv("NEXUS_ANALYTICS_MAX_QUEUE", "64")),
+        timeout=float(os.getenv("NEXUS_ANALYTICS_TIMEOUT", "10")),
+    )
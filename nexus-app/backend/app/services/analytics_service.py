@@ -1,20 +1,113 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 
+import numpy as np
+
+from app.services.forecasting import Forecaster, create_forecaster
+
+
+# Recommendation messages, listed in the order they are emitted
+RECOMMENDATIONS = {
+    "low_consistency": (
+        "🎯 Try to study at least a little every day to build consistency. "
+        "Even 15 minutes counts!"
+    ),
+    "high_consistency": (
+        "⭐ Great consistency! You're building strong study habits. "
+        "Keep maintaining this rhythm."
+    ),
+    "low_volume": (
+        "📈 Aim to gradually increase your weekly focus time. "
+        "Try adding one 25-minute session per week."
+    ),
+    "high_volume": (
+        "💪 Impressive dedication! Make sure you're also taking adequate breaks "
+        "to avoid burnout."
+    ),
+    "declining": (
+        "📉 Your focus time has been decreasing. Consider setting specific goals "
+        "or using the Pomodoro technique to regain momentum."
+    ),
+    "improving": (
+        "🚀 You're on an upward trajectory! Keep up the great work "
+        "and consider slightly increasing your daily goals."
+    ),
+    "slow_week": (
+        "💡 This week seems slower than usual. That's okay! "
+        "Try to end strong with at least one focused session today."
+    ),
+    "strong_week": (
+        "🎉 Amazing progress this week! You've significantly increased your focus time. "
+        "Celebrate this win!"
+    ),
+}
+
+# Emitted last, when session timestamps reveal a best focus window
+BEST_WINDOW_RECOMMENDATION = (
+    "⏰ You focus best between {start} and {end} ({share}% of your focus time). "
+    "Schedule your most demanding topics in that window."
+)
+
+DEFAULT_RECOMMENDATION = "📊 Keep tracking your sessions to get more personalized insights!"
+
+TREND_LABELS = np.array(["insufficient_data", "stable", "improving", "declining"], dtype=object)
+
+
+WEEKLY_COLUMNS = ("weekNumber", "year", "totalMinutes", "sessionCount")
+
+
+def series_length(weekly_stats) -> int:
+    """Number of weeks in a weekly series, given as rows or as columns."""
+    return len(weekly_stats["totalMinutes"]) if isinstance(weekly_stats, dict) else len(weekly_stats)
+
+
+def rows_to_columns(weekly_stats: List[dict]) -> dict:
+    """Row-of-objects weekly stats to the packed columnar form."""
+    return {name: [w.get(name, 0) for w in weekly_stats] for name in WEEKLY_COLUMNS}
+
+
+def columns_to_rows(columns: dict) -> List[dict]:
+    """Packed columnar weekly stats to the row-of-objects form."""
+    return [dict(zip(WEEKLY_COLUMNS, values)) for values in zip(*(columns[name] for name in WEEKLY_COLUMNS))]
+
+
+def pack_weekly_stats(weekly_stats_batch: list) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pack ragged per-user weekly series into left-aligned, zero-padded matrices.
+    Each series may be a list of rows or a columnar dict. Returns (minutes, sessions, lengths).
+    """
+    lengths = np.fromiter((series_length(ws) for ws in weekly_stats_batch), dtype=np.int64, count=len(weekly_stats_batch))
+    width = int(lengths.max()) if len(lengths) else 0
+    minutes = np.zeros((len(weekly_stats_batch), width), dtype=np.int64)
+    sessions = np.zeros_like(minutes)
+    for i, ws in enumerate(weekly_stats_batch):
+        if isinstance(ws, dict):
+            minutes[i, :lengths[i]] = ws["totalMinutes"]
+            sessions[i, :lengths[i]] = ws["sessionCount"]
+        else:
+            minutes[i, :len(ws)] = [w.get("totalMinutes", 0) for w in ws]
+            sessions[i, :len(ws)] = [w.get("sessionCount", 0) for w in ws]
+    return minutes, sessions, lengths
+
 
 class AnalyticsService:
     """
     Service for calculating productivity analytics and insights.
     """
     
+    def __init__(self, forecaster: Optional[Forecaster] = None):
+        self.forecaster = forecaster or create_forecaster()
+    
     def analyze(
         self,
         weekly_stats: List[dict],
         today_stats: dict,
-        subject_dist: dict
+        subject_dist: dict,
+        best_window: Optional[dict] = None
     ) -> dict:
         """
         Analyze productivity data and return insights.
+        `best_window` comes from FocusPatternAnalyzer when session times are known.
         """
         # Calculate totals
         total_minutes = sum(w.get("totalMinutes", 0) for w in weekly_stats)
@@ -22,7 +115,6 @@ class AnalyticsService:
         
         # Calculate weekly averages
         weeks_with_data = len([w for w in weekly_stats if w.get("totalMinutes", 0) > 0])
-        avg_weekly_minutes = total_minutes / max(weeks_with_data, 1)
         
         # Calculate growth rate (week over week)
         growth_rates = []
@@ -33,24 +125,125 @@ class AnalyticsService:
                 rate = ((curr - prev) / prev) * 100
                 growth_rates.append(rate)
         
-        avg_growth_rate = sum(growth_rates) / max(len(growth_rates), 1) if growth_rates else 0
-        
         # Current vs last week
         current_week = weekly_stats[-1].get("totalMinutes", 0) if weekly_stats else 0
         last_week = weekly_stats[-2].get("totalMinutes", 0) if len(weekly_stats) >= 2 else 0
-        week_change = ((current_week - last_week) / max(last_week, 1)) * 100 if last_week > 0 else 0
         
         # Find top subject
         top_subject = None
         if subject_dist:
             top_subject = max(subject_dist.items(), key=lambda x: x[1])
         
+        return self._build_analysis(
+            total_minutes=total_minutes,
+            total_sessions=total_sessions,
+            weeks_with_data=weeks_with_data,
+            total_weeks=len(weekly_stats),
+            growth_sum=sum(growth_rates),
+            growth_count=len(growth_rates),
+            recent_growth_rates=growth_rates[-3:],
+            current_week=current_week,
+            last_week=last_week,
+            top_subject=top_subject,
+            today_stats=today_stats,
+            weekly_data=weekly_stats,
+            best_window=best_window,
+            forecast=self.forecaster.forecast([w.get("totalMinutes", 0) for w in weekly_stats]),
+        )
+    
+    def analyze_columns(
+        self,
+        weekly_columns: dict,
+        today_stats: dict,
+        subject_dist: dict,
+        best_window: Optional[dict] = None
+    ) -> dict:
+        """
+        Analyze weekly stats given as parallel arrays (see WEEKLY_COLUMNS).
+        Returns the same result as `analyze` on the equivalent rows, with
+        weeklyData echoed back in columnar form.
+        """
+        minutes = np.asarray(weekly_columns["totalMinutes"], dtype=np.int64)
+        sessions = np.asarray(weekly_columns["sessionCount"], dtype=np.int64)
+        
+        prev, curr = minutes[:-1], minutes[1:]
+        has_prev = prev > 0
+        growth_rates = (curr[has_prev] - prev[has_prev]) / prev[has_prev] * 100
+        # cumsum adds left to right, matching the row path's float sum exactly
+        growth_sum = float(np.cumsum(growth_rates)[-1]) if len(growth_rates) else 0
+        
+        top_subject = None
+        if subject_dist:
+            top_subject = max(subject_dist.items(), key=lambda x: x[1])
+        
+        return self._build_analysis(
+            total_minutes=int(minutes.sum()),
+            total_sessions=int(sessions.sum()),
+            weeks_with_data=int(np.count_nonzero(minutes > 0)),
+            total_weeks=len(minutes),
+            growth_sum=growth_sum,
+            growth_count=len(growth_rates),
+            recent_growth_rates=growth_rates[-3:].tolist(),
+            current_week=int(minutes[-1]) if len(minutes) else 0,
+            last_week=int(minutes[-2]) if len(minutes) >= 2 else 0,
+            top_subject=top_subject,
+            today_stats=today_stats,
+            weekly_data=weekly_columns,
+            best_window=best_window,
+            forecast=self.forecaster.forecast(minutes),
+        )
+    
+    def analyze_rollup(self, rollup: dict) -> dict:
+        """
+        Analyze precomputed per-user aggregates from the session store.
+        Returns the same shape as `analyze` without walking the history.
+        """
+        return self._build_analysis(
+            total_minutes=rollup["totalMinutes"],
+            total_sessions=rollup["totalSessions"],
+            weeks_with_data=rollup["weeksActive"],
+            total_weeks=rollup["totalWeeks"],
+            growth_sum=rollup["growthSum"],
+            growth_count=rollup["growthCount"],
+            recent_growth_rates=rollup["recentGrowthRates"],
+            current_week=rollup["currentWeekMinutes"],
+            last_week=rollup["lastWeekMinutes"],
+            top_subject=rollup["topSubject"],
+            today_stats=rollup["today"],
+            weekly_data=rollup["weeklyData"],
+            forecast=self.forecaster.forecast(rollup["recentMinutes"]),
+        )
+    
+    def _build_analysis(
+        self,
+        total_minutes: int,
+        total_sessions: int,
+        weeks_with_data: int,
+        total_weeks: int,
+        growth_sum: float,
+        growth_count: int,
+        recent_growth_rates: List[float],
+        current_week: int,
+        last_week: int,
+        top_subject: Optional[Tuple[str, int]],
+        today_stats: dict,
+        weekly_data: List[dict],
+        best_window: Optional[dict] = None,
+        forecast: Optional[dict] = None
+    ) -> dict:
+        """
+        Build the analysis response from scalar aggregates.
+        """
+        avg_weekly_minutes = total_minutes / max(weeks_with_data, 1)
+        avg_growth_rate = growth_sum / max(growth_count, 1) if growth_count else 0
+        week_change = ((current_week - last_week) / max(last_week, 1)) * 100 if last_week > 0 else 0
+        
         # Calculate consistency score (percentage of weeks with activity)
-        consistency_score = (weeks_with_data / max(len(weekly_stats), 1)) * 100
+        consistency_score = (weeks_with_data / max(total_weeks, 1)) * 100
         
         # Determine trend
-        if len(growth_rates) >= 3:
-            recent_growth = sum(growth_rates[-3:]) / 3
+        if growth_count >= 3:
+            recent_growth = sum(recent_growth_rates[-3:]) / 3
             if recent_growth > 5:
                 trend = "improving"
             elif recent_growth < -5:
@@ -65,9 +258,45 @@ class AnalyticsService:
             consistency_score=consistency_score,
             avg_weekly_minutes=avg_weekly_minutes,
             week_change=week_change,
-            trend=trend
+            trend=trend,
+            best_window=best_window
         )
         
+        return self._format_analysis(
+            total_minutes=total_minutes,
+            total_sessions=total_sessions,
+            avg_weekly_minutes=avg_weekly_minutes,
+            avg_growth_rate=avg_growth_rate,
+            week_change=week_change,
+            trend=trend,
+            consistency_score=consistency_score,
+            weeks_with_data=weeks_with_data,
+            total_weeks=total_weeks,
+            top_subject=top_subject,
+            today_stats=today_stats,
+            recommendations=recommendations,
+            weekly_data=weekly_data,
+            forecast=forecast,
+        )
+    
+    def _format_analysis(
+        self,
+        total_minutes: int,
+        total_sessions: int,
+        avg_weekly_minutes: float,
+        avg_growth_rate: float,
+        week_change: float,
+        trend: str,
+        consistency_score: float,
+        weeks_with_data: int,
+        total_weeks: int,
+        top_subject: Optional[Tuple[str, int]],
+        today_stats: dict,
+        recommendations: List[str],
+        weekly_data: List[dict],
+        forecast: Optional[dict] = None
+    ) -> dict:
+        """Shape computed analytics into the API response."""
         return {
             "summary": {
                 "totalMinutes": total_minutes,
@@ -81,10 +310,11 @@ class AnalyticsService:
                 "currentWeekVsLast": round(week_change, 1),
                 "trend": trend,
             },
+            "forecast": forecast,
             "consistency": {
                 "score": round(consistency_score, 1),
                 "weeksActive": weeks_with_data,
-                "totalWeeks": len(weekly_stats),
+                "totalWeeks": total_weeks,
             },
             "topSubject": {
                 "name": top_subject[0] if top_subject else None,
@@ -92,70 +322,190 @@ class AnalyticsService:
             },
             "today": today_stats,
             "recommendations": recommendations,
-            "weeklyData": weekly_stats,
+            "weeklyData": weekly_data,
         }
     
+    def analyze_batch(
+        self,
+        minutes: np.ndarray,
+        sessions: np.ndarray,
+        lengths: np.ndarray,
+        today_stats: Optional[List[dict]] = None,
+        subject_dists: Optional[List[dict]] = None,
+        weekly_data: Optional[List[List[dict]]] = None,
+        focus_patterns: Optional[List[Optional[dict]]] = None
+    ) -> List[dict]:
+        """
+        Analyze many users at once.
+        
+        `minutes` and `sessions` are (users x weeks) matrices, left-aligned and
+        padded past each row's length in `lengths`. Every aggregate is computed
+        with array operations; results match `analyze` user for user.
+        `focus_patterns` holds each user's FocusPatternAnalyzer output, or None.
+        """
+        minutes = np.asarray(minutes, dtype=np.int64)
+        sessions = np.asarray(sessions, dtype=np.int64)
+        lengths = np.asarray(lengths, dtype=np.int64)
+        n_users = len(lengths)
+        if minutes.ndim != 2 or minutes.shape[0] != n_users:
+            raise ValueError("minutes must be a (users x weeks) matrix with one row per length")
+        
+        width = minutes.shape[1]
+        mask = np.arange(width)[None, :] < lengths[:, None]
+        minutes = np.where(mask, minutes, 0)
+        sessions = np.where(mask, sessions, 0)
+        
+        # Totals
+        total_minutes = minutes.sum(axis=1)
+        total_sessions = sessions.sum(axis=1)
+        weeks_with_data = (minutes > 0).sum(axis=1)
+        
+        # Week-over-week growth; cumsum keeps the left-to-right order of `sum`
+        prev = minutes[:, :-1]
+        curr = minutes[:, 1:]
+        valid = mask[:, 1:] & (prev > 0)
+        rates = np.where(valid, ((curr - prev) / np.where(valid, prev, 1)) * 100, 0.0)
+        growth_count = valid.sum(axis=1)
+        recent = valid & (np.cumsum(valid[:, ::-1], axis=1)[:, ::-1] <= 3)
+        if width > 1:
+            growth_sum = np.cumsum(rates, axis=1)[:, -1]
+            recent_sum = np.cumsum(np.where(recent, rates, 0.0), axis=1)[:, -1]
+        else:
+            growth_sum = np.zeros(n_users)
+            recent_sum = np.zeros(n_users)
+        
+        # Current vs last week
+        rows = np.arange(n_users)
+        if width:
+            current_week = np.where(lengths >= 1, minutes[rows, np.clip(lengths - 1, 0, None)], 0)
+            last_week = np.where(lengths >= 2, minutes[rows, np.clip(lengths - 2, 0, None)], 0)
+        else:
+            current_week = last_week = np.zeros(n_users, dtype=np.int64)
+        week_change = np.where(
+            last_week > 0,
+            ((current_week - last_week) / np.maximum(last_week, 1)) * 100,
+            0.0
+        )
+        
+        avg_weekly_minutes = total_minutes / np.maximum(weeks_with_data, 1)
+        avg_growth_rate = np.where(growth_count > 0, growth_sum / np.maximum(growth_count, 1), 0.0)
+        consistency_score = (weeks_with_data / np.maximum(lengths, 1)) * 100
+        
+        # Trend: 0 insufficient, 1 stable, 2 improving, 3 declining
+        recent_growth = recent_sum / 3
+        trend_code = np.where(recent_growth > 5, 2, np.where(recent_growth < -5, 3, 1))
+        trend_code = np.where(growth_count >= 3, trend_code, 0)
+        trends = TREND_LABELS[trend_code]
+        
+        # Next-week forecasts for the whole batch in one pass
+        forecasts = self.forecaster.forecast_batch(minutes, lengths)
+        
+        # Recommendation flags, one column per message in emission order
+        low_consistency = consistency_score < 50
+        low_volume = avg_weekly_minutes < 60
+        slow_week = week_change < -20
+        flags = np.column_stack([
+            low_consistency,
+            ~low_consistency & (consistency_score >= 80),
+            low_volume,
+            ~low_volume & (avg_weekly_minutes >= 300),
+            trend_code == 3,
+            trend_code == 2,
+            slow_week,
+            ~slow_week & (week_change > 30),
+        ])
+        # Encode each row's flags as a bitmask so identical combinations share a list
+        flag_codes = flags.astype(np.int64) @ (1 << np.arange(flags.shape[1], dtype=np.int64))
+        messages = list(RECOMMENDATIONS.values())
+        by_code = {}
+        
+        # Hand plain Python scalars to the formatter; indexing arrays per user is slow
+        columns = zip(
+            total_minutes.tolist(), total_sessions.tolist(), avg_weekly_minutes.tolist(),
+            avg_growth_rate.tolist(), growth_count.tolist(), week_change.tolist(),
+            last_week.tolist(), trends.tolist(), consistency_score.tolist(),
+            weeks_with_data.tolist(), lengths.tolist(), flag_codes.tolist(),
+        )
+        results = []
+        for i, (total, count, avg_weekly, avg_growth, n_rates, change, last, trend,
+                consistency, active, length, code) in enumerate(columns):
+            subject_dist = subject_dists[i] if subject_dists else {}
+            top_subject = max(subject_dist.items(), key=lambda x: x[1]) if subject_dist else None
+            if code not in by_code:
+                by_code[code] = [m for j, m in enumerate(messages) if code >> j & 1]
+            recommendations = list(by_code[code])
+            patterns = focus_patterns[i] if focus_patterns else None
+            if patterns and patterns["bestWindow"]:
+                recommendations.append(BEST_WINDOW_RECOMMENDATION.format(**patterns["bestWindow"]))
+            recommendations = recommendations or [DEFAULT_RECOMMENDATION]
+            if weekly_data is not None:
+                weeks = weekly_data[i]
+            else:
+                weeks = [
+                    {"totalMinutes": m, "sessionCount": c}
+                    for m, c in zip(minutes[i, :length].tolist(), sessions[i, :length].tolist())
+                ]
+            result = self._format_analysis(
+                total_minutes=total,
+                total_sessions=count,
+                avg_weekly_minutes=avg_weekly,
+                avg_growth_rate=avg_growth if n_rates else 0,
+                week_change=change if last > 0 else 0,
+                trend=trend,
+                consistency_score=consistency,
+                weeks_with_data=active,
+                total_weeks=length,
+                top_subject=top_subject,
+                today_stats=today_stats[i] if today_stats else {},
+                recommendations=recommendations,
+                weekly_data=weeks,
+                forecast=forecasts[i],
+            )
+            if patterns is not None:
+                result["focusPatterns"] = patterns
+            results.append(result)
+        return results
+    
     def _generate_recommendations(
         self,
         consistency_score: float,
         avg_weekly_minutes: float,
         week_change: float,
-        trend: str
+        trend: str,
+        best_window: Optional[dict] = None
     ) -> List[str]:
         """Generate personalized recommendations based on analytics."""
         recommendations = []
         
         # Consistency recommendations
         if consistency_score < 50:
-            recommendations.append(
-                "🎯 Try to study at least a little every day to build consistency. "
-                "Even 15 minutes counts!"
-            )
+            recommendations.append(RECOMMENDATIONS["low_consistency"])
         elif consistency_score >= 80:
-            recommendations.append(
-                "⭐ Great consistency! You're building strong study habits. "
-                "Keep maintaining this rhythm."
-            )
+            recommendations.append(RECOMMENDATIONS["high_consistency"])
         
         # Weekly volume recommendations
         if avg_weekly_minutes < 60:
-            recommendations.append(
-                "📈 Aim to gradually increase your weekly focus time. "
-                "Try adding one 25-minute session per week."
-            )
+            recommendations.append(RECOMMENDATIONS["low_volume"])
         elif avg_weekly_minutes >= 300:
-            recommendations.append(
-                "💪 Impressive dedication! Make sure you're also taking adequate breaks "
-                "to avoid burnout."
-            )
+            recommendations.append(RECOMMENDATIONS["high_volume"])
         
         # Trend recommendations
         if trend == "declining":
-            recommendations.append(
-                "📉 Your focus time has been decreasing. Consider setting specific goals "
-                "or using the Pomodoro technique to regain momentum."
-            )
+            recommendations.append(RECOMMENDATIONS["declining"])
         elif trend == "improving":
-            recommendations.append(
-                "🚀 You're on an upward trajectory! Keep up the great work "
-                "and consider slightly increasing your daily goals."
-            )
+            recommendations.append(RECOMMENDATIONS["improving"])
         
         # Recent performance
         if week_change < -20:
-            recommendations.append(
-                "💡 This week seems slower than usual. That's okay! "
-                "Try to end strong with at least one focused session today."
-            )
+            recommendations.append(RECOMMENDATIONS["slow_week"])
         elif week_change > 30:
-            recommendations.append(
-                "🎉 Amazing progress this week! You've significantly increased your focus time. "
-                "Celebrate this win!"
-            )
+            recommendations.append(RECOMMENDATIONS["strong_week"])
+        
+        # Best time of day, from raw session timestamps
+        if best_window:
+            recommendations.append(BEST_WINDOW_RECOMMENDATION.format(**best_window))
         
-        return recommendations if recommendations else [
-            "📊 Keep tracking your sessions to get more personalized insights!"
-        ]
+        return recommendations if recommendations else [DEFAULT_RECOMMENDATION]
     
     def get_weekly_comparison(self, weekly_stats: List[dict]) -> List[dict]:
         """
@@ -0,0 +1,170 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Deque, List, Optional, Tuple
+
+
+# Rough chars-per-token ratio for English text with GPT tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local token estimate; close enough for budgeting prompts."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _clip(text: str, max_words: int) -> str:
+    words = text.split()
+    return " ".join(words[:max_words]) + (" ..." if len(words) > max_words else "")
+
+
+def extractive_summary(summary: str, turns: List[Tuple[str, str]]) -> str:
+    """Append a one-line digest of each compacted turn to the running summary."""
+    lines = [summary] if summary else []
+    for human, ai in turns:
+        lines.append(f"- User: {_clip(human, 20)} / Coach: {_clip(ai, 20)}")
+    return "\n".join(lines)
+
+
+class Conversation:
+    """Recent turns for one user plus a rolling summary of older ones."""
+
+    __slots__ = ("turns", "summary", "tokens", "last_active")
+
+    def __init__(self):
+        # (human, ai, tokens)
+        self.turns: Deque[Tuple[str, str, int]] = deque()
+        self.summary = ""
+        self.tokens = 0
+        self.last_active = time.monotonic()
+
+    def size_bytes(self) -> int:
+        return len(self.summary) + sum(len(h) + len(a) for h, a, _ in self.turns)
+
+
+class ConversationStore:
+    """
+    Per-user conversation memory with hard limits.
+
+    Users are kept in LRU order and capped at `max_users`. Each user keeps
+    at most `max_turns` recent turns within `token_budget` tokens; older
+    turns are folded into a rolling summary, itself capped at a quarter of
+    the budget, so prompt size stays flat as conversations grow.
+    """
+
+    def __init__(
+        self,
+        max_users: int = 1000,
+        max_turns: int = 20,
+        token_budget: int = 1500,
+        idle_seconds: float = 1800,
+        summarizer: Callable[[str, List[Tuple[str, str]]], str] = extractive_summary
+    ):
+        self.max_users = max_users
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.summary_budget = token_budget // 4
+        self.idle_seconds = idle_seconds
+        self.summarizer = summarizer
+        self._conversations: "OrderedDict[str, Conversation]" = OrderedDict()
+        self.lru_evictions = 0
+        self.idle_evictions = 0
+        self.compactions = 0
+
+    def history(self, user_id: str) -> List[Tuple[str, str]]:
+        """Prompt messages for a user as (role, text), oldest first."""
+        conversation = self._conversations.get(user_id)
+        if conversation is None:
+            return []
+        self._conversations.move_to_end(user_id)
+        conversation.last_active = time.monotonic()
+        messages = []
+        if conversation.summary:
+            messages.append(("system", "Earlier in this conversation:\n" + conversation.summary))
+        for human, ai, _ in conversation.turns:
+            messages.append(("human", human))
+            messages.append(("ai", ai))
+        return messages
+
+    def add_turn(self, user_id: str, human: str, ai: str) -> None:
+        conversation = self._conversations.get(user_id)
+        if conversation is None:
+            conversation = self._conversations[user_id] = Conversation()
+            while len(self._conversations) > self.max_users:
+                self._conversations.popitem(last=False)
+                self.lru_evictions += 1
+        else:
+            self._conversations.move_to_end(user_id)
+        conversation.last_active = time.monotonic()
+
+        tokens = estimate_tokens(human) + estimate_tokens(ai)
+        conversation.turns.append((human, ai, tokens))
+        conversation.tokens += tokens
+        self._compact(conversation)
+
+    def _compact(self, conversation: Conversation) -> None:
+        """Fold the oldest turns into the summary until the limits hold."""
+        compacted = False
+        while conversation.turns and (
+            len(conversation.turns) > self.max_turns
+            or conversation.tokens + estimate_tokens(conversation.summary) > self.token_budget
+        ):
+            human, ai, tokens = conversation.turns.popleft()
+            conversation.tokens -= tokens
+            # Summarize turn by turn so the summary's own size is accounted for
+            summary = self.summarizer(conversation.summary, [(human, ai)])
+            conversation.summary = self._trim_summary(summary)
+            compacted = True
+        if compacted:
+            self.compactions += 1
+
+    def _trim_summary(self, summary: str) -> str:
+        lines = summary.split("\n")
+        while len(lines) > 1 and estimate_tokens("\n".join(lines)) > self.summary_budget:
+            lines.pop(0)
+        text = "\n".join(lines)
+        max_chars = self.summary_budget * CHARS_PER_TOKEN
+        return text[-max_chars:] if len(text) > max_chars else text
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        idle = [uid for uid, c in self._conversations.items() if now - c.last_active > self.idle_seconds]
+        for uid in idle:
+            del self._conversations[uid]
+        self.idle_evictions += len(idle)
+        return len(idle)
+
+    async def run_eviction_loop(self, interval: float = 60) -> None:
+        """Periodically drop idle conversations; run as a background task."""
+        while True:
+            await asyncio.sleep(interval)
+            self.evict_idle()
+
+    def stats(self) -> dict:
+        conversations = self._conversations.values()
+        return {
+            "users": len(self._conversations),
+            "turns": sum(len(c.turns) for c in conversations),
+            "tokens": sum(c.tokens + estimate_tokens(c.summary) for c in conversations),
+            "sizeBytes": sum(c.size_bytes() for c in conversations),
+            "lruEvictions": self.lru_evictions,
+            "idleEvictions": self.idle_evictions,
+            "compactions": self.compactions,
+            "limits": {
+                "maxUsers": self.max_users,
+                "maxTurns": self.max_turns,
+                "tokenBudget": self.token_budget,
+                "idleSeconds": self.idle_seconds,
+            },
+        }
+
+
+def create_conversation_store() -> ConversationStore:
+    """Build the conversation store from NEXUS_MEMORY_* settings."""
+    return ConversationStore(
+        max_users=int(os.getenv("NEXUS_MEMORY_MAX_USERS", "1000")),
+        max_turns=int(os.getenv("NEXUS_MEMORY_MAX_TURNS", "20")),
+        token_budget=int(os.getenv("NEXUS_MEMORY_TOKEN_BUDGET", "1500")),
+        idle_seconds=float(os.getenv("NEXUS_MEMORY_IDLE_SECONDS", "1800")),
+    )
@@ -0,0 +1,122 @@
+from typing import Dict, List
+
+import numpy as np
+
+from app.services.session_store import as_utc
+
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+SESSION_COLUMNS = ("timestamp", "durationMinutes", "subject")
+
+# 1970-01-01 was a Thursday; shifts day ordinals so Monday is 0
+_EPOCH_WEEKDAY = 3
+
+
+def sessions_to_columns(sessions: List[dict]) -> dict:
+    """Session rows to the columnar form, with timestamps as epoch milliseconds."""
+    return {
+        "timestamp": [int(as_utc(s["timestamp"]).timestamp() * 1000) for s in sessions],
+        "durationMinutes": [s.get("durationMinutes", 0) for s in sessions],
+        "subject": [s.get("subject") or "General" for s in sessions],
+    }
+
+
+def _factorize(values: List[str]):
+    """Integer codes and unique values in first-seen order (a dict is faster than np.unique on strings)."""
+    index: Dict[str, int] = {}
+    codes = np.fromiter((index.setdefault(v, len(index)) for v in values), dtype=np.int64, count=len(values))
+    return codes, list(index)
+
+
+def _hour_label(hour: int) -> str:
+    return f"{hour % 24:02d}:00"
+
+
+class FocusPatternAnalyzer:
+    """
+    When-do-I-focus-best analytics over raw sessions.
+
+    Sessions are binned by the local day of week and hour of their start
+    time with np.bincount, so cost is linear in the number of sessions with
+    no per-session Python work beyond reading the request. The best window
+    is the `window_hours` consecutive hours of the day (wrapping past
+    midnight) holding the most focus minutes.
+    """
+
+    def __init__(self, window_hours: int = 2, min_sessions: int = 5):
+        self.window_hours = window_hours
+        self.min_sessions = min_sessions
+
+    def analyze(self, sessions: dict, utc_offset_minutes: int = 0) -> dict:
+        """
+        `sessions` holds SESSION_COLUMNS as parallel arrays, timestamps in
+        epoch milliseconds. `utc_offset_minutes` is added to UTC to get the
+        user's local time (+60 for UTC+1).
+        """
+        local_minutes = np.asarray(sessions["timestamp"], dtype=np.int64) // 60000 + utc_offset_minutes
+        minutes = np.asarray(sessions["durationMinutes"], dtype=np.int64)
+        codes, subjects = _factorize(sessions["subject"])
+
+        hour = local_minutes // 60 % 24
+        day = (local_minutes // 1440 + _EPOCH_WEEKDAY) % 7
+        cell = day * 24 + hour
+        heat_minutes = np.bincount(cell, weights=minutes, minlength=168).astype(np.int64).reshape(7, 24)
+        heat_sessions = np.bincount(cell, minlength=168).reshape(7, 24)
+        subject_hours = np.bincount(
+            codes * 24 + hour, weights=minutes, minlength=len(subjects) * 24
+        ).astype(np.int64).reshape(len(subjects), 24)
+
+        hourly_minutes = heat_minutes.sum(axis=0)
+        daily_minutes = heat_minutes.sum(axis=1)
+        total_minutes = int(minutes.sum())
+        enough = len(minutes) >= self.min_sessions and total_minutes > 0
+
+        return {
+            "sessions": len(minutes),
+            "totalMinutes": total_minutes,
+            "utcOffsetMinutes": utc_offset_minutes,
+            "heatmap": {
+                "days": DAY_NAMES,
+                "minutes": heat_minutes.tolist(),
+                "sessions": heat_sessions.tolist(),
+            },
+            "hourlyMinutes": hourly_minutes.tolist(),
+            "dailyMinutes": daily_minutes.tolist(),
+            "subjects": {
+                name: {
+                    "minutes": int(subject_hours[i].sum()),
+                    "hourlyMinutes": subject_hours[i].tolist(),
+                    "peakHour": int(subject_hours[i].argmax()),
+                }
+                for i, name in enumerate(subjects)
+            },
+            "bestWindow": self._best_window(hourly_minutes, heat_sessions.sum(axis=0), total_minutes) if enough else None,
+            "bestDay": self._best_day(daily_minutes, total_minutes) if enough else None,
+        }
+
+    def _best_window(self, hourly_minutes: np.ndarray, hourly_sessions: np.ndarray, total_minutes: int) -> dict:
+        width = self.window_hours
+        # Sliding sums over the day, wrapping so 23:00-01:00 is a candidate too
+        wrapped_minutes = np.concatenate([hourly_minutes, hourly_minutes[:width - 1]])
+        wrapped_sessions = np.concatenate([hourly_sessions, hourly_sessions[:width - 1]])
+        window_minutes = np.convolve(wrapped_minutes, np.ones(width, dtype=np.int64), mode="valid")
+        window_sessions = np.convolve(wrapped_sessions, np.ones(width, dtype=np.int64), mode="valid")
+        start = int(window_minutes.argmax())
+        return {
+            "startHour": start,
+            "endHour": (start + width) % 24,
+            "start": _hour_label(start),
+            "end": _hour_label(start + width),
+            "minutes": int(window_minutes[start]),
+            "share": round(float(window_minutes[start]) / total_minutes * 100, 1),
+            "avgSessionMinutes": round(float(window_minutes[start]) / max(int(window_sessions[start]), 1), 1),
+        }
+
+    def _best_day(self, daily_minutes: np.ndarray, total_minutes: int) -> dict:
+        best = int(daily_minutes.argmax())
+        return {
+            "day": DAY_NAMES[best],
+            "minutes": int(daily_minutes[best]),
+            "share": round(float(daily_minutes[best]) / total_minutes * 100, 1),
+        }
@@ -0,0 +1,235 @@
+import math
+import os
+from statistics import NormalDist
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+# Holt smoothing parameters tried for every user; the pair with the lowest
+# one-step-ahead squared error is kept
+ALPHAS = (0.2, 0.4, 0.6, 0.8)
+BETAS = (0.05, 0.2, 0.4)
+
+
+def _round(values: np.ndarray) -> List[float]:
+    return np.round(values, 1).tolist()
+
+
+def _round_one(value: float) -> float:
+    """`_round` for one value: np.round scales, rounds half to even and keeps the sign of zero."""
+    return math.copysign(round(value * 10) / 10, value)
+
+
+class Forecaster:
+    """
+    Next-week focus time forecasts from weekly minutes.
+
+    Each user's last `history_weeks` weeks are fitted two ways: Holt linear
+    smoothing (level plus trend, parameters picked per user from a small
+    grid) and an ordinary least-squares line. Everything runs on
+    (users x weeks) matrices, so a batch costs about as much as a single
+    user; the only Python loop is over the weeks of the window.
+
+    Intervals are normal-approximation prediction intervals at
+    `confidence`. The least-squares slope decides the direction: improving
+    or declining when its interval excludes zero, steady otherwise.
+    Users with fewer than `min_weeks` weeks get no forecast.
+    """
+
+    def __init__(self, history_weeks: int = 26, min_weeks: int = 4, confidence: float = 0.8):
+        self.history_weeks = max(history_weeks, min_weeks, 3)
+        self.min_weeks = max(min_weeks, 3)
+        self.confidence = confidence
+        self.z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        grid = np.array([(a, b) for a in ALPHAS for b in BETAS])
+        self._alpha, self._beta = grid[:, 0], grid[:, 1]
+
+    def forecast(self, minutes) -> Optional[dict]:
+        """
+        Forecast for one user's weekly minutes, oldest first. Plain Python
+        on the last `history_weeks` weeks: per-call numpy overhead would
+        dominate a single short series. Matches `forecast_batch` exactly.
+        """
+        recent = minutes[-self.history_weeks:]
+        y = [float(m) for m in (recent.tolist() if isinstance(recent, np.ndarray) else recent)]
+        used = len(y)
+        if used < self.min_weeks:
+            return None
+        n = float(used)
+        errors = max(n - 2, 1)
+
+        # Least squares on x = 0..n-1, in the same operation order as `fit`
+        x_mean = (n - 1) / 2
+        sxx = max(n * (n * n - 1) / 12, 1e-9)
+        y_sum = cross = 0.0
+        for x, value in enumerate(y):
+            y_sum += value
+            cross += (x - x_mean) * value
+        y_mean = y_sum / n
+        slope = cross / sxx
+        intercept = y_mean - slope * x_mean
+        squares = 0.0
+        for x, value in enumerate(y):
+            residual = value - (intercept + slope * x)
+            squares += residual * residual
+        s = math.sqrt(squares / errors)
+        linear = intercept + slope * n
+        gap = n - x_mean
+        linear_se = s * math.sqrt(1 + 1 / n + gap * gap / sxx)
+        slope_se = s / math.sqrt(sxx)
+
+        # Holt over every parameter pair; the first pair with the lowest error wins
+        best = None
+        for alpha, beta in zip(self._alpha.tolist(), self._beta.tolist()):
+            level, trend, sse = intercept - slope, slope, 0.0
+            for value in y:
+                predicted = level + trend
+                error = value - predicted
+                new_level = predicted + alpha * error
+                trend = trend + beta * (new_level - level - trend)
+                level = new_level
+                sse += error * error
+            if best is None or sse < best[0]:
+                best = (sse, level + trend, alpha, beta)
+        sse, holt, alpha, beta = best
+        holt_sigma = math.sqrt(sse / errors)
+
+        rounded = [_round_one(value) for value in (
+            max(holt, 0.0), max(holt - self.z * holt_sigma, 0.0), max(holt + self.z * holt_sigma, 0.0),
+            max(linear, 0.0), max(linear - self.z * linear_se, 0.0), max(linear + self.z * linear_se, 0.0),
+            slope, slope - self.z * slope_se, slope + self.z * slope_se,
+        )]
+        return self._result(used, alpha, beta, *rounded)
+
+    def forecast_batch(self, minutes: np.ndarray, lengths: np.ndarray) -> List[Optional[dict]]:
+        """
+        Forecasts for a (users x weeks) matrix, left-aligned and padded past
+        each row's length in `lengths` (as built by pack_weekly_stats).
+        """
+        fit = self.fit(minutes, lengths)
+        columns = zip(*(fit[name].tolist() if name in ("weeksUsed", "alpha", "beta") else _round(fit[name])
+                        for name in ("weeksUsed", "alpha", "beta", "holt", "holtLower", "holtUpper",
+                                     "linear", "linearLower", "linearUpper", "slope", "slopeLower", "slopeUpper")))
+        return [self._result(*values) if values[0] >= self.min_weeks else None for values in columns]
+
+    def _result(self, weeks: int, alpha: float, beta: float, holt: float, holt_lower: float, holt_upper: float,
+                linear: float, linear_lower: float, linear_upper: float,
+                slope: float, slope_lower: float, slope_upper: float) -> dict:
+        if slope_lower > 0:
+            direction = "improving"
+        elif slope_upper < 0:
+            direction = "declining"
+        else:
+            direction = "steady"
+        return {
+            "nextWeekMinutes": holt,
+            "lower": holt_lower,
+            "upper": holt_upper,
+            "confidence": round(self.confidence * 100),
+            "direction": direction,
+            "slopePerWeek": slope,
+            "weeksUsed": weeks,
+            "holt": {"alpha": alpha, "beta": beta, "nextWeekMinutes": holt, "lower": holt_lower, "upper": holt_upper},
+            "linear": {
+                "slopePerWeek": slope,
+                "slopeLower": slope_lower,
+                "slopeUpper": slope_upper,
+                "nextWeekMinutes": linear,
+                "lower": linear_lower,
+                "upper": linear_upper,
+            },
+        }
+
+    def fit(self, minutes: np.ndarray, lengths: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Raw per-user forecast arrays. Rows with fewer than three weeks hold
+        meaningless values; callers check `weeksUsed`.
+        """
+        minutes = np.asarray(minutes)
+        lengths = np.asarray(lengths, dtype=np.int64)
+        n_users = len(lengths)
+        width = int(min(self.history_weeks, lengths.max())) if n_users else 0
+        used = np.minimum(lengths, width)
+
+        # The last `used` weeks of every row, right-aligned in a (users x width) window
+        rows = np.arange(n_users)[:, None]
+        source = lengths[:, None] - width + np.arange(width)[None, :]
+        valid = np.arange(width)[None, :] >= (width - used)[:, None]
+        y = np.where(valid, minutes[rows, np.clip(source, 0, None)], 0).astype(np.float64)
+
+        n = used.astype(np.float64)
+        errors = np.maximum(n - 2, 1)
+
+        # Least squares on x = 0..n-1; sums run left to right (padding first) so
+        # a user's result does not depend on the rest of the batch
+        x = np.where(valid, np.arange(width)[None, :] - (width - used)[:, None], 0).astype(np.float64)
+        x_mean = (n - 1) / 2
+        sxx = np.maximum(n * (n * n - 1) / 12, 1e-9)
+        row_sum = lambda values: np.cumsum(values, axis=1)[:, -1] if width else np.zeros(n_users)
+        y_mean = row_sum(y) / np.maximum(n, 1)
+        slope = row_sum(np.where(valid, (x - x_mean[:, None]) * y, 0.0)) / sxx
+        intercept = y_mean - slope * x_mean
+        residuals = np.where(valid, y - (intercept[:, None] + slope[:, None] * x), 0.0)
+        s = np.sqrt(row_sum(residuals * residuals) / errors)
+        linear = intercept + slope * n
+        linear_se = s * np.sqrt(1 + 1 / np.maximum(n, 1) + (n - x_mean) ** 2 / sxx)
+        slope_se = s / np.sqrt(sxx)
+
+        holt, holt_sse, best = self._holt(y, width - used, intercept, slope)
+        holt_sigma = np.sqrt(holt_sse / errors)
+
+        # Focus time cannot go negative
+        return {
+            "weeksUsed": used,
+            "holt": np.maximum(holt, 0),
+            "holtLower": np.maximum(holt - self.z * holt_sigma, 0),
+            "holtUpper": np.maximum(holt + self.z * holt_sigma, 0),
+            "alpha": self._alpha[best],
+            "beta": self._beta[best],
+            "linear": np.maximum(linear, 0),
+            "linearLower": np.maximum(linear - self.z * linear_se, 0),
+            "linearUpper": np.maximum(linear + self.z * linear_se, 0),
+            "slope": slope,
+            "slopeLower": slope - self.z * slope_se,
+            "slopeUpper": slope + self.z * slope_se,
+        }
+
+    def _holt(self, y: np.ndarray, start: np.ndarray, intercept: np.ndarray, slope: np.ndarray):
+        """
+        Holt linear smoothing over every parameter pair at once, seeded from
+        the least-squares line (a noisy or idle first week would otherwise
+        skew the trend for the whole window). Returns each user's one-step
+        forecast, squared error and index of the best pair.
+        """
+        n_users, width = y.shape
+        rows = np.arange(n_users)
+        # (users x parameter pairs); the first prediction is the line at x = 0
+        level = np.repeat((intercept - slope)[:, None], len(self._alpha), axis=1)
+        trend = np.repeat(slope[:, None], len(self._alpha), axis=1)
+        sse = np.zeros_like(level)
+        alpha, beta = self._alpha[None, :], self._beta[None, :]
+        # Row masks for every step, so the loop body is plain arithmetic
+        active = (np.arange(width)[:, None] >= start[None, :])[:, :, None]
+        for t in range(int(start.min()) if n_users else width, width):
+            predicted = level + trend
+            error = y[:, t:t + 1] - predicted
+            new_level = predicted + alpha * error
+            new_trend = trend + beta * (new_level - level - trend)
+            sse = np.where(active[t], sse + error * error, sse)
+            level = np.where(active[t], new_level, level)
+            trend = np.where(active[t], new_trend, trend)
+        best = sse.argmin(axis=1) if n_users else np.zeros(0, dtype=np.int64)
+        return level[rows, best] + trend[rows, best], sse[rows, best], best
+
+
+def create_forecaster() -> Forecaster:
+    """
+    Build the forecaster from NEXUS_FORECAST_HISTORY_WEEKS,
+    NEXUS_FORECAST_MIN_WEEKS and NEXUS_FORECAST_CONFIDENCE.
+    """
+    return Forecaster(
+        history_weeks=int(os.getenv("NEXUS_FORECAST_HISTORY_WEEKS", "26")),
+        min_weeks=int(os.getenv("NEXUS_FORECAST_MIN_WEEKS", "4")),
+        confidence=float(os.getenv("NEXUS_FORECAST_CONFIDENCE", "0.8")),
+    )
@@ -0,0 +1,119 @@
+import asyncio
+import os
+from typing import Optional
+
+import httpx
+
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _DrainingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, max_bytes: int, timeout: float):
+        self._stream = stream
+        self._max_bytes = max_bytes
+        self._timeout = timeout
+        self._eof = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+        self._eof = True
+
+    async def aclose(self) -> None:
+        # A body read to the end has already released its connection
+        if self._eof:
+            await self._stream.aclose()
+            return
+        try:
+            await asyncio.wait_for(self._drain(), self._timeout)
+        except Exception:
+            pass
+        finally:
+            await self._stream.aclose()
+
+    async def _drain(self) -> None:
+        read = 0
+        async for chunk in self._stream:
+            read += len(chunk)
+            if read > self._max_bytes:
+                return
+
+
+class DrainingTransport(httpx.AsyncBaseTransport):
+    """
+    Reads the small unread tail of a response before it is closed.
+
+    The OpenAI SDK closes a streamed reply as soon as it sees "[DONE]",
+    before the end of the chunked body. An HTTP/1.1 connection closed in
+    that state cannot go back to the pool, so every streamed chat would
+    otherwise cost a fresh TCP and TLS handshake.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_bytes: int = 64 * 1024, timeout: float = 0.5):
+        self._transport = transport
+        self._max_bytes = max_bytes
+        self._timeout = timeout
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self._transport.handle_async_request(request)
+        # HTTP/2 streams can be reset without losing the connection
+        if response.extensions.get("http_version", b"HTTP/1.1") == b"HTTP/1.1":
+            response.stream = _DrainingStream(response.stream, self._max_bytes, self._timeout)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def create_llm_http_client() -> httpx.AsyncClient:
+    """
+    Shared keep-alive client for every LLM call, from NEXUS_LLM_HTTP_* settings.
+
+    HTTP/2 (multiplexing many calls over one TLS connection) is used when the
+    `h2` package is installed; otherwise calls share a pool of HTTP/1.1
+    keep-alive connections.
+    """
+    http2 = os.getenv("NEXUS_LLM_HTTP2", "true").lower() in ("1", "true", "yes") and _http2_available()
+    limits = httpx.Limits(
+        max_connections=int(os.getenv("NEXUS_LLM_HTTP_MAX_CONNECTIONS", "32")),
+        max_keepalive_connections=int(os.getenv("NEXUS_LLM_HTTP_MAX_KEEPALIVE", "16")),
+        keepalive_expiry=float(os.getenv("NEXUS_LLM_HTTP_KEEPALIVE_SECONDS", "120")),
+    )
+    timeout = httpx.Timeout(
+        connect=float(os.getenv("NEXUS_LLM_HTTP_CONNECT_TIMEOUT", "5")),
+        read=float(os.getenv("NEXUS_LLM_HTTP_READ_TIMEOUT", "60")),
+        write=10.0,
+        pool=10.0,
+    )
+    transport = httpx.AsyncHTTPTransport(http2=http2, limits=limits)
+    return httpx.AsyncClient(transport=DrainingTransport(transport), timeout=timeout)
+
+
+async def prewarm(client: httpx.AsyncClient, api_key: Optional[str], connections: int = 1) -> int:
+    """
+    Open `connections` pooled connections to the LLM endpoint ahead of the
+    first chat, so it doesn't pay for DNS, TCP and TLS setup. Returns how
+    many warm-up requests got a response; failures are ignored.
+    """
+    base_url = (os.getenv("OPENAI_BASE_URL") or DEFAULT_BASE_URL).rstrip("/")
+    headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+
+    async def touch() -> bool:
+        try:
+            await client.get(f"{base_url}/models", headers=headers)
+            return True
+        except httpx.HTTPError:
+            return False
+
+    # Concurrent requests force the pool to open separate connections
+    results = await asyncio.gather(*(touch() for _ in range(max(1, connections))))
+    return sum(results)
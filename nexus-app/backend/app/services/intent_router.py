@@ -0,0 +1,117 @@
+import os
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Set, Tuple
+
+
+class KeywordMatcher:
+    """
+    Match many phrases in one pass with a single precompiled pattern.
+    Matching is substring-based (like `kw in text`) and overlapping
+    phrases are all reported.
+    """
+
+    def __init__(self, phrases: Iterable[str]):
+        self.phrases = sorted(set(phrases), key=len, reverse=True)
+        alternation = "|".join(re.escape(p) for p in self.phrases)
+        # A lookahead consumes nothing, so a phrase nested in another still matches
+        self._pattern = re.compile(f"(?=({alternation}))")
+
+    def find(self, lower: str) -> Set[str]:
+        return {m.group(1) for m in self._pattern.finditer(lower)}
+
+
+# Keyword sets for the rule-based replies, in priority order
+FALLBACK_INTENTS: List[Tuple[str, List[str]]] = [
+    ("forecast", ["improving", "getting better", "forecast", "next week", "on track"]),
+    ("weekly_summary", ["productive", "how was", "week", "stats"]),
+    ("growth", ["growth", "progress", "trend"]),
+    ("motivation", ["motivation", "unmotivated", "can't focus"]),
+    ("plan", ["plan", "schedule", "exam"]),
+    ("tip", ["tip", "advice"]),
+]
+
+# Intents answerable from the user's numbers alone
+STATS_INTENTS = {"weekly_summary", "growth", "forecast"}
+
+# Evidence for each statistical intent, as (phrase, weight)
+INTENT_SIGNALS: Dict[str, List[Tuple[str, float]]] = {
+    "weekly_summary": [
+        ("how productive", 0.6), ("productive", 0.3), ("this week", 0.4), ("week", 0.2),
+        ("how was", 0.3), ("my stats", 0.6), ("stats", 0.3), ("summary", 0.4),
+        ("how much did i", 0.4), ("how many sessions", 0.5), ("how am i doing", 0.6),
+    ],
+    "growth": [
+        ("growth", 0.5), ("trend", 0.5), ("progress", 0.4), ("my growth", 0.3), ("my progress", 0.3),
+        ("show me", 0.2), ("over time", 0.3), ("chart", 0.3),
+    ],
+    "forecast": [
+        ("am i improving", 0.8), ("improving", 0.4), ("getting better", 0.5), ("forecast", 0.6),
+        ("next week", 0.4), ("on track", 0.4), ("predict", 0.5),
+    ],
+}
+
+# Phrases that mark a request the templates cannot answer well
+OPEN_ENDED_SIGNALS: List[Tuple[str, float]] = [
+    ("why", 0.5), ("how can", 0.4), ("how do i", 0.4), ("how should", 0.4),
+    ("should i", 0.3), ("explain", 0.4), ("help me", 0.3), ("what if", 0.4),
+    ("compare", 0.3), ("best way", 0.3), ("improve", 0.3), ("instead", 0.3),
+    ("plan", 0.4), ("schedule", 0.4), ("exam", 0.3), ("advice", 0.4), ("tip", 0.3),
+]
+
+# Words beyond this count make a message increasingly likely to be open-ended
+SHORT_MESSAGE_WORDS = 10
+LENGTH_PENALTY_PER_WORD = 0.05
+
+
+class IntentMatch(NamedTuple):
+    intent: str
+    confidence: float
+
+
+class IntentRouter:
+    """
+    Decide whether a chat message can be answered from a statistics template
+    instead of the LLM. Scores are additive phrase weights minus penalties
+    for open-ended wording and length, clamped to [0, 1].
+    """
+
+    def __init__(self, threshold: float = 0.8):
+        self.threshold = threshold
+        self._weights: Dict[str, List[Tuple[str, float]]] = defaultdict(list)
+        for intent, signals in INTENT_SIGNALS.items():
+            for phrase, weight in signals:
+                self._weights[phrase].append((intent, weight))
+        self._penalties = dict(OPEN_ENDED_SIGNALS)
+        self._matcher = KeywordMatcher(list(self._weights) + list(self._penalties))
+        self.routed: Dict[str, Dict[str, int]] = defaultdict(lambda: {"template": 0, "retrieval": 0, "llm": 0})
+
+    def classify(self, message: str) -> IntentMatch:
+        lower = message.lower()
+        found = self._matcher.find(lower)
+        scores: Dict[str, float] = defaultdict(float)
+        for phrase in found:
+            for intent, weight in self._weights.get(phrase, ()):
+                scores[intent] += weight
+        if not scores:
+            return IntentMatch("open", 0.0)
+
+        penalty = sum(self._penalties.get(phrase, 0.0) for phrase in found)
+        penalty += max(0, len(lower.split()) - SHORT_MESSAGE_WORDS) * LENGTH_PENALTY_PER_WORD
+        intent, score = max(scores.items(), key=lambda x: x[1])
+        return IntentMatch(intent, round(min(1.0, max(0.0, score - penalty)), 3))
+
+    def record(self, match: IntentMatch, route: str) -> None:
+        """Count a routing decision made by the caller ("template", "retrieval" or "llm")."""
+        self.routed[match.intent][route] += 1
+
+    def use_template(self, match: IntentMatch) -> bool:
+        return match.intent in STATS_INTENTS and match.confidence >= self.threshold
+
+    def stats(self) -> dict:
+        return {"threshold": self.threshold, "routed": dict(self.routed)}
+
+
+def create_intent_router() -> IntentRouter:
+    """NEXUS_INTENT_THRESHOLD sets the minimum confidence for template answers."""
+    return IntentRouter(threshold=float(os.getenv("NEXUS_INTENT_THRESHOLD", "0.8")))
@@ -0,0 +1,158 @@
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Tuple
+
+
+# Lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+# Smoothing factor for the running service-time estimate
+EWMA_ALPHA = 0.2
+
+
+class DeadlineExceeded(Exception):
+    """The request cannot be answered by the LLM before its deadline."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class LLMScheduler:
+    """
+    Admission control for upstream LLM calls.
+
+    At most `max_concurrency` calls run at once; the rest wait in a priority
+    queue (interactive chat ahead of background work such as study plans).
+    Every request carries a deadline. A request is rejected up front when the
+    queue is full or its estimated wait already exceeds the time it has left,
+    and abandoned if the deadline passes while queued or during the call.
+    Rejections raise DeadlineExceeded so callers can degrade immediately.
+    """
+
+    def __init__(self, max_concurrency: int = 8, max_queue: int = 256, initial_service_seconds: float = 2.0):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._active = 0
+        self._seq = itertools.count()
+        # (priority, seq, future) entries; cancelled futures are skipped lazily
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []
+        self._service_seconds = initial_service_seconds
+        self.completed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.waits = 0
+        self.degraded: Dict[str, int] = defaultdict(int)
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, f in self._queue if not f.done())
+
+    def estimate_wait(self, priority: int) -> float:
+        """Expected queueing delay for a new request at `priority`."""
+        if self._active < self.max_concurrency and not self.queue_depth:
+            return 0.0
+        ahead = sum(1 for p, _, f in self._queue if p <= priority and not f.done())
+        return (ahead + 1) / self.max_concurrency * self._service_seconds
+
+    @asynccontextmanager
+    async def slot(self, priority: int, deadline: float) -> AsyncIterator[None]:
+        """
+        Hold one concurrency slot for the duration of the block.
+        `deadline` is an absolute time.monotonic() value.
+        """
+        await self._acquire(priority, deadline)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self._service_seconds += EWMA_ALPHA * (elapsed - self._service_seconds)
+            self.completed += 1
+            self._release()
+
+    async def run(self, fn: Callable[[], Awaitable[Any]], priority: int, timeout: float) -> Any:
+        """Run `fn()` within a slot, giving up after `timeout` seconds overall."""
+        deadline = time.monotonic() + timeout
+        async with self.slot(priority, deadline):
+            try:
+                return await asyncio.wait_for(fn(), max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                self.degraded["call_timeout"] += 1
+                raise DeadlineExceeded("call_timeout")
+
+    async def _acquire(self, priority: int, deadline: float) -> None:
+        remaining = deadline - time.monotonic()
+        if self._active < self.max_concurrency and not self.queue_depth:
+            self._active += 1
+            self._record_wait(0.0)
+            return
+        if self.queue_depth >= self.max_queue:
+            self.degraded["queue_full"] += 1
+            raise DeadlineExceeded("queue_full")
+        if self.estimate_wait(priority) >= remaining:
+            self.degraded["predicted_late"] += 1
+            raise DeadlineExceeded("predicted_late")
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), future))
+        enqueued = time.monotonic()
+        try:
+            # The releasing call hands its slot over by resolving the future
+            await asyncio.wait_for(asyncio.shield(future), remaining)
+        except asyncio.TimeoutError:
+            if not future.done():
+                future.cancel()
+                self.degraded["queue_timeout"] += 1
+                raise DeadlineExceeded("queue_timeout")
+            # The slot was handed over just as the deadline hit; give it back
+            self._release()
+            self.degraded["queue_timeout"] += 1
+            raise DeadlineExceeded("queue_timeout")
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()
+            else:
+                future.cancel()
+            raise
+        self._record_wait(time.monotonic() - enqueued)
+
+    def _release(self) -> None:
+        while self._queue:
+            _, _, future = heapq.heappop(self._queue)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._active -= 1
+
+    def _record_wait(self, seconds: float) -> None:
+        self.waits += 1
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+
+    def stats(self) -> dict:
+        return {
+            "active": self._active,
+            "maxConcurrency": self.max_concurrency,
+            "queueDepth": self.queue_depth,
+            "maxQueue": self.max_queue,
+            "completed": self.completed,
+            "avgWaitMs": round(self.wait_total / self.waits * 1000, 1) if self.waits else 0.0,
+            "maxWaitMs": round(self.wait_max * 1000, 1),
+            "serviceTimeMs": round(self._service_seconds * 1000, 1),
+            "degraded": dict(self.degraded),
+        }
+
+
+def create_llm_scheduler() -> LLMScheduler:
+    """Build the scheduler from NEXUS_LLM_MAX_CONCURRENCY / NEXUS_LLM_MAX_QUEUE."""
+    return LLMScheduler(
+        max_concurrency=int(os.getenv("NEXUS_LLM_MAX_CONCURRENCY", "8")),
+        max_queue=int(os.getenv("NEXUS_LLM_MAX_QUEUE", "256")),
+    )
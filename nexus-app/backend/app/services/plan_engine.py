@@ -0,0 +1,153 @@
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+
+POMODORO_MINUTES = 25
+
+# Days after a first study block at which that subject comes back for review
+REVIEW_INTERVALS = [1, 3, 7, 14]
+
+# Daily capacity bounds, in Pomodoros
+MIN_DAILY_SESSIONS = 2
+MAX_DAILY_SESSIONS = 12
+DEFAULT_DAILY_SESSIONS = 4
+
+# Plan slightly above the historical pace to encourage growth
+CAPACITY_STRETCH = 1.1
+
+# Keeps weights finite for subjects with no tracked time
+SHARE_SMOOTHING = 0.1
+
+MAX_PLAN_DAYS = 365
+
+
+class StudyPlanEngine:
+    """
+    Local study plan scheduler.
+
+    Allocates Pomodoro-sized sessions across the available days. Subjects
+    are weighted inversely to their current share of focus time, daily
+    capacity follows the user's recent weekly minutes, and every subject
+    studied on a day is scheduled for spaced-repetition review afterwards.
+    """
+
+    def build(
+        self,
+        goal: str,
+        days_available: int,
+        subject_dist: dict,
+        weekly_stats: Optional[List[dict]] = None
+    ) -> dict:
+        days = max(1, min(int(days_available), MAX_PLAN_DAYS))
+        weights = self.subject_weights(subject_dist, goal)
+        capacity = self.daily_capacity(weekly_stats or [])
+
+        # Smooth weighted round-robin state: interleaves subjects in proportion to weight
+        credit: Dict[str, float] = defaultdict(float)
+        reviews_due: Dict[int, List[str]] = defaultdict(list)
+        plan_days = []
+        final_review = days >= 3
+
+        for day in range(1, days + 1):
+            sessions = []
+            if final_review and day == days:
+                # Last day: review everything, most neglected subjects first
+                ordered = sorted(weights, key=weights.get, reverse=True)
+                for i in range(capacity):
+                    sessions.append(self._session(ordered[i % len(ordered)], "review"))
+            else:
+                # Due reviews take at most half the day; the rest roll over
+                due = list(dict.fromkeys(reviews_due.pop(day, [])))
+                review_slots = min(len(due), max(1, capacity // 2))
+                for subject in due[:review_slots]:
+                    sessions.append(self._session(subject, "review"))
+                if due[review_slots:]:
+                    reviews_due[day + 1][:0] = due[review_slots:]
+
+                studied = []
+                for _ in range(capacity - review_slots):
+                    subject = self._next_subject(weights, credit)
+                    sessions.append(self._session(subject, "study"))
+                    if subject not in studied:
+                        studied.append(subject)
+                for subject in studied:
+                    for interval in REVIEW_INTERVALS:
+                        if day + interval <= days:
+                            reviews_due[day + interval].append(subject)
+
+            plan_days.append({
+                "day": day,
+                "title": self._day_title(day, sessions, goal, final_review and day == days),
+                "totalMinutes": len(sessions) * POMODORO_MINUTES,
+                "sessions": sessions,
+            })
+
+        return {
+            "goal": goal,
+            "dailyCapacityMinutes": capacity * POMODORO_MINUTES,
+            "subjectWeights": {s: round(w, 3) for s, w in weights.items()},
+            "days": plan_days,
+        }
+
+    @staticmethod
+    def subject_weights(subject_dist: dict, goal: str) -> Dict[str, float]:
+        """Normalized weights, inversely proportional to each subject's share of time."""
+        minutes = {s: max(0, m or 0) for s, m in (subject_dist or {}).items()}
+        if not minutes:
+            return {goal.strip() or "General": 1.0}
+        total = sum(minutes.values())
+        raw = {
+            s: 1 / ((m / total if total else 0) + SHARE_SMOOTHING)
+            for s, m in minutes.items()
+        }
+        norm = sum(raw.values())
+        return {s: w / norm for s, w in raw.items()}
+
+    @staticmethod
+    def daily_capacity(weekly_stats: List[dict]) -> int:
+        """Pomodoros per day, from the average of the last four active weeks."""
+        active = [w.get("totalMinutes", 0) for w in weekly_stats if w.get("totalMinutes", 0) > 0][-4:]
+        if not active:
+            return DEFAULT_DAILY_SESSIONS
+        per_day = sum(active) / len(active) / 7 * CAPACITY_STRETCH
+        sessions = round(per_day / POMODORO_MINUTES)
+        return max(MIN_DAILY_SESSIONS, min(MAX_DAILY_SESSIONS, sessions))
+
+    @staticmethod
+    def _next_subject(weights: Dict[str, float], credit: Dict[str, float]) -> str:
+        for subject, weight in weights.items():
+            credit[subject] += weight
+        chosen = max(weights, key=lambda s: credit[s])
+        credit[chosen] -= 1.0
+        return chosen
+
+    @staticmethod
+    def _session(subject: str, kind: str) -> dict:
+        label = "focused study" if kind == "study" else "spaced review"
+        return {
+            "subject": subject,
+            "kind": kind,
+            "minutes": POMODORO_MINUTES,
+            "title": f"{subject}: {label}",
+        }
+
+    @staticmethod
+    def _day_title(day: int, sessions: List[dict], goal: str, final: bool) -> str:
+        if final:
+            return f"Day {day}: Final review for {goal}" if goal else f"Day {day}: Final review"
+        studied = list(dict.fromkeys(s["subject"] for s in sessions if s["kind"] == "study"))
+        reviewed = list(dict.fromkeys(s["subject"] for s in sessions if s["kind"] == "review"))
+        parts = []
+        if studied:
+            parts.append("Study " + ", ".join(studied))
+        if reviewed:
+            parts.append("review " + ", ".join(reviewed))
+        return f"Day {day}: " + " + ".join(parts)
+
+
+def plan_items(plan: dict) -> List[dict]:
+    """Flatten a structured plan into the dashboard's {title, duration, completed} items."""
+    return [
+        {"title": day["title"], "duration": f"{day['totalMinutes']} min", "completed": False}
+        for day in plan["days"]
+    ]
@@ -0,0 +1,89 @@
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Deque, Optional, Tuple
+
+
+class SamplingProfiler:
+    """
+    Opt-in wall-clock sampler for slow requests.
+
+    A daemon thread snapshots the event loop thread's Python stack every
+    `interval` seconds into a short ring buffer. When a request takes longer
+    than the threshold, the samples taken while it ran are written out as
+    collapsed stacks ("frame;frame;frame count"), ready for flamegraph.pl or
+    speedscope. Requests overlap on the loop, so a dump shows everything the
+    process was doing during the slow request, not only that request.
+    """
+
+    def __init__(self, output_dir: str, threshold_seconds: float, interval: float = 0.005, window_seconds: float = 60):
+        self.output_dir = output_dir
+        self.threshold_seconds = threshold_seconds
+        self.interval = interval
+        # (timestamp, stack) pairs, oldest first
+        self._samples: Deque[Tuple[float, Tuple[str, ...]]] = deque(maxlen=max(1, int(window_seconds / interval)))
+        self._target: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.dumps = 0
+
+    def start(self) -> None:
+        """Start sampling the calling thread (the one running the event loop)."""
+        if self._thread is not None:
+            return
+        self._target = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="nexus-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            self._samples.append((time.monotonic(), tuple(reversed(stack))))
+
+    def observe(self, label: str, started: float, finished: float) -> Optional[str]:
+        """Dump the samples covering [started, finished] if the request was slow."""
+        if finished - started < self.threshold_seconds:
+            return None
+        folded = Counter(stack for at, stack in list(self._samples) if started <= at <= finished)
+        if not folded:
+            return None
+        os.makedirs(self.output_dir, exist_ok=True)
+        name = re.sub(r"[^A-Za-z0-9]+", "_", label).strip("_") or "request"
+        path = os.path.join(self.output_dir, f"slow-{int(time.time() * 1000)}-{name}.folded")
+        with open(path, "w") as f:
+            for stack, count in folded.most_common():
+                f.write(";".join(stack) + f" {count}\n")
+        self.dumps += 1
+        return path
+
+
+def create_profiler() -> Optional[SamplingProfiler]:
+    """
+    Enabled by NEXUS_PROFILE_SLOW_MS (the slow-request threshold);
+    dumps go to NEXUS_PROFILE_DIR.
+    """
+    threshold_ms = os.getenv("NEXUS_PROFILE_SLOW_MS")
+    if not threshold_ms:
+        return None
+    return SamplingProfiler(
+        output_dir=os.getenv("NEXUS_PROFILE_DIR", "profiles"),
+        threshold_seconds=float(threshold_ms) / 1000,
+        interval=float(os.getenv("NEXUS_PROFILE_INTERVAL_MS", "5")) / 1000,
+    )
@@ -0,0 +1,127 @@
+import os
+from typing import List, Optional, Tuple
+
+from app.services.conversation_store import estimate_tokens
+
+
+# Detail levels tried in order until the prompt fits the budget: (weeks, subjects)
+DETAIL_LEVELS = [(6, 3), (3, 2), (1, 1)]
+
+
+def _signed_percent(curr: int, prev: int) -> str:
+    if prev <= 0:
+        return "n/a"
+    return f"{round((curr - prev) / prev * 100):+d}%"
+
+
+def render_weeks(weekly_stats: List[dict], weeks: int) -> str:
+    """Last `weeks` weeks as a compact table, oldest first."""
+    if not weekly_stats:
+        return "Weekly focus: no data yet"
+    recent = weekly_stats[-weeks:]
+    rows = [
+        f"{w.get('year', 0) % 100:02d}W{w.get('weekNumber', 0):02d} {w.get('totalMinutes', 0)} {w.get('sessionCount', 0)}"
+        for w in recent
+    ]
+    lines = ["Weekly focus (week min sessions):"] + rows
+    if len(weekly_stats) >= 2:
+        this_week = weekly_stats[-1].get("totalMinutes", 0)
+        last_week = weekly_stats[-2].get("totalMinutes", 0)
+        lines.append(f"Latest vs previous week: {_signed_percent(this_week, last_week)}")
+    return "\n".join(lines)
+
+
+def render_today(today_stats: dict) -> str:
+    if not today_stats:
+        return "Today: no sessions"
+    known = [("sessions", "sessions"), ("minutes", "min"), ("xp", "XP")]
+    parts = [f"{today_stats[key]} {label}" for key, label in known if key in today_stats]
+    # Keep anything else the client sends, without the dict repr around it
+    parts += [f"{key}={value}" for key, value in sorted(today_stats.items()) if key not in dict(known)]
+    return "Today: " + ", ".join(parts)
+
+
+def render_subjects(subject_dist: dict, top: int) -> str:
+    if not subject_dist:
+        return "Subjects: none tracked"
+    ranked = sorted(subject_dist.items(), key=lambda x: (-(x[1] or 0), x[0]))
+    shown = ", ".join(f"{name} {round(minutes or 0)}" for name, minutes in ranked[:top])
+    rest = len(ranked) - top
+    return f"Top subjects (min): {shown}" + (f" (+{rest} more)" if rest > 0 else "")
+
+
+class PromptBuilder:
+    """
+    Builds chat prompts as a fixed instruction prefix followed by the
+    user's statistics, conversation history and message.
+
+    The instructions never change, so provider-side prompt caching can
+    reuse them across users. Statistics are rendered as a short
+    deterministic table. When the estimated size exceeds `token_budget`,
+    the oldest history is dropped first, then grounding passages, then
+    the statistics get coarser.
+    """
+
+    def __init__(self, instructions: str, token_budget: int = 2000):
+        self.instructions = instructions
+        self.token_budget = token_budget
+
+    def render_context(
+        self,
+        weekly_stats: List[dict],
+        today_stats: dict,
+        subject_dist: dict,
+        level: int = 0,
+        references: Optional[List[str]] = None
+    ) -> str:
+        weeks, subjects = DETAIL_LEVELS[level]
+        lines = [
+            "User's current statistics:",
+            render_weeks(weekly_stats, weeks),
+            render_today(today_stats),
+            render_subjects(subject_dist, subjects),
+        ]
+        if references:
+            lines.append("Relevant study techniques (use if helpful):")
+            lines += [f"- {reference}" for reference in references]
+        return "\n".join(lines)
+
+    def build(
+        self,
+        message: str,
+        weekly_stats: List[dict],
+        today_stats: dict,
+        subject_dist: dict,
+        history: Optional[List[Tuple[str, str]]] = None,
+        references: Optional[List[str]] = None
+    ) -> Tuple[str, List[Tuple[str, str]]]:
+        """
+        Return (stats context, history) fitted to the token budget.
+        `references` are grounding passages, dropped after the history.
+        """
+        history = list(history or [])
+        references = list(references or [])
+        fixed = estimate_tokens(self.instructions) + estimate_tokens(message)
+        level = 0
+        context = self.render_context(weekly_stats, today_stats, subject_dist, level, references)
+
+        def size() -> int:
+            return fixed + estimate_tokens(context) + sum(estimate_tokens(text) for _, text in history)
+
+        while history and size() > self.token_budget:
+            # Drop whole human/ai turns so the model never sees half an exchange
+            drop = 2 if history[0][0] == "human" else 1
+            del history[:drop]
+        while references and size() > self.token_budget:
+            # Least relevant passage first
+            references.pop()
+            context = self.render_context(weekly_stats, today_stats, subject_dist, level, references)
+        while size() > self.token_budget and level + 1 < len(DETAIL_LEVELS):
+            level += 1
+            context = self.render_context(weekly_stats, today_stats, subject_dist, level)
+        return context, history
+
+
+def create_prompt_builder(instructions: str) -> PromptBuilder:
+    """NEXUS_PROMPT_TOKEN_BUDGET caps the estimated tokens of a chat prompt."""
+    return PromptBuilder(instructions, token_budget=int(os.getenv("NEXUS_PROMPT_TOKEN_BUDGET", "2000")))
@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_message(message: str) -> str:
+    """Case- and whitespace-insensitive form of a chat message."""
+    return _WHITESPACE.sub(" ", message).strip().lower()
+
+
+def stats_fingerprint(weekly_stats: List[dict], today_stats: dict, subject_dist: dict) -> str:
+    """Stable hash of the statistics that are formatted into the chat prompt."""
+    payload = json.dumps(
+        [weekly_stats[-6:] if weekly_stats else [], today_stats or {}, subject_dist or {}],
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def chat_cache_key(
+    message: str,
+    weekly_stats: List[dict],
+    today_stats: dict,
+    subject_dist: dict,
+    history: Optional[list] = None
+) -> str:
+    normalized = normalize_message(message)
+    if history:
+        # Replies that depend on earlier turns are only shared by identical conversations
+        normalized += "\x00" + json.dumps(history, separators=(",", ":"))
+    digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:32]
+    return f"chat:{digest}:{stats_fingerprint(weekly_stats, today_stats, subject_dist)}"
+
+
+class ResponseCache:
+    """
+    Cache for LLM replies. Values are JSON-serializable dicts.
+    Subclasses provide the storage; counters are kept per process.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: dict) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+class MemoryResponseCache(ResponseCache):
+    """
+    In-process LRU cache with per-entry TTL, bounded both by entry count
+    and by the approximate serialized size of the stored values.
+    """
+
+    def __init__(self, ttl_seconds: float = 300, max_entries: int = 1024, max_bytes: int = 8 * 1024 * 1024):
+        super().__init__()
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        # key -> (expires_at, size, value)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[0] <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[2]
+
+    async def set(self, key: str, value: dict) -> None:
+        size = len(key) + len(json.dumps(value, separators=(",", ":"), default=str))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, size, value)
+        self.size_bytes += size
+        while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.size_bytes -= size
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats.update({
+            "entries": len(self._entries),
+            "sizeBytes": self.size_bytes,
+            "maxEntries": self.max_entries,
+            "maxBytes": self.max_bytes,
+            "ttlSeconds": self.ttl_seconds,
+        })
+        return stats
+
+
+class RedisResponseCache(ResponseCache):
+    """
+    Redis-backed cache shared by every worker. Expiry is delegated to Redis
+    and size-based eviction to its maxmemory policy (e.g. allkeys-lru).
+    """
+
+    def __init__(self, url: str, ttl_seconds: float = 300, prefix: str = "nexus:"):
+        super().__init__()
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url)
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[dict]:
+        raw = await self.client.get(self.prefix + key)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    async def set(self, key: str, value: dict) -> None:
+        await self.client.set(self.prefix + key, json.dumps(value, default=str), ex=int(self.ttl_seconds))
+
+
+def create_response_cache() -> ResponseCache:
+    """
+    Build the chat response cache from the environment.
+    NEXUS_CHAT_CACHE_URL switches to a shared Redis cache; otherwise an
+    in-process LRU sized by NEXUS_CHAT_CACHE_MAX_ENTRIES / _MAX_BYTES is used.
+    """
+    ttl = float(os.getenv("NEXUS_CHAT_CACHE_TTL", "300"))
+    url = os.getenv("NEXUS_CHAT_CACHE_URL")
+    if url:
+        try:
+            return RedisResponseCache(url, ttl_seconds=ttl)
+        except ImportError:
+            pass
+    return MemoryResponseCache(
+        ttl_seconds=ttl,
+        max_entries=int(os.getenv("NEXUS_CHAT_CACHE_MAX_ENTRIES", "1024")),
+        max_bytes=int(os.getenv("NEXUS_CHAT_CACHE_MAX_BYTES", str(8 * 1024 * 1024))),
+    )
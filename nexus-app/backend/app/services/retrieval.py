@@ -0,0 +1,235 @@
+import hashlib
+import json
+import os
+import re
+import zlib
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "study_techniques.json")
+
+# Hashed feature space for word unigrams and bigrams
+N_FEATURES = 1 << 18
+
+STOPWORDS = frozenset("""
+a about after again all also am an and any are as at be because been before being best but by can could
+did do does doing feel for from get give go going got had has have having how i if in into is it its just
+keep know like long make me more most much my need next no not now of on one or our out really should so
+some stop than that the their them then there these they this to too up us use very want was way we were
+what when where which while who why will with would you your
+""".split())
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Light suffix stripping so "procrastinating" meets "procrastination"; first match wins
+_SUFFIXES = (("ies", "y"), ("ied", "y"), ("ing", ""), ("ion", ""), ("ed", ""), ("ly", ""), ("s", ""))
+
+ARRAY_NAMES = ("indptr", "doc_ids", "weights", "idf")
+
+
+class Passage(NamedTuple):
+    id: str
+    title: str
+    text: str
+    score: float
+
+
+def stem(word: str) -> str:
+    for suffix, replacement in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3 and not word.endswith("ss"):
+            return word[:-len(suffix)] + replacement
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased, lightly stemmed words without stopwords."""
+    return [stem(word) for word in _WORD.findall(text.lower()) if word not in STOPWORDS]
+
+
+def hashed_features(text: str, bigrams: bool = True) -> np.ndarray:
+    """
+    Feature ids of the text's unigrams and, optionally, bigrams. crc32 rather
+    than hash() so ids are stable across processes and match the index on disk.
+    """
+    words = tokenize(text)
+    grams = words + ([f"{a} {b}" for a, b in zip(words, words[1:])] if bigrams else [])
+    return np.fromiter((zlib.crc32(g.encode()) & (N_FEATURES - 1) for g in grams), dtype=np.int64, count=len(grams))
+
+
+def _tf_weights(features: np.ndarray, idf: np.ndarray):
+    """Unique features with L2-normalized sublinear TF-IDF weights."""
+    unique, counts = np.unique(features, return_counts=True)
+    weights = (1 + np.log(counts)) * idf[unique]
+    norm = np.sqrt(np.dot(weights, weights))
+    return unique, (weights / norm if norm > 0 else weights)
+
+
+def document_features(doc: dict) -> np.ndarray:
+    """
+    Indexed features of a passage. The title is counted twice to weigh it
+    above the body, and bigrams come only from the title and keyword phrases:
+    body bigrams are nearly all unique and would dilute every real match.
+    """
+    phrases = [doc["title"], doc["title"], *doc.get("keywords", [])]
+    return np.concatenate([hashed_features(p) for p in phrases] + [hashed_features(doc["text"], bigrams=False)])
+
+
+def build_index(docs: List[dict]) -> Dict[str, np.ndarray]:
+    """
+    TF-IDF matrix of the documents, stored column-wise (an inverted index):
+    the postings of feature f are doc_ids/weights[indptr[f]:indptr[f + 1]].
+    """
+    per_doc = [np.unique(document_features(d)) for d in docs]
+    df = np.bincount(np.concatenate(per_doc), minlength=N_FEATURES) if per_doc else np.zeros(N_FEATURES)
+    idf = (np.log((1 + len(docs)) / (1 + df)) + 1).astype(np.float32)
+
+    features, doc_ids, weights = [], [], []
+    for i, d in enumerate(docs):
+        unique, w = _tf_weights(document_features(d), idf)
+        features.append(unique)
+        doc_ids.append(np.full(len(unique), i, dtype=np.int32))
+        weights.append(w.astype(np.float32))
+    features = np.concatenate(features) if docs else np.zeros(0, dtype=np.int64)
+    doc_ids = np.concatenate(doc_ids) if docs else np.zeros(0, dtype=np.int32)
+    weights = np.concatenate(weights) if docs else np.zeros(0, dtype=np.float32)
+
+    order = np.argsort(features, kind="stable")
+    indptr = np.zeros(N_FEATURES + 1, dtype=np.int32)
+    np.cumsum(np.bincount(features, minlength=N_FEATURES), out=indptr[1:])
+    return {"indptr": indptr, "doc_ids": doc_ids[order], "weights": weights[order], "idf": idf}
+
+
+class RetrievalIndex:
+    """
+    Local search over a corpus of study-technique passages.
+
+    The hashed unigram/bigram TF-IDF index is built from the corpus JSON
+    into `index_dir` (rebuilt whenever the corpus changes) and memory-mapped
+    from there, so every worker shares the same pages. Queries score all
+    passages at once by cosine similarity: the postings of the query's
+    features are gathered and summed per document with np.bincount.
+
+    `min_score` is the bar for using a passage at all (tip answers, LLM
+    grounding); `answer_score` the bar for answering a free-form question
+    from the corpus instead of calling the LLM.
+    """
+
+    def __init__(
+        self,
+        corpus_path: str = CORPUS_PATH,
+        index_dir: Optional[str] = "retrieval_index",
+        min_score: float = 0.15,
+        answer_score: float = 0.35
+    ):
+        self.corpus_path = corpus_path
+        self.index_dir = index_dir
+        self.min_score = min_score
+        self.answer_score = answer_score
+        self.docs: List[dict] = []
+        self._arrays: Optional[Dict[str, np.ndarray]] = None
+        self.mapped = False
+        self.queries = 0
+        self.hits = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._arrays is not None
+
+    def load(self) -> None:
+        """Build the index if missing or stale, then map it. Safe to call repeatedly."""
+        if self._arrays is not None:
+            return
+        with open(self.corpus_path, "rb") as f:
+            raw = f.read()
+        docs = json.loads(raw)
+        digest = hashlib.sha256(raw).hexdigest()
+        arrays = None
+        if self.index_dir:
+            try:
+                arrays = self._open(digest) or self._write(build_index(docs), digest)
+                self.mapped = True
+            except OSError:
+                # Read-only or missing directory: keep the index in memory instead
+                arrays = None
+        self.docs = docs
+        self._arrays = arrays or build_index(docs)
+
+    def _open(self, digest: str) -> Optional[Dict[str, np.ndarray]]:
+        meta_path = os.path.join(self.index_dir, "meta.json")
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("corpus") != digest or meta.get("features") != N_FEATURES:
+            return None
+        return {name: np.load(os.path.join(self.index_dir, f"{name}.npy"), mmap_mode="r") for name in ARRAY_NAMES}
+
+    def _write(self, arrays: Dict[str, np.ndarray], digest: str) -> Dict[str, np.ndarray]:
+        os.makedirs(self.index_dir, exist_ok=True)
+        # Write-then-rename so workers starting together never map a partial file
+        for name in ARRAY_NAMES:
+            tmp = os.path.join(self.index_dir, f"{name}.{os.getpid()}.tmp.npy")
+            np.save(tmp, arrays[name])
+            os.replace(tmp, os.path.join(self.index_dir, f"{name}.npy"))
+        tmp = os.path.join(self.index_dir, f"meta.{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"corpus": digest, "features": N_FEATURES}, f)
+        os.replace(tmp, os.path.join(self.index_dir, "meta.json"))
+        return self._open(digest)
+
+    def search(self, query: str, k: int = 3) -> List[Passage]:
+        """Top `k` passages with a cosine similarity of at least min_score, best first."""
+        self.load()
+        self.queries += 1
+        arrays = self._arrays
+        query_features = hashed_features(query)
+        starts = arrays["indptr"][query_features].astype(np.int64)
+        # Like a vocabulary-based vectorizer, features no passage contains are ignored
+        known = arrays["indptr"][query_features + 1] > starts
+        features, query_weights = _tf_weights(query_features[known], arrays["idf"])
+        if not len(features):
+            return []
+        starts = arrays["indptr"][features].astype(np.int64)
+        lengths = arrays["indptr"][features + 1] - starts
+        total = int(lengths.sum())
+        # Positions of every posting of every query feature, without a Python loop
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+        scores = np.bincount(
+            arrays["doc_ids"][positions],
+            weights=arrays["weights"][positions] * np.repeat(query_weights, lengths),
+            minlength=len(self.docs)
+        )
+        top = np.argsort(-scores, kind="stable")[:k]
+        passages = [
+            Passage(self.docs[i]["id"], self.docs[i]["title"], self.docs[i]["text"], round(float(scores[i]), 4))
+            for i in top if scores[i] >= self.min_score
+        ]
+        if passages:
+            self.hits += 1
+        return passages
+
+    def stats(self) -> dict:
+        return {
+            "passages": len(self.docs),
+            "loaded": self.loaded,
+            "memoryMapped": self.mapped,
+            "queries": self.queries,
+            "hits": self.hits,
+            "minScore": self.min_score,
+            "answerScore": self.answer_score,
+        }
+
+
+def create_retrieval_index() -> RetrievalIndex:
+    """
+    Build the index from NEXUS_RETRIEVAL_INDEX_DIR (empty keeps it in memory),
+    NEXUS_RETRIEVAL_MIN_SCORE and NEXUS_RETRIEVAL_ANSWER_SCORE.
+    """
+    return RetrievalIndex(
+        index_dir=os.getenv("NEXUS_RETRIEVAL_INDEX_DIR", "retrieval_index") or None,
+        min_score=float(os.getenv("NEXUS_RETRIEVAL_MIN_SCORE", "0.15")),
+        answer_score=float(os.getenv("NEXUS_RETRIEVAL_ANSWER_SCORE", "0.35")),
+    )
@@ -0,0 +1,359 @@
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timezone
+from typing import List, Optional, Tuple
+
+
+# Number of dense weeks returned as `weeklyData`, matching the dashboard chart window
+RECENT_WEEKS = 12
+
+
+def week_index(day: date) -> int:
+    """Monday-aligned week ordinal, so consecutive weeks differ by exactly one."""
+    return (day.toordinal() - 1) // 7
+
+
+def week_label(index: int) -> Tuple[int, int]:
+    """Return the ISO (year, weekNumber) for a week ordinal."""
+    iso = date.fromordinal(index * 7 + 1).isocalendar()
+    return iso[0], iso[1]
+
+
+class SessionStore:
+    """
+    Append-only store of focus session events with per-user rollups.
+    Subclasses persist events and keep weekly, daily and per-subject
+    aggregates up to date as each session is ingested.
+    """
+
+    def ingest(self, user_id: str, sessions: List[dict]) -> List[dict]:
+        """Record sessions and update rollups. Returns the sessions that were new."""
+        raise NotImplementedError
+
+    def get_history(self, user_id: str) -> Optional[dict]:
+        """
+        Return a user's non-empty weeks as (week_index, minutes, sessions) in
+        order, minutes per subject and the latest day as (date, sessions,
+        minutes, xp), or None if nothing was ingested.
+        """
+        raise NotImplementedError
+
+    def get_rollup(self, user_id: str, now: Optional[datetime] = None, history_weeks: int = RECENT_WEEKS) -> Optional[dict]:
+        """
+        Return precomputed aggregates for a user, or None if nothing was ingested.
+        `recentMinutes` holds the minutes of the last `history_weeks` weeks, for the forecaster.
+        """
+        raise NotImplementedError
+
+    def open(self) -> None:
+        """Acquire resources (files, connections). Safe to call repeatedly."""
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    SQLite-backed session store running in WAL mode.
+
+    Rollups are maintained incrementally: each ingested session touches
+    only its own week, the following week (whose growth rate depends on it),
+    its day and its subject, so reads never scan the event log.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS session_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id TEXT NOT NULL,
+        session_id TEXT NOT NULL,
+        subject TEXT NOT NULL,
+        duration_minutes INTEGER NOT NULL,
+        xp_earned INTEGER NOT NULL,
+        started_at TEXT NOT NULL,
+        UNIQUE (user_id, session_id)
+    );
+    CREATE TABLE IF NOT EXISTS weekly_rollups (
+        user_id TEXT NOT NULL,
+        week_index INTEGER NOT NULL,
+        total_minutes INTEGER NOT NULL,
+        session_count INTEGER NOT NULL,
+        growth_rate REAL,
+        PRIMARY KEY (user_id, week_index)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS daily_rollups (
+        user_id TEXT NOT NULL,
+        day TEXT NOT NULL,
+        minutes INTEGER NOT NULL,
+        sessions INTEGER NOT NULL,
+        xp INTEGER NOT NULL,
+        PRIMARY KEY (user_id, day)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS subject_rollups (
+        user_id TEXT NOT NULL,
+        subject TEXT NOT NULL,
+        minutes INTEGER NOT NULL,
+        PRIMARY KEY (user_id, subject)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_subject_rollups_top
+        ON subject_rollups (user_id, minutes DESC, subject);
+    CREATE TABLE IF NOT EXISTS user_rollups (
+        user_id TEXT PRIMARY KEY,
+        first_week INTEGER NOT NULL,
+        last_week INTEGER NOT NULL,
+        total_minutes INTEGER NOT NULL,
+        total_sessions INTEGER NOT NULL,
+        weeks_active INTEGER NOT NULL,
+        growth_sum REAL NOT NULL,
+        growth_count INTEGER NOT NULL
+    );
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self._lock = threading.Lock()
+        # Connected by open() (the app lifespan) or on first use, not at import
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def open(self) -> None:
+        with self._lock:
+            self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        """The connection, opened if needed; callers hold the lock."""
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            if self.path != ":memory:":
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def ingest(self, user_id: str, sessions: List[dict]) -> List[dict]:
+        inserted = []
+        with self._lock:
+            cur = self._connect().cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                for session in sessions:
+                    started_at = as_utc(session["timestamp"])
+                    minutes = int(session.get("durationMinutes", 0))
+                    subject = session.get("subject") or "General"
+                    xp = int(session.get("xpEarned", 0))
+                    cur.execute(
+                        "INSERT OR IGNORE INTO session_events "
+                        "(user_id, session_id, subject, duration_minutes, xp_earned, started_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (user_id, str(session["id"]), subject, minutes, xp, started_at.isoformat())
+                    )
+                    if cur.rowcount != 1:
+                        # Duplicate delivery of an already-ingested session
+                        continue
+                    self._apply(cur, user_id, started_at.date(), subject, minutes, xp)
+                    inserted.append(session)
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+        return inserted
+
+    def _apply(self, cur: sqlite3.Cursor, user_id: str, day: date, subject: str, minutes: int, xp: int) -> None:
+        """Fold one session into the rollup tables."""
+        week = week_index(day)
+        summary = cur.execute(
+            "SELECT first_week, last_week, total_minutes, total_sessions, weeks_active, "
+            "growth_sum, growth_count FROM user_rollups WHERE user_id = ?",
+            (user_id,)
+        ).fetchone()
+        if summary is None:
+            first_week, last_week, total_minutes, total_sessions = week, week, 0, 0
+            weeks_active, growth_sum, growth_count = 0, 0.0, 0
+        else:
+            first_week, last_week, total_minutes, total_sessions, weeks_active, growth_sum, growth_count = summary
+
+        old_minutes, old_sessions, old_rate = self._week(cur, user_id, week)
+        prev_minutes = self._week(cur, user_id, week - 1)[0]
+        new_minutes = old_minutes + minutes
+        new_rate = _growth(prev_minutes, new_minutes)
+        self._put_week(cur, user_id, week, new_minutes, old_sessions + 1, new_rate)
+        growth_sum, growth_count = _swap_rate(growth_sum, growth_count, old_rate, new_rate)
+
+        # The following week's growth rate is measured against this one. It is
+        # materialized even when empty so a drop to zero still counts as -100%.
+        next_minutes, next_sessions, next_old_rate = self._week(cur, user_id, week + 1)
+        next_rate = _growth(new_minutes, next_minutes)
+        self._put_week(cur, user_id, week + 1, next_minutes, next_sessions, next_rate)
+        growth_sum, growth_count = _swap_rate(growth_sum, growth_count, next_old_rate, next_rate)
+
+        if old_minutes == 0 and new_minutes > 0:
+            weeks_active += 1
+
+        cur.execute(
+            "INSERT OR REPLACE INTO user_rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (user_id, min(first_week, week), max(last_week, week), total_minutes + minutes,
+             total_sessions + 1, weeks_active, growth_sum, growth_count)
+        )
+        cur.execute(
+            "INSERT INTO daily_rollups VALUES (?, ?, ?, 1, ?) "
+            "ON CONFLICT (user_id, day) DO UPDATE SET minutes = minutes + excluded.minutes, "
+            "sessions = sessions + 1, xp = xp + excluded.xp",
+            (user_id, day.isoformat(), minutes, xp)
+        )
+        cur.execute(
+            "INSERT INTO subject_rollups VALUES (?, ?, ?) "
+            "ON CONFLICT (user_id, subject) DO UPDATE SET minutes = minutes + excluded.minutes",
+            (user_id, subject, minutes)
+        )
+
+    @staticmethod
+    def _week(cur: sqlite3.Cursor, user_id: str, week: int) -> Tuple[int, int, Optional[float]]:
+        row = cur.execute(
+            "SELECT total_minutes, session_count, growth_rate FROM weekly_rollups "
+            "WHERE user_id = ? AND week_index = ?",
+            (user_id, week)
+        ).fetchone()
+        return row if row else (0, 0, None)
+
+    @staticmethod
+    def _put_week(cur: sqlite3.Cursor, user_id: str, week: int, minutes: int, sessions: int, rate: Optional[float]) -> None:
+        cur.execute(
+            "INSERT OR REPLACE INTO weekly_rollups VALUES (?, ?, ?, ?, ?)",
+            (user_id, week, minutes, sessions, rate)
+        )
+
+    def get_rollup(self, user_id: str, now: Optional[datetime] = None, history_weeks: int = RECENT_WEEKS) -> Optional[dict]:
+        today = as_utc(now or datetime.now(timezone.utc)).date()
+        with self._lock:
+            cur = self._connect().cursor()
+            summary = cur.execute(
+                "SELECT first_week, last_week, total_minutes, total_sessions, weeks_active, "
+                "growth_sum, growth_count FROM user_rollups WHERE user_id = ?",
+                (user_id,)
+            ).fetchone()
+            if summary is None:
+                return None
+            first_week, last_week, total_minutes, total_sessions, weeks_active, growth_sum, growth_count = summary
+            end_week = max(week_index(today), last_week)
+
+            # Only the materialized week after `last_week` can lie beyond the window
+            for (rate,) in cur.execute(
+                "SELECT growth_rate FROM weekly_rollups WHERE user_id = ? AND week_index > ? "
+                "AND growth_rate IS NOT NULL",
+                (user_id, end_week)
+            ).fetchall():
+                growth_sum, growth_count = growth_sum - rate, growth_count - 1
+
+            recent_rates = [rate for (rate,) in cur.execute(
+                "SELECT growth_rate FROM weekly_rollups WHERE user_id = ? AND week_index <= ? "
+                "AND growth_rate IS NOT NULL ORDER BY week_index DESC LIMIT 3",
+                (user_id, end_week)
+            ).fetchall()][::-1]
+
+            window_start = max(first_week, end_week - RECENT_WEEKS + 1)
+            history_start = max(first_week, end_week - history_weeks + 1)
+            weeks = dict((row[0], row[1:]) for row in cur.execute(
+                "SELECT week_index, total_minutes, session_count FROM weekly_rollups "
+                "WHERE user_id = ? AND week_index BETWEEN ? AND ?",
+                (user_id, min(window_start, history_start), end_week)
+            ).fetchall())
+
+            top = cur.execute(
+                "SELECT subject, minutes FROM subject_rollups WHERE user_id = ? "
+                "ORDER BY minutes DESC, subject ASC LIMIT 1",
+                (user_id,)
+            ).fetchone()
+
+            day = cur.execute(
+                "SELECT sessions, minutes, xp FROM daily_rollups WHERE user_id = ? AND day = ?",
+                (user_id, today.isoformat())
+            ).fetchone() or (0, 0, 0)
+
+        weekly_data = []
+        for index in range(window_start, end_week + 1):
+            year, number = week_label(index)
+            minutes, sessions = weeks.get(index, (0, 0))
+            weekly_data.append({
+                "weekNumber": number,
+                "year": year,
+                "totalMinutes": minutes,
+                "sessionCount": sessions,
+            })
+
+        return {
+            "totalMinutes": total_minutes,
+            "totalSessions": total_sessions,
+            "weeksActive": weeks_active,
+            "totalWeeks": end_week - first_week + 1,
+            "growthSum": growth_sum,
+            "growthCount": growth_count,
+            "recentGrowthRates": recent_rates,
+            "currentWeekMinutes": weeks.get(end_week, (0, 0))[0],
+            "lastWeekMinutes": weeks.get(end_week - 1, (0, 0))[0],
+            "topSubject": tuple(top) if top else None,
+            "today": {"sessions": day[0], "minutes": day[1], "xp": day[2]},
+            "weeklyData": weekly_data,
+            "recentMinutes": [weeks.get(index, (0, 0))[0] for index in range(history_start, end_week + 1)],
+        }
+
+    def get_history(self, user_id: str) -> Optional[dict]:
+        with self._lock:
+            cur = self._connect().cursor()
+            weeks = cur.execute(
+                "SELECT week_index, total_minutes, session_count FROM weekly_rollups "
+                "WHERE user_id = ? AND session_count > 0 ORDER BY week_index",
+                (user_id,)
+            ).fetchall()
+            if not weeks:
+                return None
+            subjects = dict(cur.execute(
+                "SELECT subject, minutes FROM subject_rollups WHERE user_id = ?",
+                (user_id,)
+            ).fetchall())
+            day = cur.execute(
+                "SELECT day, sessions, minutes, xp FROM daily_rollups WHERE user_id = ? "
+                "ORDER BY day DESC LIMIT 1",
+                (user_id,)
+            ).fetchone()
+        return {
+            "weeks": weeks,
+            "subjects": subjects,
+            "lastDay": (date.fromisoformat(day[0]), day[1], day[2], day[3]),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def as_utc(value) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _growth(prev: int, curr: int) -> Optional[float]:
+    """Week-over-week growth in percent, undefined when the previous week is empty."""
+    if prev > 0:
+        return ((curr - prev) / prev) * 100
+    return None
+
+
+def _swap_rate(total: float, count: int, old: Optional[float], new: Optional[float]) -> Tuple[float, int]:
+    if old is not None:
+        total, count = total - old, count - 1
+    if new is not None:
+        total, count = total + new, count + 1
+    return total, count
+
+
+def create_session_store() -> SessionStore:
+    """
+    Build the configured session store.
+    NEXUS_SESSION_DB selects the SQLite file (":memory:" keeps it in-process).
+    """
+    return SQLiteSessionStore(os.getenv("NEXUS_SESSION_DB", "nexus_sessions.db"))
@@ -0,0 +1,314 @@
+import asyncio
+import os
+import threading
+from collections import OrderedDict, deque
+from datetime import date, datetime, timezone
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+from app.services.analytics_service import AnalyticsService
+from app.services.session_store import RECENT_WEEKS, SessionStore, as_utc, week_index, week_label
+
+
+def _growth(prev: int, curr: int) -> Optional[float]:
+    if prev > 0:
+        return ((curr - prev) / prev) * 100
+    return None
+
+
+class UserAnalyticsState:
+    """
+    Constant-size running state for one user. Weeks before `week` are closed:
+    their growth rates are summed and the last three kept in a ring buffer,
+    and their minutes are folded into the EWMA.
+    """
+
+    __slots__ = (
+        "first_week", "week", "minutes", "sessions", "prev_minutes",
+        "total_minutes", "total_sessions", "weeks_active",
+        "growth_sum", "growth_count", "recent_rates", "ewma", "recent_weeks",
+        "subjects", "top_subject", "day", "day_sessions", "day_minutes", "day_xp",
+    )
+
+    def __init__(self, week: int, history_weeks: int = RECENT_WEEKS):
+        self.first_week = week
+        self.week = week
+        self.minutes = 0
+        self.sessions = 0
+        self.prev_minutes = 0
+        self.total_minutes = 0
+        self.total_sessions = 0
+        self.weeks_active = 0
+        self.growth_sum = 0.0
+        self.growth_count = 0
+        self.recent_rates: Deque[float] = deque(maxlen=3)
+        self.ewma: Optional[float] = None
+        # Closed non-empty weeks inside the chart and forecast windows, as (week, minutes, sessions)
+        self.recent_weeks: Deque[Tuple[int, int, int]] = deque(maxlen=max(RECENT_WEEKS, history_weeks))
+        self.subjects: Dict[str, int] = {}
+        self.top_subject: Optional[Tuple[str, int]] = None
+        self.day: Optional[date] = None
+        self.day_sessions = 0
+        self.day_minutes = 0
+        self.day_xp = 0
+
+    def advance(self, week: int, alpha: float) -> None:
+        """Close the current week and move to a later one, in O(1) whatever the gap."""
+        if week <= self.week:
+            return
+        self._add_rate(_growth(self.prev_minutes, self.minutes))
+        self.ewma = self.minutes if self.ewma is None else self.ewma + alpha * (self.minutes - self.ewma)
+        if self.sessions:
+            self.recent_weeks.append((self.week, self.minutes, self.sessions))
+        gap = week - self.week
+        if gap > 1:
+            # The empty week right after counts as a drop to zero; later empty weeks have no rate
+            self._add_rate(_growth(self.minutes, 0))
+            self.ewma *= (1 - alpha) ** (gap - 1)
+            self.prev_minutes = 0
+        else:
+            self.prev_minutes = self.minutes
+        self.week = week
+        self.minutes = 0
+        self.sessions = 0
+
+    def add(self, minutes: int, sessions: int = 1) -> None:
+        if self.minutes == 0 and minutes > 0:
+            self.weeks_active += 1
+        self.minutes += minutes
+        self.sessions += sessions
+        self.total_minutes += minutes
+        self.total_sessions += sessions
+
+    def add_subject(self, subject: str, minutes: int) -> None:
+        total = self.subjects.get(subject, 0) + minutes
+        self.subjects[subject] = total
+        # Most minutes, ties to the alphabetically first subject, as in SessionStore.get_rollup
+        top = self.top_subject
+        if top is None or total > top[1] or (total == top[1] and subject < top[0]):
+            self.top_subject = (subject, total)
+
+    def add_day(self, day: date, sessions: int, minutes: int, xp: int) -> None:
+        # Only the latest day is tracked; it becomes "today" while it is current
+        if self.day is None or day > self.day:
+            self.day, self.day_sessions, self.day_minutes, self.day_xp = day, 0, 0, 0
+        if day == self.day:
+            self.day_sessions += sessions
+            self.day_minutes += minutes
+            self.day_xp += xp
+
+    def _add_rate(self, rate: Optional[float]) -> None:
+        if rate is not None:
+            self.growth_sum += rate
+            self.growth_count += 1
+            self.recent_rates.append(rate)
+
+    def rollup(self, today: date, alpha: float, history_weeks: int = RECENT_WEEKS) -> dict:
+        """
+        Aggregates as of `today`, in the session store's rollup shape.
+        Weeks between the last session and today are accounted for without
+        changing the state.
+        """
+        end_week = max(week_index(today), self.week)
+        extra = [_growth(self.prev_minutes, self.minutes)]
+        ewma = self.ewma
+        if end_week > self.week:
+            extra.append(_growth(self.minutes, 0))
+            ewma = self.minutes if ewma is None else ewma + alpha * (self.minutes - ewma)
+            ewma *= (1 - alpha) ** (end_week - self.week - 1)
+        extra = [rate for rate in extra if rate is not None]
+
+        if end_week == self.week:
+            current, last = self.minutes, self.prev_minutes
+        else:
+            current, last = 0, self.minutes if end_week == self.week + 1 else 0
+
+        window_start = max(self.first_week, end_week - RECENT_WEEKS + 1)
+        history_start = max(self.first_week, end_week - history_weeks + 1)
+        weeks = {w: (m, s) for w, m, s in self.recent_weeks}
+        weeks[self.week] = (self.minutes, self.sessions)
+        weekly_data = []
+        for index in range(window_start, end_week + 1):
+            year, number = week_label(index)
+            minutes, sessions = weeks.get(index, (0, 0))
+            weekly_data.append({"weekNumber": number, "year": year, "totalMinutes": minutes, "sessionCount": sessions})
+
+        is_today = self.day == today
+        return {
+            "totalMinutes": self.total_minutes,
+            "totalSessions": self.total_sessions,
+            "weeksActive": self.weeks_active,
+            "totalWeeks": end_week - self.first_week + 1,
+            "growthSum": self.growth_sum + sum(extra),
+            "growthCount": self.growth_count + len(extra),
+            "recentGrowthRates": (list(self.recent_rates) + extra)[-3:],
+            "currentWeekMinutes": current,
+            "lastWeekMinutes": last,
+            "topSubject": self.top_subject,
+            "today": {
+                "sessions": self.day_sessions if is_today else 0,
+                "minutes": self.day_minutes if is_today else 0,
+                "xp": self.day_xp if is_today else 0,
+            },
+            "weeklyData": weekly_data,
+            "recentMinutes": [weeks.get(index, (0, 0))[0] for index in range(history_start, end_week + 1)],
+            "ewmaWeeklyMinutes": ewma,
+        }
+
+
+class StreamingAnalytics:
+    """
+    Incrementally maintained analytics, pushed to subscribers.
+
+    Each completed session updates its user's state in O(1), independent of
+    history length. State is seeded from the session store the first time a
+    user is seen (and rebuilt from it when a session arrives for a week that
+    is already closed). Users are kept in LRU order up to `max_users`.
+
+    `ingest` stores and folds sessions in blocking calls, so it runs in a
+    worker thread; subscribers are notified from the event loop by `publish`.
+    """
+
+    def __init__(
+        self,
+        store: SessionStore,
+        analytics: AnalyticsService,
+        alpha: float = 0.3,
+        max_users: int = 10000
+    ):
+        self.store = store
+        self.analytics = analytics
+        self.alpha = alpha
+        self.max_users = max_users
+        self._states: "OrderedDict[str, UserAnalyticsState]" = OrderedDict()
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        # Guards the user states; held only for O(1) work, never for store reads
+        self._lock = threading.Lock()
+        # Serializes ingests, so a reload from the store never misses or repeats a batch
+        self._ingest_lock = threading.Lock()
+        self.updates = 0
+        self.rebuilds = 0
+
+    def _state(self, user_id: str) -> Optional[UserAnalyticsState]:
+        with self._lock:
+            state = self._states.get(user_id)
+            if state is not None:
+                self._states.move_to_end(user_id)
+                return state
+        # Not between an ingest's store write and its fold, or that batch would count twice
+        with self._ingest_lock:
+            with self._lock:
+                state = self._states.get(user_id)
+            return state if state is not None else self._load(user_id)
+
+    def _load(self, user_id: str) -> Optional[UserAnalyticsState]:
+        history = self.store.get_history(user_id)
+        if history is None:
+            return None
+        weeks = history["weeks"]
+        state = UserAnalyticsState(weeks[0][0], self.analytics.forecaster.history_weeks)
+        for week, minutes, sessions in weeks:
+            state.advance(week, self.alpha)
+            state.add(minutes, sessions)
+        for subject, minutes in history["subjects"].items():
+            state.add_subject(subject, minutes)
+        state.add_day(*history["lastDay"])
+        with self._lock:
+            self.rebuilds += 1
+            self._states[user_id] = state
+            while len(self._states) > self.max_users:
+                self._states.popitem(last=False)
+        return state
+
+    def ingest(self, user_id: str, sessions: List[dict]) -> List[dict]:
+        """
+        Store sessions and fold the new ones into the user's state; returns
+        the new ones. Blocking: call it off the event loop, then `publish`.
+        """
+        with self._ingest_lock:
+            accepted = self.store.ingest(user_id, sessions)
+            self._fold(user_id, accepted)
+        return accepted
+
+    def on_sessions(self, user_id: str, sessions: List[dict]) -> None:
+        """Fold newly ingested sessions (already in the store) into the user's state and notify subscribers."""
+        self._fold(user_id, sessions)
+        if sessions:
+            self.publish(user_id)
+
+    def _fold(self, user_id: str, sessions: List[dict]) -> None:
+        if not sessions:
+            return
+        events = sorted(
+            (as_utc(s["timestamp"]), int(s.get("durationMinutes", 0)), s.get("subject") or "General", int(s.get("xpEarned", 0)))
+            for s in sessions
+        )
+        with self._lock:
+            self.updates += 1
+            state = self._states.get(user_id)
+            if state is not None and week_index(events[0][0].date()) >= state.week:
+                self._states.move_to_end(user_id)
+                for started_at, minutes, subject, xp in events:
+                    state.advance(week_index(started_at.date()), self.alpha)
+                    state.add(minutes)
+                    state.add_subject(subject, minutes)
+                    state.add_day(started_at.date(), 1, minutes, xp)
+                return
+            # Unknown user or late data: the store already holds these sessions
+            self._states.pop(user_id, None)
+        self._load(user_id)
+
+    def summary(self, user_id: str, now: Optional[datetime] = None) -> Optional[dict]:
+        """Analysis in the /analyze-stats shape plus the EWMA of weekly minutes."""
+        state = self._state(user_id)
+        if state is None:
+            return None
+        today = as_utc(now or datetime.now(timezone.utc)).date()
+        with self._lock:
+            rollup = state.rollup(today, self.alpha, self.analytics.forecaster.history_weeks)
+        analysis = self.analytics.analyze_rollup(rollup)
+        ewma = rollup["ewmaWeeklyMinutes"]
+        analysis["summary"]["ewmaWeeklyMinutes"] = round(ewma, 1) if ewma is not None else None
+        return analysis
+
+    def subscribe(self, user_id: str) -> asyncio.Queue:
+        # Size one: a slow client skips straight to the newest summary
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[user_id]
+
+    def publish(self, user_id: str) -> None:
+        """Push the user's current summary to their subscribers; event loop only."""
+        queues = self._subscribers.get(user_id)
+        if not queues:
+            return
+        summary = self.summary(user_id)
+        for queue in queues:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(summary)
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self._states),
+            "subscribers": sum(len(q) for q in self._subscribers.values()),
+            "updates": self.updates,
+            "rebuilds": self.rebuilds,
+            "maxUsers": self.max_users,
+        }
+
+
+def create_streaming_analytics(store: SessionStore, analytics: AnalyticsService) -> StreamingAnalytics:
+    """Build the engine from NEXUS_ANALYTICS_EWMA_ALPHA / NEXUS_ANALYTICS_MAX_USERS."""
+    return StreamingAnalytics(
+        store,
+        analytics,
+        alpha=float(os.getenv("NEXUS_ANALYTICS_EWMA_ALPHA", "0.3")),
+        max_users=int(os.getenv("NEXUS_ANALYTICS_MAX_USERS", "10000")),
+    )
@@ -0,0 +1,139 @@
+"""
+Chat latency while heavy analytics jobs run on the same app worker.
+
+Starts benchmarks.stub_llm and the app as uvicorn subprocesses (see
+load_test), measures /api/chat latency on an idle server, then again
+while background clients keep posting long histories to
+/api/analyze-stats. Runs once with the analytics executor limited to its
+thread pool and once with the process pool enabled, and reports the p95
+increase under load. Long histories are sent columnar, as clients with
+long histories should, so request parsing stays small next to the
+analysis itself. Run from the backend directory:
+
+    python -m benchmarks.bench_analytics_isolation --weeks 20000 \\
+        --output isolation.json [--max-p95-increase 0.5]
+
+With --max-p95-increase, exits non-zero when chat p95 under load in the
+process-pool run grows by more than that fraction over idle.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+import httpx
+
+from app.services.analytics_service import rows_to_columns
+from benchmarks.load_test import free_port, serve
+from benchmarks.results import latency_summary, save_results
+from benchmarks.synthetic import weekly_series
+
+
+CONFIGS = {
+    "threads": {"NEXUS_ANALYTICS_PROCESSES": "0"},
+    "processes": {"NEXUS_ANALYTICS_PROCESSES": "2"},
+}
+
+
+async def measure_chat(client: httpx.AsyncClient, requests: int, offset: int) -> dict:
+    latencies = []
+    start = time.perf_counter()
+    for i in range(requests):
+        # Distinct messages so the response cache never answers
+        body = {"message": f"How should I plan revision for exam {offset + i}?"}
+        sent = time.perf_counter()
+        response = await client.post("/api/chat", json=body)
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - sent) * 1000)
+    return latency_summary(latencies, time.perf_counter() - start)
+
+
+async def run_config(base_url: str, args, histories: list) -> dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        idle = await measure_chat(client, args.requests, 0)
+
+        stop = asyncio.Event()
+        jobs = {"done": 0, "rejected": 0}
+
+        async def analytics_worker(worker: int):
+            i = worker
+            while not stop.is_set():
+                # A fresh todayStats per job defeats the analysis cache
+                body = {
+                    "weeklyStats": histories[i % len(histories)],
+                    "todayStats": {"sessions": i, "minutes": 25 * i, "xp": 50 * i},
+                    "subjectDistribution": {"Math": 100 + i},
+                }
+                response = await client.post("/api/analyze-stats", json=body)
+                jobs["done" if response.status_code == 200 else "rejected"] += 1
+                i += args.analytics_clients
+
+        workers = [asyncio.create_task(analytics_worker(w)) for w in range(args.analytics_clients)]
+        # Let the background jobs get going before measuring
+        await asyncio.sleep(args.settle_seconds)
+        loaded = await measure_chat(client, args.requests, args.requests)
+        stop.set()
+        await asyncio.gather(*workers)
+
+    return {
+        "idle": idle,
+        "loaded": loaded,
+        "analyticsJobs": jobs["done"],
+        "analyticsRejected": jobs["rejected"],
+        "p95Increase": round(loaded["p95Ms"] / idle["p95Ms"] - 1, 3) if idle["p95Ms"] else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weeks", type=int, default=20000, help="history length of the analytics jobs")
+    parser.add_argument("--analytics-clients", type=int, default=4, help="concurrent analytics clients")
+    parser.add_argument("--requests", type=int, default=60, help="chat requests per phase")
+    parser.add_argument("--settle-seconds", type=float, default=1.0)
+    parser.add_argument("--latency-ms", type=float, default=50, help="stub LLM time to first token")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--max-p95-increase", type=float, help="fail if the process-pool run exceeds this")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    histories = [rows_to_columns(weekly_series(args.weeks, rng)) for _ in range(4)]
+
+    results = {}
+    for name, overrides in CONFIGS.items():
+        stub_port, app_port = free_port(), free_port()
+        env = dict(
+            os.environ,
+            OPENAI_API_KEY="sk-stub",
+            OPENAI_BASE_URL=f"http://127.0.0.1:{stub_port}/v1",
+            NEXUS_SESSION_DB=":memory:",
+            # Keep chat on the LLM path being measured
+            NEXUS_RETRIEVAL_ANSWER_SCORE="2",
+            NEXUS_ANALYTICS_PROCESS_MIN_WEEKS=str(min(args.weeks, 2000)),
+            **overrides,
+        )
+        stub_cmd = [sys.executable, "-m", "benchmarks.stub_llm", "--port", str(stub_port),
+                    "--latency-ms", str(args.latency_ms)]
+        app_cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(app_port), "--log-level", "warning"]
+        app_ready = lambda r: r.status_code == 200 and r.json().get("llm") in ("warm", "disabled")
+        with serve(stub_cmd, env, f"http://127.0.0.1:{stub_port}/stats"), \
+                serve(app_cmd, env, f"http://127.0.0.1:{app_port}/health/ready", app_ready):
+            result = asyncio.run(run_config(f"http://127.0.0.1:{app_port}", args, histories))
+        results[name] = result
+        print(f"{name:>10}  idle p50={result['idle']['p50Ms']:>8}ms p95={result['idle']['p95Ms']:>8}ms  "
+              f"loaded p50={result['loaded']['p50Ms']:>8}ms p95={result['loaded']['p95Ms']:>8}ms  "
+              f"(+{result['p95Increase'] * 100:.0f}%)  analytics jobs={result['analyticsJobs']} "
+              f"rejected={result['analyticsRejected']}")
+
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "max_p95_increase")}
+    if args.output:
+        save_results(args.output, "analytics_isolation", results, config)
+    if args.max_p95_increase is not None and results["processes"]["p95Increase"] > args.max_p95_increase:
+        print(f"FAIL chat p95 grew {results['processes']['p95Increase'] * 100:.0f}% under analytics load")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Compare AnalyticsService.analyze_batch against looping over analyze.
+
+Run from the backend directory:
+    python -m benchmarks.bench_batch_analytics --users 20000 --weeks 12
+"""
+import argparse
+import random
+import time
+
+from app.services.analytics_service import AnalyticsService, pack_weekly_stats
+from benchmarks.synthetic import subject_distribution, today_stats, weekly_series
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--weeks", type=int, default=12, help="maximum weeks per user; lengths are ragged")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    weekly = [weekly_series(rng.randint(0, args.weeks), rng) for _ in range(args.users)]
+    today = [today_stats(rng) for _ in range(args.users)]
+    subjects = [subject_distribution(rng) for _ in range(args.users)]
+    service = AnalyticsService()
+
+    start = time.perf_counter()
+    looped = [service.analyze(w, t, s) for w, t, s in zip(weekly, today, subjects)]
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    minutes, sessions, lengths = pack_weekly_stats(weekly)
+    pack_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    batched = service.analyze_batch(minutes, sessions, lengths, today, subjects, weekly)
+    batch_seconds = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(looped, batched) if a != b)
+    print(f"users={args.users} max_weeks={args.weeks}")
+    print(f"loop over analyze : {loop_seconds * 1000:9.1f} ms")
+    print(f"pack matrices     : {pack_seconds * 1000:9.1f} ms")
+    print(f"analyze_batch     : {batch_seconds * 1000:9.1f} ms")
+    print(f"speedup (batch)   : {loop_seconds / batch_seconds:9.2f}x")
+    print(f"mismatched users  : {mismatches}")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
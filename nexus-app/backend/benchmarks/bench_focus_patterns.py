@@ -0,0 +1,56 @@
+"""
+Cost of focus pattern analytics (day/hour heatmap, subject profiles, best
+window) over raw sessions, including parsing the columnar request body.
+Run from the backend directory:
+
+    python -m benchmarks.bench_focus_patterns --sizes 10000,100000,300000 \\
+        --output focus.json [--compare baseline.json --tolerance 0.2]
+"""
+import argparse
+import json
+import random
+
+from app.routes.ai import FocusPatternsRequest, session_input
+from app.services.focus_patterns import FocusPatternAnalyzer
+from benchmarks.microbench import bench
+from benchmarks.results import compare_results, save_results
+from benchmarks.synthetic import session_columns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,300000", help="comma-separated session counts")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    analyzer = FocusPatternAnalyzer()
+    results = {}
+    for size in (int(s) for s in args.sizes.split(",")):
+        columns = session_columns(size, rng)
+        body = json.dumps({"sessions": columns, "utcOffsetMinutes": 60})
+        cases = {
+            "parse": lambda: session_input(FocusPatternsRequest.model_validate_json(body).sessions),
+            "analyze": lambda: analyzer.analyze(columns, 60),
+        }
+        for name, fn in cases.items():
+            micros = bench(fn)
+            results[f"{name}@{size}"] = {"us": round(micros, 2)}
+            print(f"{name:>10} sessions={size:<8} {micros / 1000:10.2f} ms/call")
+
+    config = {"sizes": args.sizes, "seed": args.seed}
+    if args.output:
+        save_results(args.output, "focus_patterns", results, config)
+    if args.compare:
+        regressions = compare_results(args.compare, results, ["us"], args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Accuracy backtest and throughput of the next-week focus time forecaster.
+
+Backtest: for every synthetic user and every week from the forecaster's
+minimum history onwards, forecast that week from the weeks before it
+(rolling origin) and score the Holt and least-squares forecasts against
+two baselines, last week's minutes and the mean of the last four weeks.
+Histories are a mix of trending series and the random walks used by the
+other benchmarks. Reports mean absolute error and how often the actual
+week fell inside each prediction interval.
+
+Throughput: forecast_batch over many users at once, and single-user
+forecast calls. Run from the backend directory:
+
+    python -m benchmarks.bench_forecast --users 2000 --weeks 52 \\
+        --output forecast.json [--compare baseline.json --tolerance 0.2]
+"""
+import argparse
+import random
+
+import numpy as np
+
+from app.services.analytics_service import pack_weekly_stats
+from app.services.forecasting import Forecaster
+from benchmarks.microbench import bench
+from benchmarks.results import compare_results, save_results
+from benchmarks.synthetic import trending_series, weekly_series
+
+
+def backtest(forecaster: Forecaster, minutes: np.ndarray) -> dict:
+    """One-step-ahead errors at every origin; each origin is a row truncated to that length."""
+    n_users, width = minutes.shape
+    origins = np.arange(forecaster.min_weeks, width)
+    rows = np.repeat(np.arange(n_users), len(origins))
+    lengths = np.tile(origins, n_users)
+    history = minutes[rows]
+    actual = history[np.arange(len(rows)), lengths].astype(np.float64)
+
+    fit = forecaster.fit(history, lengths)
+    last_four = np.stack([history[np.arange(len(rows)), lengths - k] for k in range(1, 5)])
+    predictions = {
+        "naive": history[np.arange(len(rows)), lengths - 1].astype(np.float64),
+        "mean4": last_four.mean(axis=0),
+        "holt": fit["holt"],
+        "linear": fit["linear"],
+    }
+    results = {name: {"mae": round(float(np.abs(actual - p).mean()), 2)} for name, p in predictions.items()}
+    for name in ("holt", "linear"):
+        inside = (actual >= fit[f"{name}Lower"]) & (actual <= fit[f"{name}Upper"])
+        results[name]["coverage"] = round(float(inside.mean()), 3)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000, help="synthetic users per history kind")
+    parser.add_argument("--weeks", type=int, default=52, help="weeks per backtest history")
+    parser.add_argument("--batch-users", type=int, default=20000, help="users per forecast_batch call")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    forecaster = Forecaster()
+    results = {}
+
+    kinds = {"trending": trending_series, "random_walk": weekly_series}
+    for kind, make in kinds.items():
+        minutes, _, _ = pack_weekly_stats([make(args.weeks, rng) for _ in range(args.users)])
+        scores = backtest(forecaster, minutes)
+        for name, score in scores.items():
+            results[f"{kind}:{name}"] = score
+        print(f"{kind:>12}  " + "  ".join(
+            f"{name} mae={s['mae']:.1f}" + (f" cover={s['coverage'] * 100:.0f}%" if "coverage" in s else "")
+            for name, s in scores.items()
+        ))
+    print(f"(intervals target {forecaster.confidence * 100:.0f}% coverage)")
+
+    series = [trending_series(rng.randint(1, args.weeks), rng) for _ in range(args.batch_users)]
+    minutes, _, lengths = pack_weekly_stats(series)
+    micros = bench(lambda: forecaster.forecast_batch(minutes, lengths))
+    results["batch"] = {"us": round(micros, 2), "usersPerSecond": round(args.batch_users / micros * 1e6)}
+    single = [w["totalMinutes"] for w in trending_series(args.weeks, rng)]
+    micros = bench(lambda: forecaster.forecast(single))
+    results["single"] = {"us": round(micros, 2)}
+    print(f"batch of {args.batch_users}: {results['batch']['us'] / 1000:.1f} ms "
+          f"({results['batch']['usersPerSecond']} users/s); single user: {results['single']['us']:.0f} us")
+
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "compare", "tolerance")}
+    if args.output:
+        save_results(args.output, "forecast", results, config)
+    if args.compare:
+        regressions = compare_results(args.compare, results, ["us", "mae"], args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Prompt size per chat request, before and after the compact prompt builder.
+
+"Before" reproduces the previous prompt: str() of the last six weeks,
+today's stats and the subject distribution interpolated into the middle
+of the system prompt. "After" is the fixed instruction prefix followed by
+the PromptBuilder statistics block. Also reports how many leading tokens
+two different users' prompts share, which is what provider-side prompt
+caching can reuse. Tokens are counted with tiktoken when its encoding is
+available locally, otherwise with the app's chars/4 estimate. Run from the
+backend directory:
+
+    python -m benchmarks.bench_prompt_tokens [--output prompt.json]
+"""
+import argparse
+import os
+import random
+
+from app.services.ai_service import SYSTEM_PROMPT
+from app.services.conversation_store import ConversationStore, estimate_tokens
+from app.services.prompt_builder import PromptBuilder
+from benchmarks.results import save_results
+from benchmarks.synthetic import subject_distribution, today_stats, weekly_series
+
+
+LEGACY_SYSTEM_PROMPT = """You are a friendly and encouraging AI Study Coach named Nexus.
+                Your role is to help students improve their productivity and study habits.
+
+                When responding:
+                1. Be encouraging and positive
+                2. Provide specific, actionable advice
+                3. Reference the user's actual statistics when available
+                4. Use emojis sparingly for engagement
+                5. Keep responses concise but helpful
+
+                User's current statistics:
+                - Weekly focus time trend: {weekly_stats}
+                - Today's stats: {today_stats}
+                - Subject distribution: {subject_dist}
+                """
+
+# Rough per-message framing overhead in chat completion requests
+MESSAGE_OVERHEAD = 4
+
+
+def token_counter():
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("o200k_base")
+        return "tiktoken/o200k_base", lambda text: len(encoding.encode(text))
+    except Exception:
+        return "estimate(chars/4)", estimate_tokens
+
+
+def legacy_prompt(message, weekly, today, subjects, history):
+    system = LEGACY_SYSTEM_PROMPT.format(
+        weekly_stats=str(weekly[-6:]) if weekly else "No data yet",
+        today_stats=str(today) if today else "No sessions today",
+        subject_dist=str(subjects) if subjects else "No subjects tracked",
+    )
+    return [("system", system)] + history + [("human", message)]
+
+
+def compact_prompt(builder, message, weekly, today, subjects, history):
+    context, history = builder.build(message, weekly, today, subjects, history)
+    return [("system", SYSTEM_PROMPT), ("system", context)] + history + [("human", message)]
+
+
+def prompt_tokens(count, messages) -> int:
+    return sum(count(text) + MESSAGE_OVERHEAD for _, text in messages)
+
+
+def shared_prefix_tokens(count, a, b) -> int:
+    flat_a = "\n".join(f"{role}: {text}" for role, text in a)
+    flat_b = "\n".join(f"{role}: {text}" for role, text in b)
+    common = os.path.commonprefix([flat_a, flat_b])
+    return count(common)
+
+
+def history_for(turns: int, rng: random.Random):
+    store = ConversationStore()
+    for i in range(turns):
+        store.add_turn("u", f"How should I plan my {rng.choice(['math', 'physics', 'history'])} revision, part {i}?",
+                       "Break it into 25-minute focus blocks, review yesterday's notes first, "
+                       "then do two practice problems and finish with a short recap." * rng.randint(1, 3))
+    return store.history("u")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--budget", type=int, default=2000)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+
+    counter_name, count = token_counter()
+    print(f"token counter: {counter_name}")
+    rng = random.Random(args.seed)
+    builder = PromptBuilder(SYSTEM_PROMPT, token_budget=args.budget)
+    message = "How can I balance my subjects better?"
+    results = {}
+    for weeks, turns in [(12, 0), (52, 0), (520, 0), (12, 10), (52, 40)]:
+        before, after, prefix_before, prefix_after = [], [], [], []
+        previous = None
+        for _ in range(args.users):
+            weekly, today, subjects = weekly_series(weeks, rng), today_stats(rng), subject_distribution(rng)
+            history = history_for(turns, rng)
+            old = legacy_prompt(message, weekly, today, subjects, history)
+            new = compact_prompt(builder, message, weekly, today, subjects, history)
+            before.append(prompt_tokens(count, old))
+            after.append(prompt_tokens(count, new))
+            if previous is not None:
+                prefix_before.append(shared_prefix_tokens(count, previous[0], old))
+                prefix_after.append(shared_prefix_tokens(count, previous[1], new))
+            previous = (old, new)
+
+        name = f"weeks={weeks},turns={turns}"
+        row = {
+            "beforeTokens": round(sum(before) / len(before), 1),
+            "afterTokens": round(sum(after) / len(after), 1),
+            "maxAfterTokens": max(after),
+            "sharedPrefixBefore": min(prefix_before) if prefix_before else 0,
+            "sharedPrefixAfter": min(prefix_after) if prefix_after else 0,
+        }
+        row["reduction"] = round(1 - row["afterTokens"] / row["beforeTokens"], 3)
+        results[name] = row
+        print(f"{name:>20}  before {row['beforeTokens']:8.1f}  after {row['afterTokens']:8.1f} "
+              f"(-{row['reduction'] * 100:.0f}%, max {row['maxAfterTokens']})  "
+              f"shared prefix {row['sharedPrefixBefore']} -> {row['sharedPrefixAfter']}")
+
+    if args.output:
+        save_results(args.output, "prompt_tokens", results,
+                     {"users": args.users, "seed": args.seed, "budget": args.budget, "counter": counter_name})
+
+
+if __name__ == "__main__":
+    main()
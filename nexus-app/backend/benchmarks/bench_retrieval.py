@@ -0,0 +1,88 @@
+"""
+Query throughput of the local study-technique index, plus the time to
+build it, map it from disk and how many sample questions it would answer
+without the LLM. Run from the backend directory:
+
+    python -m benchmarks.bench_retrieval --output retrieval.json \\
+        [--compare baseline.json --tolerance 0.2] [--min-qps 2000]
+
+With --min-qps, exits non-zero when single-threaded search throughput
+falls below that many queries per second.
+"""
+import argparse
+import json
+import tempfile
+import time
+
+from app.services.retrieval import CORPUS_PATH, RetrievalIndex, build_index
+from benchmarks.microbench import bench
+from benchmarks.results import compare_results, save_results
+
+
+QUERIES = [
+    "How do I stop procrastinating on my assignments?",
+    "What is the best way to memorize vocabulary for a language exam?",
+    "Any tips for studying with a group?",
+    "I keep getting distracted by my phone while studying",
+    "How long should my breaks be?",
+    "How should I prepare for my final exams next month?",
+    "I feel burned out and tired of studying",
+    "How can I take better notes in lectures?",
+    "Should I use the pomodoro technique?",
+    "How do I write an essay faster?",
+    "What should I eat before an exam?",
+    "Explain spaced repetition",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    parser.add_argument("--min-qps", type=float, help="fail below this search throughput")
+    args = parser.parse_args()
+
+    with open(CORPUS_PATH) as f:
+        docs = json.load(f)
+
+    results = {"build": {"us": round(bench(lambda: build_index(docs)), 2)}}
+    with tempfile.TemporaryDirectory() as index_dir:
+        RetrievalIndex(index_dir=index_dir).load()
+        started = time.perf_counter()
+        index = RetrievalIndex(index_dir=index_dir)
+        index.load()
+        results["load_mapped"] = {"us": round((time.perf_counter() - started) * 1e6, 2)}
+
+        queries = iter(range(10 ** 9))
+        micros = bench(lambda: index.search(QUERIES[next(queries) % len(QUERIES)]))
+        results["search"] = {"us": round(micros, 2), "qps": round(1e6 / micros)}
+
+        answered = 0
+        for query in QUERIES:
+            passages = index.search(query)
+            top = passages[0] if passages else None
+            answered += bool(top and top.score >= index.answer_score)
+            print(f"  {top.score if top else 0:.3f}  {top.title if top else '-':<28} {query}")
+        results["answered"] = {"share": round(answered / len(QUERIES), 3)}
+
+    print(f"build {results['build']['us'] / 1000:.2f} ms, mapped load {results['load_mapped']['us'] / 1000:.2f} ms")
+    print(f"search {results['search']['us']:.1f} us/query ({results['search']['qps']} queries/s), "
+          f"answered without LLM {answered}/{len(QUERIES)}")
+
+    config = {"passages": len(docs), "queries": len(QUERIES)}
+    if args.output:
+        save_results(args.output, "retrieval", results, config)
+    if args.compare:
+        regressions = compare_results(args.compare, results, ["us"], args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            raise SystemExit(1)
+    if args.min_qps is not None and results["search"]["qps"] < args.min_qps:
+        print(f"FAIL {results['search']['qps']} queries/s is below {args.min_qps}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
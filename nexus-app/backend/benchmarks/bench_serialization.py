@@ -0,0 +1,74 @@
+"""
+Cost of the analyze-stats request path for row-of-objects versus columnar
+weekly stats: request validation, analysis, and response serialization
+with the standard encoder versus orjson. Run from the backend directory:
+
+    python -m benchmarks.bench_serialization --sizes 12,520,5000 \\
+        --output serialization.json [--compare baseline.json --tolerance 0.2]
+"""
+import argparse
+import json
+import random
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.responses import ORJSONResponse
+from app.routes.ai import AnalyzeRequest, weekly_input
+from app.services.analytics_service import AnalyticsService, rows_to_columns
+from benchmarks.microbench import bench
+from benchmarks.results import compare_results, save_results
+from benchmarks.synthetic import subject_distribution, today_stats, weekly_series
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="12,520,5000", help="comma-separated history lengths in weeks")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    analytics = AnalyticsService()
+    results = {}
+    for size in (int(s) for s in args.sizes.split(",")):
+        weekly = weekly_series(size, rng)
+        columns = rows_to_columns(weekly)
+        today = today_stats(rng)
+        subjects = subject_distribution(rng)
+        rows_body = json.dumps({"weeklyStats": weekly, "todayStats": today, "subjectDistribution": subjects})
+        columns_body = json.dumps({"weeklyStats": columns, "todayStats": today, "subjectDistribution": subjects})
+        rows_result = analytics.analyze(weekly, today, subjects)
+        columns_result = analytics.analyze_columns(columns, today, subjects)
+
+        cases = {
+            "validate_rows": lambda: weekly_input(AnalyzeRequest.model_validate_json(rows_body).weeklyStats),
+            "validate_columns": lambda: weekly_input(AnalyzeRequest.model_validate_json(columns_body).weeklyStats),
+            "analyze_rows": lambda: analytics.analyze(weekly, today, subjects),
+            "analyze_columns": lambda: analytics.analyze_columns(columns, today, subjects),
+            # FastAPI's default path for a returned dict
+            "serialize_rows_std": lambda: JSONResponse(jsonable_encoder(rows_result)).body,
+            "serialize_rows_orjson": lambda: ORJSONResponse(rows_result).body,
+            "serialize_columns_orjson": lambda: ORJSONResponse(columns_result).body,
+        }
+        for name, fn in cases.items():
+            micros = bench(fn)
+            results[f"{name}@{size}"] = {"us": round(micros, 2)}
+            print(f"{name:>26} weeks={size:<6} {micros:12.2f} us/call")
+        print(f"{'request bytes':>26} weeks={size:<6} rows={len(rows_body)} columns={len(columns_body)}")
+
+    config = {"sizes": args.sizes, "seed": args.seed}
+    if args.output:
+        save_results(args.output, "serialization", results, config)
+    if args.compare:
+        regressions = compare_results(args.compare, results, ["us"], args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Measure backend cold start: module import time and time until the first
+successful /health response from a fresh uvicorn process.
+
+Run from the backend directory:
+    python -m benchmarks.bench_startup --runs 5 --max-import-ms 1500 --max-ready-ms 4000
+
+Exits non-zero when a median exceeds its threshold, so it can gate CI.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+def measure_import(env: dict) -> float:
+    code = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1]) * 1000
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_first_health(env: dict, timeout: float = 30.0) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/health", timeout=0.5).status_code == 200:
+                    return (time.perf_counter() - start) * 1000
+            except httpx.TransportError:
+                pass
+            time.sleep(0.01)
+        raise RuntimeError("server did not become healthy in time")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--with-openai-key", action="store_true",
+                        help="set a dummy OPENAI_API_KEY so the LLM code path is configured")
+    parser.add_argument("--max-import-ms", type=float, default=None)
+    parser.add_argument("--max-ready-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    env = dict(os.environ, NEXUS_SESSION_DB=":memory:")
+    if args.with_openai_key:
+        env["OPENAI_API_KEY"] = env.get("OPENAI_API_KEY", "sk-benchmark")
+
+    imports = [measure_import(env) for _ in range(args.runs)]
+    ready = [measure_first_health(env) for _ in range(args.runs)]
+    result = {
+        "importMs": {"median": statistics.median(imports), "max": max(imports)},
+        "firstHealthMs": {"median": statistics.median(ready), "max": max(ready)},
+        "runs": args.runs,
+    }
+    print(json.dumps(result, indent=2))
+
+    failed = False
+    if args.max_import_ms is not None and result["importMs"]["median"] > args.max_import_ms:
+        print(f"import time regression: {result['importMs']['median']:.0f} ms > {args.max_import_ms:.0f} ms")
+        failed = True
+    if args.max_ready_ms is not None and result["firstHealthMs"]["median"] > args.max_ready_ms:
+        print(f"startup regression: {result['firstHealthMs']['median']:.0f} ms > {args.max_ready_ms:.0f} ms")
+        failed = True
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
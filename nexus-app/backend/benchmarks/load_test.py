@@ -0,0 +1,191 @@
+"""
+End-to-end load test of the FastAPI backend against a local stub LLM.
+
+Starts benchmarks.stub_llm and the app (app.main:app) as uvicorn
+subprocesses, then drives /api/chat, /api/analyze-stats and
+/api/generate-plan at fixed concurrency levels and reports p50/p95/p99
+latency and requests per second. analyze-stats sends a distinct history
+with every request, so each one is analyzed; analyze-stats-cached
+replays 64 histories the server has already seen, measuring the
+analysis cache instead. Run from the backend directory:
+
+    python -m benchmarks.load_test --concurrency 1,8,32 --requests 200 \\
+        --output load.json [--compare baseline.json --tolerance 0.2]
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+import httpx
+
+from benchmarks.results import compare_results, latency_summary, save_results
+from benchmarks.synthetic import subject_distribution, today_stats, weekly_series
+
+
+# Benchmark names that post to a different endpoint
+PATHS = {"analyze-stats-cached": "analyze-stats"}
+# Distinct payloads replayed by analyze-stats-cached
+CACHED_PAYLOADS = 64
+CACHED_ENDPOINTS = {"analyze-stats-cached"}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def serve(args: list, env: dict, ready_url: str, ready_check=lambda r: r.status_code == 200, timeout: float = 60):
+    proc = subprocess.Popen(args, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError(f"{' '.join(args)} exited with {proc.returncode}")
+            try:
+                if ready_check(httpx.get(ready_url, timeout=1)):
+                    break
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{ready_url} not ready after {timeout}s")
+            time.sleep(0.05)
+        yield proc
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def payload_factory(endpoint: str, weeks: int, seed: int):
+    rng = random.Random(seed)
+    histories = [weekly_series(weeks, rng) for _ in range(CACHED_PAYLOADS)]
+    subjects = [subject_distribution(rng) for _ in range(CACHED_PAYLOADS)]
+    today = [today_stats(rng) for _ in range(CACHED_PAYLOADS)]
+
+    def build(i: int) -> dict:
+        k = i % CACHED_PAYLOADS
+        if endpoint == "chat":
+            # Open-ended and unique, so neither the intent router nor the cache short-circuits it
+            return {
+                "message": f"Explain how I can balance my subjects better (request {i})",
+                "weeklyStats": histories[k],
+                "todayStats": today[k],
+                "subjectDistribution": subjects[k],
+            }
+        if endpoint == "analyze-stats":
+            # Seeded by request index: never seen by the analysis cache, yet reproducible
+            fresh = random.Random(seed * 1000003 + i)
+            return {
+                "weeklyStats": weekly_series(weeks, fresh),
+                "todayStats": today_stats(fresh),
+                "subjectDistribution": subject_distribution(fresh),
+            }
+        if endpoint == "analyze-stats-cached":
+            return {"weeklyStats": histories[k], "todayStats": today[k], "subjectDistribution": subjects[k]}
+        return {
+            "goal": f"Exam {i}",
+            "daysAvailable": 7 + i % 21,
+            "subjectDistribution": subjects[k],
+            "weeklyStats": histories[k],
+        }
+
+    return build
+
+
+async def drive(base_url: str, endpoint: str, concurrency: int, requests: int, build) -> dict:
+    counter = itertools.count()
+    latencies, errors = [], 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        async def worker():
+            nonlocal errors
+            while (i := next(counter)) < requests:
+                body = build(i)
+                start = time.perf_counter()
+                try:
+                    response = await client.post(f"/api/{PATHS.get(endpoint, endpoint)}", json=body)
+                    response.raise_for_status()
+                    latencies.append((time.perf_counter() - start) * 1000)
+                except httpx.HTTPError:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return latency_summary(latencies, elapsed, errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", default="chat,analyze-stats,analyze-stats-cached,generate-plan")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint and level")
+    parser.add_argument("--weeks", type=int, default=12, help="weekly history length in payloads")
+    parser.add_argument("--latency-ms", type=float, default=300, help="stub LLM time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=80, help="stub LLM token rate")
+    parser.add_argument("--completion-tokens", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    stub_port, app_port = free_port(), free_port()
+    env = dict(
+        os.environ,
+        OPENAI_API_KEY="sk-stub",
+        OPENAI_BASE_URL=f"http://127.0.0.1:{stub_port}/v1",
+        NEXUS_SESSION_DB=":memory:",
+        # Keep chat on the LLM path being measured
+        NEXUS_RETRIEVAL_ANSWER_SCORE="2",
+        NEXUS_LLM_WARMUP="true",
+    )
+    stub_cmd = [
+        sys.executable, "-m", "benchmarks.stub_llm", "--port", str(stub_port),
+        "--latency-ms", str(args.latency_ms),
+        "--tokens-per-second", str(args.tokens_per_second),
+        "--completion-tokens", str(args.completion_tokens),
+    ]
+    app_cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(app_port), "--log-level", "warning"]
+    app_ready = lambda r: r.status_code == 200 and r.json().get("llm") in ("warm", "disabled")
+
+    results = {}
+    with serve(stub_cmd, env, f"http://127.0.0.1:{stub_port}/stats"), \
+            serve(app_cmd, env, f"http://127.0.0.1:{app_port}/health/ready", app_ready):
+        base_url = f"http://127.0.0.1:{app_port}"
+        for endpoint in args.endpoints.split(","):
+            build = payload_factory(endpoint, args.weeks, args.seed)
+            if endpoint in CACHED_ENDPOINTS:
+                # Fill the cache first, so every measured request is a hit
+                asyncio.run(drive(base_url, endpoint, 1, CACHED_PAYLOADS, build))
+            for run, level in enumerate(int(c) for c in args.concurrency.split(",")):
+                # Fresh request indices per level so earlier levels don't warm the response cache
+                offset = run * args.requests
+                summary = asyncio.run(drive(base_url, endpoint, level, args.requests, lambda i: build(offset + i)))
+                results[f"{endpoint}@c{level}"] = summary
+                print(f"{endpoint:>20} c={level:<4} rps={summary['rps']:>8} p50={summary['p50Ms']:>9}ms "
+                      f"p95={summary['p95Ms']:>9}ms p99={summary['p99Ms']:>9}ms errors={summary['errors']}")
+
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "compare")}
+    if args.output:
+        save_results(args.output, "load_test", results, config)
+    if args.compare:
+        regressions = compare_results(args.compare, results, ["p50Ms", "p95Ms", "p99Ms", "rps"], args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
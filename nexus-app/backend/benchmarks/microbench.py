@@ -0,0 +1,66 @@
+"""
+Micro-benchmarks for the analytics and rule-based chat hot paths across
+history sizes. Run from the backend directory:
+
+    python -m benchmarks.microbench --sizes 12,52,520,5200 \\
+        --output micro.json [--compare baseline.json --tolerance 0.2]
+"""
+import argparse
+import random
+import timeit
+
+from app.services.ai_service import AIService
+from app.services.analytics_service import AnalyticsService
+from benchmarks.results import compare_results, save_results
+from benchmarks.synthetic import subject_distribution, today_stats, weekly_series
+
+
+def bench(fn, min_time: float = 0.2) -> float:
+    """Best per-call time in microseconds over several autoranged repeats."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    best = min(timer.repeat(repeat=5, number=number))
+    return best / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="12,52,520,5200", help="comma-separated history lengths in weeks")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    analytics = AnalyticsService()
+    ai = AIService()
+    results = {}
+    for size in (int(s) for s in args.sizes.split(",")):
+        weekly = weekly_series(size, rng)
+        subjects = subject_distribution(rng)
+        today = today_stats(rng)
+        cases = {
+            "analyze": lambda: analytics.analyze(weekly, today, subjects),
+            "get_weekly_comparison": lambda: analytics.get_weekly_comparison(weekly),
+            "chat_fallback": lambda: ai._chat_fallback("How productive was I this week?", weekly, today, subjects),
+        }
+        for name, fn in cases.items():
+            micros = bench(fn)
+            results[f"{name}@{size}"] = {"us": round(micros, 2)}
+            print(f"{name:>22} weeks={size:<6} {micros:12.2f} us/call")
+
+    config = {"sizes": args.sizes, "seed": args.seed}
+    if args.output:
+        save_results(args.output, "microbench", results, config)
+    if args.compare:
+        regressions = compare_results(args.compare, results, ["us"], args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Helpers for summarizing, saving and comparing benchmark results."""
+import json
+import math
+import platform
+import time
+from typing import Dict, List
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def latency_summary(latencies_ms: List[float], elapsed_s: float, errors: int = 0) -> dict:
+    values = sorted(latencies_ms)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "rps": round(len(values) / elapsed_s, 1) if elapsed_s else 0.0,
+        "p50Ms": round(percentile(values, 50), 2),
+        "p95Ms": round(percentile(values, 95), 2),
+        "p99Ms": round(percentile(values, 99), 2),
+        "maxMs": round(values[-1], 2) if values else 0.0,
+    }
+
+
+def save_results(path: str, kind: str, results: Dict[str, dict], config: dict) -> None:
+    payload = {
+        "kind": kind,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "config": config,
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2)
+
+
+def compare_results(baseline_path: str, results: Dict[str, dict], metric_keys: List[str], tolerance: float) -> List[str]:
+    """
+    Compare against a saved run. Returns a message for every metric that got
+    worse by more than `tolerance` (0.2 = 20%). Higher is worse for latency
+    metrics; for "rps" lower is worse.
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for key in metric_keys:
+            before, after = previous.get(key), current.get(key)
+            if not before or after is None:
+                continue
+            change = (before - after) / before if key == "rps" else (after - before) / before
+            if change > tolerance:
+                regressions.append(f"{name} {key}: {before} -> {after} ({change:+.0%})")
+    return regressions
@@ -0,0 +1,115 @@
+"""
+Local OpenAI-compatible chat completions server for benchmarks.
+
+Replies after a fixed latency and then emits tokens at a fixed rate, both
+for plain and streamed (`stream: true`) requests. Run from the backend
+directory:
+    python -m benchmarks.stub_llm --port 9100 --latency-ms 300 --tokens-per-second 80
+and point the backend at it with OPENAI_BASE_URL=http://127.0.0.1:9100/v1.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+LATENCY_MS = float(os.getenv("STUB_LATENCY_MS", "300"))
+TOKENS_PER_SECOND = float(os.getenv("STUB_TOKENS_PER_SECOND", "80"))
+COMPLETION_TOKENS = int(os.getenv("STUB_COMPLETION_TOKENS", "60"))
+
+WORDS = "Great work this week keep building steady focus sessions and review your notes".split()
+
+app = FastAPI(title="Stub LLM")
+app.state.requests = 0
+app.state.peers = set()
+
+
+def _prompt_tokens(body: dict) -> int:
+    text = "".join(str(m.get("content", "")) for m in body.get("messages", []))
+    return max(1, len(text) // 4)
+
+
+def _tokens():
+    return [(" " if i else "") + WORDS[i % len(WORDS)] for i in range(COMPLETION_TOKENS)]
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    app.state.requests += 1
+    if request.client:
+        app.state.peers.add((request.client.host, request.client.port))
+    await asyncio.sleep(LATENCY_MS / 1000)
+    created = int(time.time())
+    model = body.get("model", "stub")
+    tokens = _tokens()
+
+    if body.get("stream"):
+        async def events():
+            head = {"id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": created, "model": model}
+            first = {"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}
+            yield f"data: {json.dumps({**head, 'choices': [first]})}\n\n"
+            for token in tokens:
+                await asyncio.sleep(1 / TOKENS_PER_SECOND)
+                choice = {"index": 0, "delta": {"content": token}, "finish_reason": None}
+                yield f"data: {json.dumps({**head, 'choices': [choice]})}\n\n"
+            last = {"index": 0, "delta": {}, "finish_reason": "stop"}
+            yield f"data: {json.dumps({**head, 'choices': [last]})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    await asyncio.sleep(len(tokens) / TOKENS_PER_SECOND)
+    prompt_tokens = _prompt_tokens(body)
+    return JSONResponse({
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": created,
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": "".join(tokens)},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(tokens),
+            "total_tokens": prompt_tokens + len(tokens),
+        },
+    })
+
+
+@app.get("/v1/models")
+async def models(request: Request):
+    """Cheap endpoint, used by the backend to pre-warm connections."""
+    if request.client:
+        app.state.peers.add((request.client.host, request.client.port))
+    return {"object": "list", "data": [{"id": "gpt-4o-mini", "object": "model"}]}
+
+
+@app.get("/stats")
+async def stats():
+    """Requests served and distinct client connections (host, port) seen."""
+    return {"requests": app.state.requests, "connections": len(app.state.peers)}
+
+
+def main():
+    global LATENCY_MS, TOKENS_PER_SECOND, COMPLETION_TOKENS
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=LATENCY_MS)
+    parser.add_argument("--tokens-per-second", type=float, default=TOKENS_PER_SECOND)
+    parser.add_argument("--completion-tokens", type=int, default=COMPLETION_TOKENS)
+    args = parser.parse_args()
+    LATENCY_MS, TOKENS_PER_SECOND, COMPLETION_TOKENS = args.latency_ms, args.tokens_per_second, args.completion_tokens
+
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
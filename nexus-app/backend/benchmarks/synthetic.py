@@ -0,0 +1,61 @@
+"""Synthetic user histories shared by the benchmark scripts."""
+import random
+from typing import List
+
+
+SUBJECTS = ["Math", "Physics", "Chemistry", "Biology", "History", "Literature", "Coding"]
+
+
+def weekly_series(n_weeks: int, rng: random.Random, year: int = 2024) -> List[dict]:
+    """A weekly stats series with occasional idle weeks and a random drift."""
+    weeks = []
+    level = rng.randint(30, 400)
+    for i in range(n_weeks):
+        level = max(0, level + rng.randint(-60, 60))
+        minutes = 0 if rng.random() < 0.15 else level
+        weeks.append({
+            "weekNumber": i % 52 + 1,
+            "year": year + i // 52,
+            "totalMinutes": minutes,
+            "sessionCount": minutes // 25,
+        })
+    return weeks
+
+
+def trending_series(n_weeks: int, rng: random.Random, year: int = 2024) -> List[dict]:
+    """A weekly stats series with a steady per-user trend, noise and occasional idle weeks."""
+    weeks = []
+    level = rng.uniform(60, 300)
+    drift = rng.uniform(-8, 8)
+    for i in range(n_weeks):
+        level = max(0.0, level + drift)
+        minutes = 0 if rng.random() < 0.1 else max(0, round(rng.gauss(level, level * 0.15)))
+        weeks.append({
+            "weekNumber": i % 52 + 1,
+            "year": year + i // 52,
+            "totalMinutes": minutes,
+            "sessionCount": minutes // 25,
+        })
+    return weeks
+
+
+def subject_distribution(rng: random.Random) -> dict:
+    return {s: rng.randint(0, 600) for s in rng.sample(SUBJECTS, rng.randint(1, len(SUBJECTS)))}
+
+
+def today_stats(rng: random.Random) -> dict:
+    sessions = rng.randint(0, 6)
+    return {"sessions": sessions, "minutes": sessions * 25, "xp": sessions * 50}
+
+
+def session_columns(n_sessions: int, rng: random.Random, start_ms: int = 1704067200000) -> dict:
+    """Columnar sessions over about a year, clustered around a few preferred hours."""
+    preferred = rng.sample(range(7, 23), 3)
+    timestamps, durations, subjects = [], [], []
+    for _ in range(n_sessions):
+        day = rng.randrange(365)
+        hour = rng.choice(preferred) if rng.random() < 0.7 else rng.randrange(24)
+        timestamps.append(start_ms + ((day * 24 + hour) * 60 + rng.randrange(60)) * 60000)
+        durations.append(rng.choice([15, 25, 25, 50]))
+        subjects.append(rng.choice(SUBJECTS))
+    return {"timestamp": timestamps, "durationMinutes": durations, "subject": subjects}
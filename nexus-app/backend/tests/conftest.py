@@ -0,0 +1,17 @@
+import os
+
+# Keep the app self-contained before anything imports it: in-memory session
+# store, in-memory retrieval index and no real LLM endpoint
+os.environ["NEXUS_SESSION_DB"] = ":memory:"
+os.environ["NEXUS_RETRIEVAL_INDEX_DIR"] = ""
+os.environ.pop("OPENAI_API_KEY", None)
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client():
+    from app.main import app
+    with TestClient(app) as client:
+        yield client
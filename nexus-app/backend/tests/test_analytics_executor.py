@@ -0,0 +1,82 @@
+import asyncio
+import os
+import random
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.services.analytics_executor import AnalyticsExecutor
+from benchmarks.synthetic import weekly_series
+
+pytestmark = pytest.mark.anyio
+
+WEEKS = 100000
+# About 100 ms of analysis when run inline; off the loop the worst stall
+# should stay well below that
+MAX_LAG_MS = 60
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="module")
+def history():
+    return weekly_series(WEEKS, random.Random(3))
+
+
+async def lag_while(job) -> float:
+    """Run `job` while a 5 ms ticker measures how late the event loop wakes it, in ms."""
+    worst = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal worst
+        while not done:
+            before = time.perf_counter()
+            await asyncio.sleep(0.005)
+            worst = max(worst, (time.perf_counter() - before - 0.005) * 1000)
+
+    probe = asyncio.create_task(ticker())
+    try:
+        await job
+    finally:
+        done = True
+        await probe
+    return worst
+
+
+@pytest.mark.parametrize("processes", [0, 2], ids=["threads", "processes"])
+async def test_long_analysis_keeps_the_event_loop_responsive(history, processes):
+    executor = AnalyticsExecutor(threads=1, processes=processes, process_min_weeks=10, timeout=60)
+    today, subjects = {"sessions": 3, "minutes": 75, "xp": 150}, {"Math": 100}
+    try:
+        # Warm the pool, so worker process start-up is not measured
+        await executor.analyze(history[:10], today, subjects)
+        lag = await lag_while(executor.analyze(history, today, subjects))
+    finally:
+        executor.shutdown()
+    assert executor.completed == {"process" if processes else "thread": 2}
+    assert lag < MAX_LAG_MS
+
+
+def _exit_worker():
+    os._exit(1)
+
+
+async def test_broken_process_pool_is_shut_down_and_replaced():
+    executor = AnalyticsExecutor(threads=1, processes=1, timeout=60)
+    broken = executor._pool("process")
+    shutdowns = []
+    shutdown = broken.shutdown
+    broken.shutdown = lambda **kwargs: shutdowns.append(kwargs) or shutdown(**kwargs)
+    try:
+        with pytest.raises(BrokenProcessPool):
+            await executor.run("process", _exit_worker)
+        assert shutdowns == [{"wait": False, "cancel_futures": True}]
+        assert executor._process_pool is None
+        assert await executor.run("process", abs, -3) == 3
+    finally:
+        executor.shutdown()
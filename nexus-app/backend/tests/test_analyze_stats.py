@@ -0,0 +1,66 @@
+from app.routes import ai
+
+WEEKS = [
+    {"weekNumber": 40 + i, "year": 2026, "totalMinutes": 100 + 20 * i, "sessionCount": 4 + i}
+    for i in range(6)
+]
+BODY = {"weeklyStats": WEEKS, "todayStats": {"sessions": 1, "minutes": 25, "xp": 50}, "subjectDistribution": {"Math": 90}}
+
+
+def test_revalidation_after_eviction_skips_analysis(client, monkeypatch):
+    etag = client.post("/api/analyze-stats", json=BODY).headers["ETag"]
+    ai.analysis_cache._entries.clear()
+
+    async def fail(*args, **kwargs):
+        raise AssertionError("analysis ran for a matching If-None-Match")
+
+    monkeypatch.setattr(ai.analytics_executor, "analyze", fail)
+    response = client.post("/api/analyze-stats", json=BODY, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
+def test_changed_inputs_get_a_new_etag(client):
+    etag = client.post("/api/analyze-stats", json=BODY).headers["ETag"]
+    changed = {**BODY, "todayStats": {"sessions": 2, "minutes": 50, "xp": 100}}
+    response = client.post("/api/analyze-stats", json=changed, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_sessions_are_cached_by_digest_and_carry_over_to_deltas(client):
+    start = 1791450000000
+    sessions = {
+        "timestamp": [start + i * 3600000 for i in range(40)],
+        "durationMinutes": [25 + i % 3 * 10 for i in range(40)],
+        "subject": ["Math", "Physics"] * 20,
+    }
+    full = client.post("/api/analyze-stats", json={**BODY, "sessions": sessions, "utcOffsetMinutes": 60})
+    etag = full.headers["ETag"]
+    entry = ai.analysis_cache.get(etag)
+    assert isinstance(entry.inputs["sessions"], str)
+    assert entry.focus_patterns == full.json()["focusPatterns"]
+
+    changed = {**sessions, "durationMinutes": [d + 5 for d in sessions["durationMinutes"]]}
+    other = client.post("/api/analyze-stats", json={**BODY, "sessions": changed, "utcOffsetMinutes": 60})
+    assert other.headers["ETag"] != etag
+
+    today = {"sessions": 2, "minutes": 50, "xp": 100}
+    delta = client.post("/api/analyze-stats/delta", json={"baseEtag": etag, "todayStats": today})
+    expected = client.post(
+        "/api/analyze-stats", json={**BODY, "todayStats": today, "sessions": sessions, "utcOffsetMinutes": 60}
+    )
+    assert delta.headers["ETag"] == expected.headers["ETag"]
+    assert delta.content == expected.content
+
+
+def test_batch_matches_single_requests_with_sessions(client):
+    sessions = [
+        {"id": str(i), "subject": "Math", "durationMinutes": 30, "timestamp": f"2026-10-{1 + i // 4:02d}T{8 + i % 4 * 3:02d}:00:00Z"}
+        for i in range(40)
+    ]
+    users = [BODY, {**BODY, "sessions": sessions, "utcOffsetMinutes": -300}]
+    batch = client.post("/api/analyze-stats/batch", json={"users": users}).json()["results"]
+    assert "focusPatterns" not in batch[0]
+    assert batch[1]["focusPatterns"]["bestWindow"] is not None
+    assert batch == [client.post("/api/analyze-stats", json=user).json() for user in users]
@@ -0,0 +1,95 @@
+"""LLM calls through AIService reuse the shared client's pooled connections."""
+import asyncio
+import statistics
+import sys
+import time
+from itertools import count
+
+import httpx
+import pytest
+
+from app.services.ai_service import AIService
+from app.services.http_client import create_llm_http_client, prewarm
+from app.services.llm_scheduler import LLMScheduler
+from benchmarks.load_test import free_port, serve
+
+pytestmark = pytest.mark.anyio
+
+POOL_LIMIT = 4
+CONCURRENCY = 8
+STUB_LATENCY_MS = 20
+# Per-call budget over the stub's latency; waiting on a connection that
+# cannot be reused, or on a body that is already fully read, costs far more
+MAX_OVERHEAD_MS = 150
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="module")
+def stub_url():
+    port = free_port()
+    cmd = [sys.executable, "-m", "benchmarks.stub_llm", "--port", str(port),
+           "--latency-ms", str(STUB_LATENCY_MS), "--tokens-per-second", "2000"]
+    with serve(cmd, None, f"http://127.0.0.1:{port}/stats"):
+        yield f"http://127.0.0.1:{port}"
+
+
+@pytest.fixture
+async def service(stub_url, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-stub")
+    monkeypatch.setenv("OPENAI_BASE_URL", f"{stub_url}/v1")
+    monkeypatch.setenv("NEXUS_LLM_HTTP_MAX_CONNECTIONS", str(POOL_LIMIT))
+    service = AIService(scheduler=LLMScheduler(max_concurrency=CONCURRENCY, max_queue=CONCURRENCY * 4))
+    service.http_client = create_llm_http_client()
+    # Every call must reach the stub, not the local technique index
+    service.retrieval.answer_score = 2.0
+    yield service
+    await service.http_client.aclose()
+
+
+async def connections(stub_url: str) -> int:
+    async with httpx.AsyncClient() as client:
+        return (await client.get(f"{stub_url}/stats")).json()["connections"]
+
+
+_messages = count()
+
+
+async def chat(service: AIService) -> None:
+    # Unique messages so the response cache never answers
+    reply = await service._chat_with_openai(f"Explain spaced repetition ({next(_messages)})", [], {}, {})
+    assert "Great work" in reply["content"], "call fell back instead of reaching the stub"
+
+
+async def stream(service: AIService) -> None:
+    message = f"Walk me through active recall ({next(_messages)})"
+    events = [event async for event, _ in service.chat_stream(message, [], {}, {})]
+    assert "reset" not in events, "stream fell back instead of reaching the stub"
+
+
+async def test_sequential_calls_share_one_connection(service, stub_url):
+    before = await connections(stub_url)
+    await prewarm(service.http_client, service.api_key)
+    warm = await connections(stub_url)
+    assert warm == before + 1
+
+    latencies = {chat: [], stream: []}
+    for _ in range(10):
+        for call, times in latencies.items():
+            started = time.perf_counter()
+            await call(service)
+            times.append((time.perf_counter() - started) * 1000)
+    assert await connections(stub_url) == warm
+    for call, times in latencies.items():
+        # The first round also pays for client and SDK set-up
+        assert statistics.median(times[1:]) < STUB_LATENCY_MS + MAX_OVERHEAD_MS, call.__name__
+
+
+async def test_concurrent_calls_stay_within_pool_limit(service, stub_url):
+    before = await connections(stub_url)
+    for _ in range(3):
+        await asyncio.gather(*(chat(service) if i % 2 else stream(service) for i in range(CONCURRENCY)))
+    assert await connections(stub_url) - before <= POOL_LIMIT
@@ -0,0 +1,21 @@
+import random
+
+import numpy as np
+import pytest
+
+from app.services.analytics_service import pack_weekly_stats
+from app.services.forecasting import Forecaster
+from benchmarks.synthetic import trending_series, weekly_series
+
+
+@pytest.mark.parametrize("forecaster", [Forecaster(), Forecaster(history_weeks=8, min_weeks=5, confidence=0.9)])
+def test_single_series_path_matches_batch(forecaster):
+    rng = random.Random(5)
+    series = [(trending_series if i % 2 else weekly_series)(rng.randint(0, 60), rng) for i in range(300)]
+    minutes, _, lengths = pack_weekly_stats(series)
+    batch = forecaster.forecast_batch(minutes, lengths)
+    for weeks, expected in zip(series, batch):
+        totals = [w["totalMinutes"] for w in weeks]
+        # repr also tells -0.0 from 0.0, which serialize differently
+        assert repr(forecaster.forecast(totals)) == repr(expected)
+        assert repr(forecaster.forecast(np.array(totals, dtype=np.int64))) == repr(expected)
@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.routes import ai
+from app.services.session_store import SQLiteSessionStore
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def session(session_id: str, minutes: int) -> dict:
+    return {"id": session_id, "subject": "Math", "durationMinutes": minutes, "timestamp": "2026-10-12T09:00:00Z"}
+
+
+def test_store_connects_lazily(tmp_path):
+    path = tmp_path / "sessions.db"
+    store = SQLiteSessionStore(str(path))
+    assert not path.exists()
+    store.open()
+    assert path.exists()
+    store.close()
+
+
+def test_negative_duration_rejected(client):
+    response = client.post("/api/sessions", json={"userId": "neg", "sessions": [session("a", -30)]})
+    assert response.status_code == 422
+    assert ai.session_store.get_rollup("neg") is None
+
+
+def test_negative_duration_column_rejected(client):
+    body = {"sessions": {"timestamp": [0, 60000], "durationMinutes": [25, -5], "subject": ["Math", "Math"]}}
+    assert client.post("/api/focus-patterns", json=body).status_code == 422
+
+
+def test_ingest_updates_rollup(client):
+    response = client.post("/api/sessions", json={"userId": "ok", "sessions": [session("a", 25), session("b", 50)]})
+    assert response.json() == {"ingested": 2}
+    assert ai.session_store.get_rollup("ok")["totalMinutes"] == 75
+
+
+@pytest.mark.anyio
+async def test_ingest_runs_off_the_event_loop(monkeypatch):
+    store_ingest = ai.session_store.ingest
+
+    def slow_ingest(user_id, sessions):
+        time.sleep(0.3)
+        return store_ingest(user_id, sessions)
+
+    monkeypatch.setattr(ai.session_store, "ingest", slow_ingest)
+    from app.main import app
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        request = asyncio.create_task(
+            client.post("/api/sessions", json={"userId": "slow", "sessions": [session("a", 25)]})
+        )
+        # The loop keeps ticking while the store write is in progress
+        ticks = 0
+        while not request.done():
+            await asyncio.sleep(0.01)
+            ticks += 1
+        assert (await request).json() == {"ingested": 1}
+    assert ticks >= 10
+
+
+def test_top_subject_query_uses_its_index():
+    store = SQLiteSessionStore()
+    conn = store._connect()
+    indexes = [name for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'subject_rollups' AND sql IS NOT NULL"
+    )]
+    assert indexes == ["idx_subject_rollups_top"]
+    plan = " ".join(row[-1] for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT subject, minutes FROM subject_rollups WHERE user_id = ? "
+        "ORDER BY minutes DESC, subject ASC LIMIT 1",
+        ("u",)
+    ))
+    assert "idx_subject_rollups_top" in plan and "TEMP B-TREE" not in plan
+    store.close()
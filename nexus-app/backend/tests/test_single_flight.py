@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+async def test_cancelled_waiter_leaves_the_call_to_the_others():
+    flight = SingleFlight()
+    release = asyncio.Event()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "done"
+
+    first = asyncio.create_task(flight.do("k", work))
+    second = asyncio.create_task(flight.do("k", work))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    assert await second == "done"
+    assert first.cancelled()
+    assert calls == 1
+    assert flight.stats()["inFlight"] == 0
+
+
+async def test_caller_after_last_waiter_cancelled_starts_a_new_call():
+    flight = SingleFlight()
+    started = []
+
+    async def work():
+        started.append(len(started))
+        try:
+            await asyncio.sleep(0.05)
+        except asyncio.CancelledError:
+            # A slow cleanup keeps the cancelled call alive for a while
+            await asyncio.sleep(0.02)
+            raise
+        return len(started)
+
+    first = asyncio.create_task(flight.do("k", work))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    # The cancelled call is still finishing; this caller must not inherit it
+    assert await flight.do("k", work) == 2
+    assert first.cancelled()
+    assert flight.stats() == {"calls": 2, "coalesced": 0, "errors": 0, "inFlight": 0}
+
+
+async def test_exception_reaches_every_waiter():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    results = await asyncio.gather(*(flight.do("k", work) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(r, ValueError) and str(r) == "upstream failed" for r in results)
+    assert flight.stats() == {"calls": 1, "coalesced": 2, "errors": 1, "inFlight": 0}
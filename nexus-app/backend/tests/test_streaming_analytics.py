@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta, timezone
+
+from app.services.analytics_service import AnalyticsService
+from app.services.session_store import SQLiteSessionStore
+from app.services.streaming_analytics import StreamingAnalytics
+
+NOW = datetime(2026, 10, 16, 12, tzinfo=timezone.utc)
+
+
+def test_push_summary_matches_stored_rollup_on_subject_ties():
+    store = SQLiteSessionStore()
+    analytics = AnalyticsService()
+    engine = StreamingAnalytics(store, analytics)
+    # Math leads first, then Biology draws level in a later batch
+    for i, subject in enumerate(["Math", "Biology"]):
+        session = {"id": str(i), "subject": subject, "durationMinutes": 25, "timestamp": NOW - timedelta(hours=2 - i)}
+        engine.on_sessions("u", store.ingest("u", [session]))
+        pushed = engine.summary("u", NOW)
+        stored = analytics.analyze_rollup(store.get_rollup("u", NOW))
+        assert pushed["topSubject"] == stored["topSubject"]
+    assert pushed["topSubject"] == {"name": "Biology", "minutes": 25}
+
+
+def test_rollup_forecasts_match_the_full_history():
+    store = SQLiteSessionStore()
+    analytics = AnalyticsService()
+    engine = StreamingAnalytics(store, analytics)
+    # 30 weeks, more than the forecast window, some of them idle
+    minutes = [0 if i % 7 == 3 else 60 + 9 * i for i in range(30)]
+    sessions = [
+        {"id": str(i), "subject": "Math", "durationMinutes": m, "timestamp": NOW - timedelta(weeks=29 - i)}
+        for i, m in enumerate(minutes) if m
+    ]
+    engine.on_sessions("u", store.ingest("u", sessions))
+    weeks = [{"weekNumber": 1, "year": 2026, "totalMinutes": m, "sessionCount": int(m > 0)} for m in minutes]
+    expected = analytics.analyze(weeks, {}, {})["forecast"]
+    assert expected["weeksUsed"] == analytics.forecaster.history_weeks
+
+    history_weeks = analytics.forecaster.history_weeks
+    assert analytics.analyze_rollup(store.get_rollup("u", NOW, history_weeks))["forecast"] == expected
+    assert engine.summary("u", NOW)["forecast"] == expected